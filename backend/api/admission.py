@@ -0,0 +1,169 @@
+"""
+Admission control for upstream LLM calls.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Optional
+from .metrics import metrics
+from .telemetry import stage
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+queue_depth = metrics.gauge(
+    "everkind_upstream_queue_depth",
+    "Requests waiting for an upstream slot"
+)
+active_requests = metrics.gauge(
+    "everkind_upstream_active_requests",
+    "Upstream calls currently in progress"
+)
+queue_wait_seconds = metrics.histogram(
+    "everkind_upstream_queue_wait_seconds",
+    "Time spent waiting for an upstream slot"
+)
+admission_rejections = metrics.counter(
+    "everkind_admission_rejections_total",
+    "Requests rejected by admission control by reason"
+)
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request cannot be admitted to the upstream pool.
+    
+    Args:
+        reason (str): Why the request was rejected (queue_full or queue_timeout)
+        retry_after (int): Seconds the client should wait before retrying
+    """
+    
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Upstream capacity exhausted ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounded concurrency pool with a bounded FIFO wait queue.
+    
+    At most ``max_concurrency`` upstream calls run at once. Further callers
+    wait in a queue of at most ``max_queue`` entries for up to
+    ``max_queue_wait`` seconds; beyond that they are rejected immediately,
+    so overload turns into fast 429s instead of piling up timeouts.
+    
+    Args:
+        max_concurrency (int): Maximum concurrent upstream calls
+        max_queue (int): Maximum callers waiting for a slot
+        max_queue_wait (float): Maximum seconds a caller waits for a slot
+    """
+    
+    def __init__(self, max_concurrency: int = 64, max_queue: int = 256, max_queue_wait: float = 5.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+    
+    @property
+    def active(self) -> int:
+        """Number of slots currently held."""
+        return self._active
+    
+    @property
+    def queued(self) -> int:
+        """Number of callers waiting for a slot."""
+        return len(self._waiters)
+    
+    @property
+    def retry_after(self) -> int:
+        """Suggested client back-off in whole seconds."""
+        return max(1, math.ceil(self.max_queue_wait))
+    
+    async def acquire(self, max_wait: Optional[float] = None) -> None:
+        """
+        Wait for an upstream slot.
+        
+        Args:
+            max_wait (float): Tighter wait limit than max_queue_wait, e.g. a request deadline
+        
+        Raises:
+            AdmissionRejected: If the queue is full or the wait deadline passes
+        """
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            active_requests.set(self._active)
+            queue_wait_seconds.observe(0)
+            return
+        
+        if len(self._waiters) >= self.max_queue:
+            admission_rejections.inc(reason="queue_full")
+            raise AdmissionRejected("queue_full", self.retry_after)
+        
+        timeout = self.max_queue_wait if max_wait is None else min(max_wait, self.max_queue_wait)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        queue_depth.set(len(self._waiters))
+        start = time.perf_counter()
+        
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the deadline passed
+                return
+            self._discard(waiter)
+            admission_rejections.inc(reason="queue_timeout")
+            logger.warning(f"Request waited {timeout:.2f}s for an upstream slot - rejecting")
+            raise AdmissionRejected("queue_timeout", self.retry_after)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the caller went away
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+        finally:
+            queue_wait_seconds.observe(time.perf_counter() - start)
+    
+    def release(self) -> None:
+        """Release a slot, handing it directly to the oldest waiter if any."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            queue_depth.set(len(self._waiters))
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        
+        self._active -= 1
+        active_requests.set(self._active)
+    
+    @asynccontextmanager
+    async def slot(self, max_wait: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        Hold an upstream slot for the duration of the block.
+        
+        Args:
+            max_wait (float): Tighter wait limit than max_queue_wait
+        
+        Raises:
+            AdmissionRejected: If no slot could be obtained
+        """
+        with stage("upstream_queue"):
+            await self.acquire(max_wait)
+        try:
+            yield
+        finally:
+            self.release()
+    
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+        queue_depth.set(len(self._waiters))
@@ -2,113 +2,489 @@
 Chat service for handling therapeutic conversations with OpenAI.
 """
 
+import asyncio
+import importlib.util
 import logging
+import time
 import uuid
-from typing import List, Optional
-from openai import OpenAI
+from typing import AsyncIterator, List, Optional, Tuple
+import httpx
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI
+from .admission import AdmissionController, AdmissionRejected
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .llm_backends import BackendUnavailableError, LLMBackend, OfflineBackend, OpenAIBackend
+from .model_router import ModelRouter, RouteDecision
+from .retry import Deadline, DeadlineExceeded, UpstreamCaller
 from .config import settings
-from .models import ChatMessage, ChatRequest, ChatResponse
+from .context_window import ContextWindow, ContextWindowBuilder, TokenCounter
+from .response_cache import ResponseCache
+from .semantic_cache import HashingVectorizer, SemanticCache
+from .singleflight import SingleFlight
+from .prompts import prompts
+from .session_store import create_session_store
+from .summarizer import ConversationSummarizer, summary_for_prompt
+from .telemetry import annotate, record_fallback, record_first_token, record_tokens, stage, upstream_errors
+from .models import ChatMessage, ChatRequest, ChatResponse, ChatStreamEnd, UsageInfo
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 
+class ConversationNotFoundError(LookupError):
+    """Raised when a request continues a conversation the session store does not hold."""
+    
+    def __init__(self, conversation_id: str):
+        super().__init__(f"Conversation {conversation_id} not found")
+        self.conversation_id = conversation_id
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Create the shared, pooled HTTP transport used for upstream calls.
+    
+    Connections are kept alive between requests so a single worker can
+    multiplex many in-flight completions without paying a TLS handshake
+    per chat. HTTP/2 is only enabled when the optional ``h2`` package is
+    installed.
+    
+    Returns:
+        httpx.AsyncClient: Configured asynchronous HTTP client
+    """
+    http2 = settings.OPENAI_HTTP2 and importlib.util.find_spec("h2") is not None
+    if settings.OPENAI_HTTP2 and not http2:
+        logger.warning("OPENAI_HTTP2 is enabled but 'h2' is not installed - falling back to HTTP/1.1")
+    
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(settings.OPENAI_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY
+        )
+    )
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """
+    Decide whether an upstream error says something about upstream health.
+    
+    Rejected requests (4xx other than timeouts, conflicts and rate limits)
+    are our own fault and do not count against the circuit breaker.
+    
+    Args:
+        error (Exception): Error raised by the upstream call
+        
+    Returns:
+        bool: True if the error should count as an upstream failure
+    """
+    if isinstance(error, APIStatusError):
+        return error.status_code >= 500 or error.status_code in (408, 409, 429)
+    return True
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Decide whether an upstream attempt is worth retrying.
+    
+    Args:
+        error (Exception): Error raised by the attempt
+        
+    Returns:
+        bool: True for transient upstream errors such as timeouts and 5xx
+    """
+    if isinstance(error, APIStatusError):
+        return is_upstream_failure(error)
+    return isinstance(
+        error,
+        (APIConnectionError, httpx.TransportError, asyncio.TimeoutError, BackendUnavailableError)
+    )
+
+
 class ChatService:
     """
     Service for handling therapeutic chat conversations using OpenAI.
     """
     
     def __init__(self):
-        """Initialize the chat service with OpenAI client."""
-        self.client = None
-        if settings.OPENAI_API_KEY:
-            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        self.conversation_sessions = {}  # In-memory storage for demo
+        """Initialize the chat service. The LLM backend is created in start()."""
+        self.backend: Optional[LLMBackend] = None
+        self.http_client = None
+        self.session_store = create_session_store()
+        self.context_builder = ContextWindowBuilder(
+            TokenCounter(settings.OPENAI_MODEL),
+            settings.prompt_token_budget
+        )
+        self.response_cache = None
+        if settings.RESPONSE_CACHE_ENABLED:
+            self.response_cache = ResponseCache(
+                max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS
+            )
+        self.semantic_cache = None
+        if settings.SEMANTIC_CACHE_ENABLED:
+            self.semantic_cache = SemanticCache(
+                HashingVectorizer(settings.SEMANTIC_CACHE_DIMENSIONS),
+                capacity=settings.SEMANTIC_CACHE_CAPACITY,
+                threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+                mood_thresholds=settings.semantic_cache_mood_thresholds,
+                ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS
+            )
+        self.admission = AdmissionController(
+            max_concurrency=settings.UPSTREAM_MAX_CONCURRENCY,
+            max_queue=settings.UPSTREAM_MAX_QUEUE,
+            max_queue_wait=settings.UPSTREAM_MAX_QUEUE_WAIT_SECONDS
+        )
+        self.circuit_breaker = CircuitBreaker(
+            window_seconds=settings.CIRCUIT_BREAKER_WINDOW_SECONDS,
+            min_calls=settings.CIRCUIT_BREAKER_MIN_CALLS,
+            failure_rate=settings.CIRCUIT_BREAKER_FAILURE_RATE,
+            slow_call_seconds=settings.CIRCUIT_BREAKER_SLOW_CALL_SECONDS,
+            slow_call_rate=settings.CIRCUIT_BREAKER_SLOW_CALL_RATE,
+            open_seconds=settings.CIRCUIT_BREAKER_OPEN_SECONDS,
+            half_open_calls=settings.CIRCUIT_BREAKER_HALF_OPEN_CALLS,
+            is_failure=is_upstream_failure
+        )
+        self.upstream = UpstreamCaller(
+            max_attempts=settings.UPSTREAM_RETRY_MAX_ATTEMPTS,
+            base_delay=settings.UPSTREAM_RETRY_BASE_DELAY_SECONDS,
+            max_delay=settings.UPSTREAM_RETRY_MAX_DELAY_SECONDS,
+            is_retryable=is_retryable,
+            hedge=settings.UPSTREAM_HEDGE_ENABLED,
+            hedge_quantile=settings.UPSTREAM_HEDGE_QUANTILE,
+            hedge_min_samples=settings.UPSTREAM_HEDGE_MIN_SAMPLES,
+            hedge_min_delay=settings.UPSTREAM_HEDGE_MIN_DELAY_SECONDS
+        )
+        self.router = ModelRouter(
+            settings.model_pool,
+            light_max_chars=settings.ROUTER_LIGHT_MAX_CHARS,
+            light_max_history=settings.ROUTER_LIGHT_MAX_HISTORY_MESSAGES,
+            latency_slo=settings.ROUTER_LATENCY_SLO_SECONDS,
+            ewma_alpha=settings.ROUTER_EWMA_ALPHA,
+            cooldown_seconds=settings.ROUTER_COOLDOWN_SECONDS
+        )
+        self.inflight = SingleFlight() if settings.COALESCE_REQUESTS_ENABLED else None
+        self.summarizer = None
+        if settings.SUMMARY_ENABLED:
+            self.summarizer = ConversationSummarizer(
+                self.session_store,
+                trigger_messages=settings.SUMMARY_TRIGGER_MESSAGES,
+                keep_recent_messages=settings.SUMMARY_KEEP_RECENT_MESSAGES,
+                max_summary_tokens=settings.SUMMARY_MAX_TOKENS
+            )
+    
+    @property
+    def client(self) -> Optional[AsyncOpenAI]:
+        """The OpenAI client behind the backend, None for other backends."""
+        return self.backend.client if isinstance(self.backend, OpenAIBackend) else None
     
-    def _build_system_message(self, user_mood: Optional[str] = None) -> str:
+    @client.setter
+    def client(self, client: Optional[AsyncOpenAI]) -> None:
+        self.backend = OpenAIBackend(client) if client is not None else None
+    
+    async def start(self) -> None:
+        """
+        Create the LLM backend selected by ``LLM_BACKEND``.
+        
+        The OpenAI backend gets an asynchronous client over a pooled HTTP
+        transport and is only created when an API key is configured.
+        Called once from the application lifespan; calling it again is a no-op.
         """
-        Build the system message with optional mood context.
+        if self.backend is not None:
+            return
+        
+        if settings.LLM_BACKEND == "offline":
+            self.backend = OfflineBackend(
+                latency_median=settings.OFFLINE_LATENCY_MEDIAN_SECONDS,
+                latency_p99=settings.OFFLINE_LATENCY_P99_SECONDS,
+                tokens_per_second=settings.OFFLINE_TOKENS_PER_SECOND,
+                error_rate=settings.OFFLINE_ERROR_RATE,
+                seed=settings.OFFLINE_SEED
+            )
+            logger.info("Offline LLM backend initialized")
+            return
+        
+        if not settings.OPENAI_API_KEY:
+            return
+        
+        self.http_client = create_http_client()
+        self.client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            timeout=settings.OPENAI_TIMEOUT,
+            max_retries=0,  # Retries are deadline-aware and handled by self.upstream
+            http_client=self.http_client
+        )
+        logger.info("OpenAI async client initialized")
+    
+    async def close(self) -> None:
+        """Close the LLM backend, release pooled connections and the session store."""
+        if self.summarizer is not None:
+            await self.summarizer.close()
+        if self.backend is not None:
+            await self.backend.close()
+        if self.http_client is not None:
+            await self.http_client.aclose()
+        self.backend = None
+        self.http_client = None
+        self.session_store.close()
+    
+    def resolve_conversation(self, request: ChatRequest) -> Tuple[str, List[dict]]:
+        """
+        Determine the conversation ID and prior turns for a request.
+        
+        A request carrying only ``conversation_id`` continues a stored
+        conversation, with history rebuilt from the session store. A request
+        carrying ``conversation_history`` is treated statelessly, as before.
         
         Args:
-            user_mood (str): The user's current mood
+            request (ChatRequest): The chat request
             
         Returns:
-            str: Complete system message for the AI
+            Tuple[str, List[dict]]: Conversation ID and prior user/assistant turns
+            
+        Raises:
+            ConversationNotFoundError: If the conversation to continue is unknown
         """
-        base_prompt = settings.THERAPIST_SYSTEM_PROMPT
+        if request.conversation_history:
+            history = [
+                {"role": msg.role, "content": msg.content}
+                for msg in request.conversation_history
+            ]
+            return request.conversation_id or str(uuid.uuid4()), history
         
-        if user_mood:
-            mood_context = f"\n\nCurrent user mood: {user_mood}. Please acknowledge their emotional state and respond with appropriate therapeutic support."
-            return base_prompt + mood_context
+        if request.conversation_id:
+            session = self.session_store.get(request.conversation_id)
+            if session is None:
+                raise ConversationNotFoundError(request.conversation_id)
+            return request.conversation_id, session["messages"]
         
-        return base_prompt
+        return str(uuid.uuid4()), []
     
-    def _prepare_messages(self, request: ChatRequest) -> List[dict]:
+    def _build_context(
+        self,
+        request: ChatRequest,
+        history: Optional[List[dict]] = None,
+        conversation_id: Optional[str] = None
+    ) -> ContextWindow:
+        """
+        Build the token-budgeted context window for a request.
+        
+        If the conversation has a running summary, the turns it covers are
+        replaced by the summary.
+        
+        Args:
+            request (ChatRequest): The chat request
+            history (List[dict]): Prior turns; defaults to the request's conversation history
+            conversation_id (str): Conversation whose stored summary may apply
+            
+        Returns:
+            ContextWindow: Messages to send and their estimated prompt size
+        """
+        with stage("prompt_build"):
+            if history is None:
+                history = [
+                    {"role": msg.role, "content": msg.content}
+                    for msg in request.conversation_history
+                ]
+            
+            summary_message = None
+            if self.summarizer is not None and conversation_id:
+                summary, summarized_count = summary_for_prompt(self.session_store.get(conversation_id), history)
+                if summary:
+                    summary_message = {
+                        "role": "system",
+                        "content": f"Summary of the earlier conversation: {summary}"
+                    }
+                    history = history[summarized_count:]
+            
+            annotate(prompt_version=prompts.version)
+            return self.context_builder.build(
+                prompts.system_message,
+                history,
+                {"role": "user", "content": request.message},
+                summary_message,
+                prompts.mood_note(request.user_mood)
+            )
+    
+    def _prepare_messages(
+        self,
+        request: ChatRequest,
+        history: Optional[List[dict]] = None,
+        conversation_id: Optional[str] = None
+    ) -> List[dict]:
         """
         Prepare messages for OpenAI API format.
         
+        The system prompt and the newest turns are always kept; older turns
+        are dropped once the prompt would exceed the configured token budget.
+        
         Args:
             request (ChatRequest): The chat request
+            history (List[dict]): Prior turns; defaults to the request's conversation history
+            conversation_id (str): Conversation whose stored summary may apply
             
         Returns:
             List[dict]: Messages formatted for OpenAI API
         """
-        messages = [
-            {
-                "role": "system",
-                "content": self._build_system_message(request.user_mood)
-            }
-        ]
+        return self._build_context(request, history, conversation_id).messages
+    
+    @staticmethod
+    def _response_cache_key(model: str, request: ChatRequest, history: List[dict]) -> str:
+        """
+        Build the response cache key of a request's prompt on a model.
         
-        # Add conversation history
-        for msg in request.conversation_history:
-            messages.append({
-                "role": msg.role,
-                "content": msg.content
-            })
+        Args:
+            model (str): Model the reply is generated with
+            request (ChatRequest): The chat request
+            history (List[dict]): Prior user/assistant turns
+            
+        Returns:
+            str: Response cache key
+        """
+        return ResponseCache.make_key(
+            model,
+            prompts.version,
+            request.user_mood,
+            history,
+            request.message,
+            settings.OPENAI_TEMPERATURE
+        )
+    
+    @staticmethod
+    def _request_key(request: ChatRequest) -> tuple:
+        """
+        Identify duplicate submissions of the same chat request.
         
-        # Add current user message
-        messages.append({
-            "role": "user",
-            "content": request.message
-        })
+        Only meaningful for requests continuing a conversation; others are
+        never coalesced.
         
-        return messages
+        Client timestamps on history items are ignored, since they are
+        regenerated whenever the history is parsed.
+        
+        Args:
+            request (ChatRequest): The chat request
+            
+        Returns:
+            tuple: Hashable key equal for identical requests
+        """
+        return (
+            request.conversation_id,
+            request.message,
+            request.user_mood,
+            request.use_cache,
+            tuple((msg.role, msg.content) for msg in request.conversation_history)
+        )
     
-    async def get_therapeutic_response(self, request: ChatRequest) -> ChatResponse:
+    async def get_therapeutic_response(self, request: ChatRequest, persist: bool = True) -> ChatResponse:
         """
         Get therapeutic response from OpenAI.
         
+        Identical requests continuing the same conversation that arrive while
+        one is already in flight (double clicks, client retries) wait for and
+        share its response instead of making another upstream call. Requests
+        without a ``conversation_id`` each start their own conversation, so
+        they are never merged: two users sending the same opener must not
+        share a session.
+        
         Args:
             request (ChatRequest): The chat request
+            persist (bool): Whether to store the exchange in the session store
             
         Returns:
             ChatResponse: The AI therapist's response
             
         Raises:
-            Exception: If OpenAI API call fails
+            ConversationNotFoundError: If the conversation to continue is unknown
+            AdmissionRejected: If no upstream slot is available
         """
-        try:
-            # Generate conversation ID
-            conversation_id = str(uuid.uuid4())
+        if self.inflight is None or not request.conversation_id:
+            return await self._get_therapeutic_response(request, persist)
+        
+        return await self.inflight.do(
+            self._request_key(request),
+            lambda: self._get_therapeutic_response(request, persist)
+        )
+    
+    async def _get_therapeutic_response(self, request: ChatRequest, persist: bool = True) -> ChatResponse:
+        """
+        Generate a therapeutic response for a single request.
+        
+        Args:
+            request (ChatRequest): The chat request
+            persist (bool): Whether to store the exchange in the session store
+            
+        Returns:
+            ChatResponse: The AI therapist's response
             
-            # Check if OpenAI client is available
-            if not self.client:
-                logger.warning("OpenAI client not initialized - using fallback response")
+        Raises:
+            ConversationNotFoundError: If the conversation to continue is unknown
+            AdmissionRejected: If no upstream slot is available
+        """
+        deadline = Deadline(settings.CHAT_DEADLINE_SECONDS)
+        conversation_id, history = self.resolve_conversation(request)
+        
+        try:
+            # Check if an LLM backend is available
+            if self.backend is None:
+                logger.warning("LLM backend not initialized - using fallback response")
+                record_fallback("not_configured")
                 fallback_response = self._get_fallback_response(request.user_mood)
                 return ChatResponse(
                     response=fallback_response,
-                    conversation_id=conversation_id
+                    conversation_id=conversation_id,
+                    source="fallback"
                 )
             
+            decision = self.router.route(request.message, history, request.user_mood)
+            
+            # Crisis messages always get a freshly generated reply
+            use_cache = request.use_cache and decision.risk != "high"
+            
+            # Serve identical prompts from the response cache when the client allows it
+            cache_key = None
+            if self.response_cache is not None and use_cache:
+                cache_key = self._response_cache_key(decision.model, request, history)
+                cached_response = self.response_cache.get(cache_key)
+                if cached_response is not None:
+                    if persist:
+                        self._store_session(conversation_id, history, request.message, cached_response)
+                    return ChatResponse(
+                        response=cached_response,
+                        conversation_id=conversation_id,
+                        source="cache"
+                    )
+            
+            # Paraphrased openers can reuse a reply from the semantic cache, which
+            # the operator opts into, so it does not wait for the client's use_cache
+            use_semantic_cache = self.semantic_cache is not None and decision.risk != "high" and not history
+            if use_semantic_cache:
+                cached_response = self.semantic_cache.lookup(
+                    request.message,
+                    request.user_mood,
+                    f"{decision.model}:{prompts.version}"
+                )
+                if cached_response is not None:
+                    if persist:
+                        self._store_session(conversation_id, history, request.message, cached_response)
+                    return ChatResponse(
+                        response=cached_response,
+                        conversation_id=conversation_id,
+                        source="semantic_cache"
+                    )
+            
             # Prepare messages for OpenAI
-            messages = self._prepare_messages(request)
+            messages = self._prepare_messages(request, history, conversation_id)
             
-            logger.info(f"Sending request to OpenAI for conversation {conversation_id}")
+            logger.debug("sending upstream request", extra={"conversation_id": conversation_id})
             
-            # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
+            # Fail fast instead of queueing while upstream is known to be down
+            self.circuit_breaker.check()
+            
+            # Call the LLM backend on the routed model, retrying transient errors within the deadline
+            response, model = await self._routed_completion(
+                decision,
+                deadline,
                 messages=messages,
                 max_tokens=settings.OPENAI_MAX_TOKENS,
                 temperature=settings.OPENAI_TEMPERATURE,
@@ -117,32 +493,327 @@ class ChatService:
             )
             
             # Extract the response content
-            ai_response = response.choices[0].message.content
+            ai_response = response.content
+            record_tokens(model, response.prompt_tokens, response.completion_tokens)
             
-            logger.info(f"Received response from OpenAI for conversation {conversation_id}")
+            logger.info(
+                "upstream response received",
+                extra={"conversation_id": conversation_id, "model": model, "route": decision.route}
+            )
             
-            # Store conversation in memory (for demo purposes)
-            self.conversation_sessions[conversation_id] = {
-                "messages": messages,
-                "last_response": ai_response
-            }
+            if persist:
+                self._store_session(conversation_id, history, request.message, ai_response)
+            if cache_key is not None:
+                # A failover reply belongs under the model that actually wrote it
+                if model != decision.model:
+                    cache_key = self._response_cache_key(model, request, history)
+                self.response_cache.put(cache_key, ai_response)
+            if use_semantic_cache:
+                self.semantic_cache.store(request.message, request.user_mood, ai_response, f"{model}:{prompts.version}")
             
             return ChatResponse(
                 response=ai_response,
-                conversation_id=conversation_id
+                conversation_id=conversation_id,
+                model=model,
+                route=decision.route if model == decision.model else "failover"
             )
             
+        except AdmissionRejected:
+            raise
+        except CircuitOpenError:
+            logger.warning("Upstream circuit open - using fallback response")
+            record_fallback("circuit_open")
+            return ChatResponse(
+                response=self._get_fallback_response(request.user_mood),
+                conversation_id=conversation_id,
+                source="fallback"
+            )
         except Exception as e:
             logger.error(f"Error getting therapeutic response: {str(e)}")
+            record_fallback("error")
             
             # Return a fallback response for production resilience
             fallback_response = self._get_fallback_response(request.user_mood)
             
             return ChatResponse(
                 response=fallback_response,
-                conversation_id=str(uuid.uuid4())
+                conversation_id=conversation_id,
+                source="fallback"
             )
     
+    async def stream_therapeutic_response(self, request: ChatRequest) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Stream a therapeutic response from OpenAI token by token.
+        
+        Yields ``("delta", text)`` for every content fragment received from
+        upstream, followed by a single ``("done", json)`` event carrying the
+        serialized ChatStreamEnd. If OpenAI is unavailable before the first
+        token, the fallback response is streamed as one delta instead.
+        
+        Args:
+            request (ChatRequest): The chat request
+            
+        Yields:
+            Tuple[str, str]: Event name and its payload
+            
+        Raises:
+            ConversationNotFoundError: If the conversation to continue is unknown
+            AdmissionRejected: If no upstream slot is available
+        """
+        conversation_id, history = self.resolve_conversation(request)
+        context = self._build_context(request, history, conversation_id)
+        messages = context.messages
+        parts: List[str] = []
+        completion_chunks = 0
+        model = None
+        route = None
+        
+        try:
+            if self.backend is None:
+                logger.warning("LLM backend not initialized - streaming fallback response")
+                record_fallback("not_configured")
+                parts.append(self._get_fallback_response(request.user_mood))
+                yield "delta", parts[0]
+            else:
+                logger.debug("streaming upstream request", extra={"conversation_id": conversation_id})
+                
+                self.circuit_breaker.check()
+                
+                decision = self.router.route(request.message, history, request.user_mood)
+                
+                # The slot is held until the last chunk has been received
+                deadline = Deadline(settings.CHAT_DEADLINE_SECONDS)
+                async with self.admission.slot(max_wait=deadline.remaining()):
+                    # Retry until the stream starts; a started stream cannot be hedged
+                    stream, model = await self._routed_completion(
+                        decision,
+                        deadline,
+                        admitted=False,
+                        messages=messages,
+                        max_tokens=settings.OPENAI_MAX_TOKENS,
+                        temperature=settings.OPENAI_TEMPERATURE,
+                        presence_penalty=0.1,
+                        frequency_penalty=0.1,
+                        stream=True
+                    )
+                    route = decision.route if model == decision.model else "failover"
+                    
+                    async for delta in stream:
+                        if not completion_chunks:
+                            record_first_token()
+                        completion_chunks += 1
+                        parts.append(delta)
+                        yield "delta", delta
+                
+                # Each streamed chunk carries roughly one token
+                record_tokens(model, context.prompt_tokens, completion_chunks)
+                
+                # Record the assembled reply once the stream has finished
+                self._store_session(conversation_id, history, request.message, "".join(parts))
+                logger.info(
+                    "upstream stream finished",
+                    extra={"conversation_id": conversation_id, "model": model, "completion_chunks": completion_chunks}
+                )
+                
+        except AdmissionRejected:
+            raise
+        except CircuitOpenError:
+            logger.warning("Upstream circuit open - streaming fallback response")
+            record_fallback("circuit_open")
+            yield "delta", self._get_fallback_response(request.user_mood)
+        except Exception as e:
+            logger.error(f"Error streaming therapeutic response: {str(e)}")
+            
+            # Only fall back if the user has not seen any of the reply yet
+            if not parts:
+                record_fallback("error")
+                fallback_response = self._get_fallback_response(request.user_mood)
+                yield "delta", fallback_response
+                model = route = None
+        
+        # Each streamed chunk carries roughly one token
+        done = ChatStreamEnd(
+            conversation_id=conversation_id,
+            usage=UsageInfo(
+                prompt_tokens=context.prompt_tokens,
+                completion_tokens=completion_chunks,
+                total_tokens=context.prompt_tokens + completion_chunks
+            ),
+            model=model,
+            route=route
+        )
+        yield "done", done.model_dump_json()
+    
+    async def open_stream(self, request: ChatRequest) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Start streaming a response, surfacing request errors before the first event.
+        
+        The first event is awaited eagerly so that unknown conversations and
+        admission rejections raise here, while the caller can still answer
+        with a proper status code instead of a half-sent event stream.
+        
+        Args:
+            request (ChatRequest): The chat request
+            
+        Returns:
+            AsyncIterator[Tuple[str, str]]: The stream of events, first one included
+            
+        Raises:
+            ConversationNotFoundError: If the conversation to continue is unknown
+            AdmissionRejected: If no upstream slot is available
+        """
+        events = self.stream_therapeutic_response(request)
+        first = await events.__anext__()
+        
+        async def chained() -> AsyncIterator[Tuple[str, str]]:
+            try:
+                yield first
+                async for event in events:
+                    yield event
+            finally:
+                await events.aclose()
+        
+        return chained()
+    
+    def _store_session(self, conversation_id: str, history: List[dict], message: str, ai_response: str) -> None:
+        """
+        Record a completed exchange in the session store.
+        
+        The stored history holds every user/assistant turn including this
+        reply, so the next request can continue from ``conversation_id``
+        alone. The system prompt is identical for every session, so it is
+        not copied into the stored history. A running summary already
+        stored for the conversation is kept.
+        
+        Args:
+            conversation_id (str): The conversation identifier
+            history (List[dict]): Prior user/assistant turns
+            message (str): The user's message
+            ai_response (str): The assistant's reply
+        """
+        session = {}
+        if self.summarizer is not None:
+            session = self.session_store.get(conversation_id) or {}
+        messages = list(history)
+        messages.append({"role": "user", "content": message})
+        messages.append({"role": "assistant", "content": ai_response})
+        self.session_store.put(conversation_id, dict(
+            session,
+            messages=messages,
+            last_response=ai_response
+        ))
+        
+        if self.summarizer is not None and self.backend is not None:
+            self.summarizer.maybe_schedule(conversation_id, self._complete_summary)
+    
+    async def _routed_completion(
+        self,
+        decision: RouteDecision,
+        deadline: Deadline,
+        admitted: bool = True,
+        **params
+    ) -> Tuple[object, str]:
+        """
+        Call the routed model, failing over to the next candidate on upstream errors.
+        
+        Each model gets its own retries; the deadline is shared by all of them.
+        
+        Args:
+            decision (RouteDecision): Routing decision for the request
+            deadline (Deadline): Request deadline
+            admitted (bool): Take an upstream slot per attempt and allow hedging; streams
+                hold a slot already and cannot be hedged
+            **params: Chat completion parameters other than the model
+            
+        Returns:
+            Tuple[object, str]: The completion (or delta stream) and the model that produced it
+        """
+        attempt = self._admitted_completion if admitted else self._create_completion
+        with stage("upstream"):
+            for index, model in enumerate(decision.candidates):
+                try:
+                    result = await self.upstream.call(
+                        lambda attempt_deadline, model=model: attempt(attempt_deadline, model=model, **params),
+                        deadline,
+                        hedge=admitted
+                    )
+                    return result, model
+                except (AdmissionRejected, CircuitOpenError, DeadlineExceeded):
+                    raise
+                except Exception as e:
+                    if not is_upstream_failure(e):
+                        raise
+                    self.router.record_failure(model)
+                    if index == len(decision.candidates) - 1:
+                        raise
+                    logger.warning(f"Model {model} failed ({str(e)}) - failing over to {decision.candidates[index + 1]}")
+    
+    async def _create_completion(self, deadline: Deadline, **params):
+        """
+        Make one upstream completion attempt under the circuit breaker.
+        
+        For streams only the time until the response starts counts as the
+        attempt's latency.
+        
+        Args:
+            deadline (Deadline): Request deadline bounding the attempt's timeout
+            **params: Chat completion parameters
+            
+        Returns:
+            Completion: The finished completion, or an iterator over content
+            deltas when ``stream=True``
+        """
+        call = self.backend.stream if params.pop("stream", False) else self.backend.complete
+        async with self.circuit_breaker.guard():
+            start = time.perf_counter()
+            try:
+                with stage("upstream_call"):
+                    result = await call(
+                        timeout=min(settings.OPENAI_TIMEOUT, deadline.remaining()),
+                        **params
+                    )
+            except Exception as e:
+                upstream_errors.inc(error=type(e).__name__)
+                raise
+            self.router.record_latency(params["model"], time.perf_counter() - start)
+            return result
+    
+    async def _admitted_completion(self, deadline: Deadline, **params):
+        """
+        Make one upstream completion attempt holding an upstream slot.
+        
+        Args:
+            deadline (Deadline): Request deadline, also bounding the queue wait
+            **params: Chat completion parameters
+            
+        Returns:
+            Completion: The finished completion
+        """
+        async with self.admission.slot(max_wait=deadline.remaining()):
+            return await self._create_completion(deadline, **params)
+    
+    async def _complete_summary(self, messages: List[dict], max_tokens: int) -> str:
+        """
+        Generate a conversation summary with the LLM backend.
+        
+        Args:
+            messages (List[dict]): Summarization prompt
+            max_tokens (int): Maximum summary length in tokens
+            
+        Returns:
+            str: The summary text
+        """
+        async with self.admission.slot():
+            async with self.circuit_breaker.guard():
+                response = await self.backend.complete(
+                    model=settings.SUMMARY_MODEL or settings.OPENAI_MODEL,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=0.3,
+                    timeout=settings.OPENAI_TIMEOUT
+                )
+        return response.content
+    
     def _get_fallback_response(self, user_mood: Optional[str] = None) -> str:
         """
         Get a fallback response when OpenAI is unavailable.
@@ -180,7 +851,7 @@ class ChatService:
         Returns:
             Optional[List[dict]]: Conversation messages or None if not found
         """
-        session = self.conversation_sessions.get(conversation_id)
+        session = self.session_store.get(conversation_id)
         return session["messages"] if session else None
 
 
@@ -0,0 +1,221 @@
+"""
+Circuit breaker for upstream LLM calls.
+"""
+
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, Optional, Tuple
+from .metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Gauge values for each state
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+circuit_state = metrics.gauge(
+    "everkind_upstream_circuit_state",
+    "Upstream circuit breaker state (0 closed, 1 half open, 2 open)"
+)
+circuit_transitions = metrics.counter(
+    "everkind_upstream_circuit_transitions_total",
+    "Upstream circuit breaker state changes by new state"
+)
+short_circuited_calls = metrics.counter(
+    "everkind_upstream_short_circuited_total",
+    "Upstream calls skipped because the circuit was open"
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Trips on a high rolling error or slow-call rate and probes for recovery.
+    
+    Calls are recorded in a sliding time window. Once the window holds at
+    least ``min_calls`` and either the failure rate or the share of calls
+    slower than ``slow_call_seconds`` reaches its threshold, the circuit
+    opens and calls are refused instantly. After ``open_seconds`` it turns
+    half open and lets ``half_open_calls`` trial calls through: if all
+    succeed quickly the circuit closes, and any failure opens it again.
+    
+    Args:
+        window_seconds (float): Length of the rolling window
+        min_calls (int): Calls needed in the window before the breaker can trip
+        failure_rate (float): Failure share that trips the breaker
+        slow_call_seconds (float): Duration above which a call counts as slow
+        slow_call_rate (float): Slow-call share that trips the breaker
+        open_seconds (float): Time to stay open before probing
+        half_open_calls (int): Trial calls allowed while half open
+        is_failure (Callable[[Exception], bool]): Whether an error counts against upstream health
+        clock (Callable[[], float]): Monotonic time source
+    """
+    
+    def __init__(
+        self,
+        window_seconds: float = 60.0,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 10.0,
+        slow_call_rate: float = 0.8,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 3,
+        is_failure: Callable[[Exception], bool] = lambda error: True,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.is_failure = is_failure
+        self._clock = clock
+        
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials_started = 0
+        self._trials_succeeded = 0
+        # Bumped on every state change, so stale trials can be told apart
+        self._transitions = 0
+        # (finished_at, failed, slow) for calls in the window
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()
+        self._failures = 0
+        self._slow = 0
+        circuit_state.set(STATE_VALUES[CLOSED])
+    
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half open once the wait is over."""
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+        return self._state
+    
+    def allows_calls(self) -> bool:
+        """Whether a call would currently be let through, without reserving it."""
+        state = self.state
+        return state == CLOSED or (state == HALF_OPEN and self._trials_started < self.half_open_calls)
+    
+    def check(self) -> None:
+        """
+        Fail fast if a call would be refused, without reserving a trial call.
+        
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        if not self.allows_calls():
+            short_circuited_calls.inc()
+            raise CircuitOpenError("Upstream circuit is open")
+    
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """
+        Run an upstream call under the breaker, recording its outcome.
+        
+        Raises:
+            CircuitOpenError: If the circuit refuses the call
+        """
+        trial = self._admit()
+        start = self._clock()
+        try:
+            yield
+        except Exception as e:
+            self._record(start, failed=self.is_failure(e))
+            raise
+        except BaseException:
+            # Cancelled calls say nothing about upstream health; free the
+            # trial slot only if it belongs to the current half-open period
+            if trial is not None and trial == self._transitions:
+                self._trials_started -= 1
+            raise
+        else:
+            self._record(start, failed=False)
+    
+    def stats(self) -> Dict[str, object]:
+        """Get the current state and window counters."""
+        self._prune(self._clock())
+        return {
+            "state": self.state,
+            "calls": len(self._calls),
+            "failures": self._failures,
+            "slow_calls": self._slow
+        }
+    
+    def _admit(self) -> Optional[int]:
+        """Admit a call, returning the state generation if it is a half-open trial."""
+        state = self.state
+        if state == CLOSED:
+            return None
+        if state == HALF_OPEN and self._trials_started < self.half_open_calls:
+            self._trials_started += 1
+            return self._transitions
+        short_circuited_calls.inc()
+        raise CircuitOpenError("Upstream circuit is open")
+    
+    def _record(self, start: float, failed: bool) -> None:
+        now = self._clock()
+        slow = now - start >= self.slow_call_seconds
+        
+        if self._state == HALF_OPEN:
+            if failed or slow:
+                self._open(now)
+                return
+            self._trials_succeeded += 1
+            if self._trials_succeeded >= self.half_open_calls:
+                self._transition(CLOSED)
+            return
+        
+        if self._state == OPEN:
+            # Late result from a call started before the circuit opened
+            return
+        
+        self._calls.append((now, failed, slow))
+        self._failures += failed
+        self._slow += slow
+        self._prune(now)
+        
+        calls = len(self._calls)
+        if calls >= self.min_calls and (
+            self._failures / calls >= self.failure_rate or self._slow / calls >= self.slow_call_rate
+        ):
+            logger.warning(
+                f"Opening upstream circuit: {self._failures}/{calls} failed, "
+                f"{self._slow}/{calls} slow in the last {self.window_seconds:.0f}s"
+            )
+            self._open(now)
+    
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while self._calls and self._calls[0][0] < cutoff:
+            _, failed, slow = self._calls.popleft()
+            self._failures -= failed
+            self._slow -= slow
+    
+    def _open(self, now: float) -> None:
+        self._opened_at = now
+        self._transition(OPEN)
+    
+    def _transition(self, state: str) -> None:
+        if state == self._state:
+            return
+        logger.info(f"Upstream circuit {self._state} -> {state}")
+        self._state = state
+        self._transitions += 1
+        self._trials_started = 0
+        self._trials_succeeded = 0
+        if state != OPEN:
+            self._calls.clear()
+            self._failures = 0
+            self._slow = 0
+        circuit_state.set(STATE_VALUES[state])
+        circuit_transitions.inc(state=state)
@@ -4,7 +4,7 @@ Configuration settings for the EverKind API.
 
 import os
 from dotenv import load_dotenv
-from typing import Optional
+from typing import Dict, List, Optional
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,17 +20,140 @@ class Settings:
     API_TITLE: str = "EverKind Therapeutic API"
     API_DESCRIPTION: str = "AI-powered therapeutic chat API using CBT techniques"
     
+    # Metrics
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # Tracing (needs METRICS_ENABLED); /debug/traces is only served when a token is set
+    SERVER_TIMING_ENABLED: bool = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+    TRACE_BUFFER_SIZE: int = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+    DEBUG_TRACES_TOKEN: str = os.getenv("DEBUG_TRACES_TOKEN", "")
+    # Validate request bodies from raw bytes and encode response models directly to JSON
+    FAST_SERIALIZATION_ENABLED: bool = os.getenv("FAST_SERIALIZATION_ENABLED", "true").lower() == "true"
+    # Event loop lag sampling; stalls above the threshold are logged with the blocking stack
+    LOOP_MONITOR_ENABLED: bool = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+    LOOP_MONITOR_INTERVAL_SECONDS: float = float(os.getenv("LOOP_MONITOR_INTERVAL_SECONDS", "0.1"))
+    LOOP_BLOCK_THRESHOLD_SECONDS: float = float(os.getenv("LOOP_BLOCK_THRESHOLD_SECONDS", "0.25"))
+
+    # LLM Backend ("openai", or "offline" for a deterministic local generator)
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "openai").lower()
+    OFFLINE_LATENCY_MEDIAN_SECONDS: float = float(os.getenv("OFFLINE_LATENCY_MEDIAN_SECONDS", "0.8"))
+    OFFLINE_LATENCY_P99_SECONDS: float = float(os.getenv("OFFLINE_LATENCY_P99_SECONDS", "3"))
+    # 0 returns the whole reply as soon as the first token is due
+    OFFLINE_TOKENS_PER_SECOND: float = float(os.getenv("OFFLINE_TOKENS_PER_SECOND", "50"))
+    OFFLINE_ERROR_RATE: float = float(os.getenv("OFFLINE_ERROR_RATE", "0"))
+    OFFLINE_SEED: int = int(os.getenv("OFFLINE_SEED", "0"))
+
     # OpenAI Configuration
     OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4")
     OPENAI_MAX_TOKENS: int = int(os.getenv("OPENAI_MAX_TOKENS", "500"))
     OPENAI_TEMPERATURE: float = float(os.getenv("OPENAI_TEMPERATURE", "0.7"))
+    OPENAI_TIMEOUT: float = float(os.getenv("OPENAI_TIMEOUT", "30"))
+    # Point at an OpenAI-compatible server, e.g. perf/fake_openai_server.py; unset uses the SDK default
+    OPENAI_BASE_URL: Optional[str] = os.getenv("OPENAI_BASE_URL") or None
+    OPENAI_CONTEXT_WINDOW: int = int(os.getenv("OPENAI_CONTEXT_WINDOW", "8192"))
+    # 0 derives the budget from the context window and OPENAI_MAX_TOKENS
+    OPENAI_PROMPT_TOKEN_BUDGET: int = int(os.getenv("OPENAI_PROMPT_TOKEN_BUDGET", "0"))
+
+    # Upstream HTTP Connection Pool
+    OPENAI_MAX_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "200"))
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "50"))
+    OPENAI_KEEPALIVE_EXPIRY: float = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))
+    OPENAI_HTTP2: bool = os.getenv("OPENAI_HTTP2", "true").lower() == "true"
+
+    # Session Store Configuration
+    SESSION_BACKEND: str = os.getenv("SESSION_BACKEND", "memory")
+    SESSION_MAX_ENTRIES: int = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+    SESSION_TTL_SECONDS: float = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+    SESSION_MAX_BYTES: int = int(os.getenv("SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+    SESSION_DB_PATH: str = os.getenv("SESSION_DB_PATH", "everkind_sessions.db")
+    SESSION_FLUSH_INTERVAL_MS: int = int(os.getenv("SESSION_FLUSH_INTERVAL_MS", "50"))
+    SESSION_FLUSH_BATCH_SIZE: int = int(os.getenv("SESSION_FLUSH_BATCH_SIZE", "200"))
+    SESSION_CACHE_TTL_SECONDS: float = float(os.getenv("SESSION_CACHE_TTL_SECONDS", "30"))
+    
+    # Response Cache
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+    RESPONSE_CACHE_TTL_SECONDS: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+    
+    # Semantic Response Cache
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+    SEMANTIC_CACHE_CAPACITY: int = int(os.getenv("SEMANTIC_CACHE_CAPACITY", "2048"))
+    SEMANTIC_CACHE_DIMENSIONS: int = int(os.getenv("SEMANTIC_CACHE_DIMENSIONS", "1024"))
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.85"))
+    # Per-mood overrides, e.g. "depressed:0.95,anxious:0.9"
+    SEMANTIC_CACHE_MOOD_THRESHOLDS: str = os.getenv("SEMANTIC_CACHE_MOOD_THRESHOLDS", "")
+    SEMANTIC_CACHE_TTL_SECONDS: float = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+    
+    # Upstream Admission Control
+    UPSTREAM_MAX_CONCURRENCY: int = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", "64"))
+    UPSTREAM_MAX_QUEUE: int = int(os.getenv("UPSTREAM_MAX_QUEUE", "256"))
+    UPSTREAM_MAX_QUEUE_WAIT_SECONDS: float = float(os.getenv("UPSTREAM_MAX_QUEUE_WAIT_SECONDS", "5"))
+    
+    # Model Routing
+    # Comma-separated model pool, fastest first; empty routes everything to OPENAI_MODEL
+    MODEL_POOL: str = os.getenv("MODEL_POOL", "")
+    ROUTER_LIGHT_MAX_CHARS: int = int(os.getenv("ROUTER_LIGHT_MAX_CHARS", "200"))
+    ROUTER_LIGHT_MAX_HISTORY_MESSAGES: int = int(os.getenv("ROUTER_LIGHT_MAX_HISTORY_MESSAGES", "6"))
+    ROUTER_LATENCY_SLO_SECONDS: float = float(os.getenv("ROUTER_LATENCY_SLO_SECONDS", "10"))
+    ROUTER_EWMA_ALPHA: float = float(os.getenv("ROUTER_EWMA_ALPHA", "0.3"))
+    ROUTER_COOLDOWN_SECONDS: float = float(os.getenv("ROUTER_COOLDOWN_SECONDS", "30"))
+    
+    # Batch Chat; items run concurrently up to the limit, each with its own deadline.
+    # Every item is charged against the per-IP rate limits, so the default stays
+    # within one client's minute; raise both together for large batches.
+    CHAT_BATCH_MAX_ITEMS: int = int(os.getenv("CHAT_BATCH_MAX_ITEMS", "30"))
+    CHAT_BATCH_CONCURRENCY: int = int(os.getenv("CHAT_BATCH_CONCURRENCY", "8"))
+    
+    # Deadlines, Retries and Hedging
+    CHAT_DEADLINE_SECONDS: float = float(os.getenv("CHAT_DEADLINE_SECONDS", "45"))
+    UPSTREAM_RETRY_MAX_ATTEMPTS: int = int(os.getenv("UPSTREAM_RETRY_MAX_ATTEMPTS", "3"))
+    UPSTREAM_RETRY_BASE_DELAY_SECONDS: float = float(os.getenv("UPSTREAM_RETRY_BASE_DELAY_SECONDS", "0.25"))
+    UPSTREAM_RETRY_MAX_DELAY_SECONDS: float = float(os.getenv("UPSTREAM_RETRY_MAX_DELAY_SECONDS", "4"))
+    UPSTREAM_HEDGE_ENABLED: bool = os.getenv("UPSTREAM_HEDGE_ENABLED", "false").lower() == "true"
+    UPSTREAM_HEDGE_QUANTILE: float = float(os.getenv("UPSTREAM_HEDGE_QUANTILE", "0.95"))
+    UPSTREAM_HEDGE_MIN_SAMPLES: int = int(os.getenv("UPSTREAM_HEDGE_MIN_SAMPLES", "50"))
+    UPSTREAM_HEDGE_MIN_DELAY_SECONDS: float = float(os.getenv("UPSTREAM_HEDGE_MIN_DELAY_SECONDS", "0.5"))
+    
+    # Upstream Circuit Breaker
+    CIRCUIT_BREAKER_WINDOW_SECONDS: float = float(os.getenv("CIRCUIT_BREAKER_WINDOW_SECONDS", "60"))
+    CIRCUIT_BREAKER_MIN_CALLS: int = int(os.getenv("CIRCUIT_BREAKER_MIN_CALLS", "10"))
+    CIRCUIT_BREAKER_FAILURE_RATE: float = float(os.getenv("CIRCUIT_BREAKER_FAILURE_RATE", "0.5"))
+    CIRCUIT_BREAKER_SLOW_CALL_SECONDS: float = float(os.getenv("CIRCUIT_BREAKER_SLOW_CALL_SECONDS", "10"))
+    CIRCUIT_BREAKER_SLOW_CALL_RATE: float = float(os.getenv("CIRCUIT_BREAKER_SLOW_CALL_RATE", "0.8"))
+    CIRCUIT_BREAKER_OPEN_SECONDS: float = float(os.getenv("CIRCUIT_BREAKER_OPEN_SECONDS", "30"))
+    CIRCUIT_BREAKER_HALF_OPEN_CALLS: int = int(os.getenv("CIRCUIT_BREAKER_HALF_OPEN_CALLS", "3"))
+    
+    # Rate Limiting
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_IP_REQUESTS_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_IP_REQUESTS_PER_MINUTE", "30"))
+    RATE_LIMIT_IP_TOKENS_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_IP_TOKENS_PER_MINUTE", "40000"))
+    RATE_LIMIT_CONVERSATION_REQUESTS_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_CONVERSATION_REQUESTS_PER_MINUTE", "12"))
+    RATE_LIMIT_CONVERSATION_TOKENS_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_CONVERSATION_TOKENS_PER_MINUTE", "20000"))
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    # Only enable behind a proxy that sets X-Forwarded-For
+    RATE_LIMIT_TRUST_PROXY_HEADERS: bool = os.getenv("RATE_LIMIT_TRUST_PROXY_HEADERS", "false").lower() == "true"
+    
+    # In-flight Request Coalescing
+    COALESCE_REQUESTS_ENABLED: bool = os.getenv("COALESCE_REQUESTS_ENABLED", "true").lower() == "true"
+    
+    # Conversation Summarization
+    SUMMARY_ENABLED: bool = os.getenv("SUMMARY_ENABLED", "false").lower() == "true"
+    SUMMARY_MODEL: str = os.getenv("SUMMARY_MODEL", "")
+    SUMMARY_TRIGGER_MESSAGES: int = int(os.getenv("SUMMARY_TRIGGER_MESSAGES", "20"))
+    SUMMARY_KEEP_RECENT_MESSAGES: int = int(os.getenv("SUMMARY_KEEP_RECENT_MESSAGES", "10"))
+    SUMMARY_MAX_TOKENS: int = int(os.getenv("SUMMARY_MAX_TOKENS", "300"))
     
     # Server Configuration
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8000"))
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    # Share of routine (below WARNING) log records kept
+    LOG_SAMPLE_RATE: float = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Include user message content in logs; off to keep therapy content out of log storage
+    LOG_MESSAGE_CONTENT: bool = os.getenv("LOG_MESSAGE_CONTENT", "false").lower() == "true"
     
     # CORS Configuration
     ALLOWED_ORIGINS: list = [
@@ -72,6 +195,38 @@ Remember: You're here to support, guide, and empower users on their mental healt
         """Check if running in development environment."""
         return self.ENVIRONMENT.lower() == "development"
     
+    @property
+    def prompt_token_budget(self) -> int:
+        """Maximum prompt size in tokens, leaving room for the completion."""
+        if self.OPENAI_PROMPT_TOKEN_BUDGET > 0:
+            return self.OPENAI_PROMPT_TOKEN_BUDGET
+        return self.OPENAI_CONTEXT_WINDOW - self.OPENAI_MAX_TOKENS
+    
+    @property
+    def semantic_cache_mood_thresholds(self) -> Dict[str, float]:
+        """Per-mood similarity thresholds parsed from SEMANTIC_CACHE_MOOD_THRESHOLDS."""
+        thresholds = {}
+        for item in self.SEMANTIC_CACHE_MOOD_THRESHOLDS.split(","):
+            if ":" in item:
+                mood, value = item.split(":", 1)
+                thresholds[mood.strip().lower()] = float(value)
+        return thresholds
+    
+    @property
+    def model_pool(self) -> List[str]:
+        """Routable models parsed from MODEL_POOL, fastest first."""
+        models: List[str] = []
+        for model in self.MODEL_POOL.split(","):
+            model = model.strip()
+            if model and model not in models:
+                models.append(model)
+        return models or [self.OPENAI_MODEL]
+    
+    @property
+    def llm_configured(self) -> bool:
+        """Check if the selected LLM backend has what it needs to serve requests."""
+        return self.LLM_BACKEND == "offline" or bool(self.OPENAI_API_KEY)
+    
     def validate_settings(self) -> bool:
         """
         Validate that required settings are present.
@@ -79,7 +234,9 @@ Remember: You're here to support, guide, and empower users on their mental healt
         Returns:
             bool: True if all required settings are valid
         """
-        if not self.OPENAI_API_KEY:
+        if self.LLM_BACKEND not in ("openai", "offline"):
+            raise ValueError(f"Unknown LLM_BACKEND {self.LLM_BACKEND!r}, expected 'openai' or 'offline'")
+        if not self.llm_configured:
             raise ValueError("OPENAI_API_KEY environment variable is required")
         
         return True
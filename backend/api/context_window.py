@@ -0,0 +1,172 @@
+"""
+Token-budgeted context window construction for chat prompts.
+"""
+
+import logging
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Tokens the chat format adds around every message (role and separators)
+MESSAGE_TOKEN_OVERHEAD = 4
+
+# Tokens the chat format adds to prime the assistant reply
+REPLY_PRIMING_TOKENS = 3
+
+# Average characters per token for English text, used without tiktoken
+CHARS_PER_TOKEN = 4
+
+
+class TokenCounter:
+    """
+    Local token counter with a per-text cache.
+    
+    Uses ``tiktoken`` when it is installed and otherwise falls back to a
+    character-based estimate. Counts are cached by message content, so the
+    history of a long conversation is only tokenized once.
+    
+    Args:
+        model (str): Model name used to select the tokenizer
+        cache_size (int): Number of distinct texts to cache counts for
+    """
+    
+    def __init__(self, model: str, cache_size: int = 8192):
+        self.model = model
+        self._encoding = self._load_encoding(model)
+        self.count = lru_cache(maxsize=cache_size)(self._count)
+    
+    @staticmethod
+    def _load_encoding(model: str):
+        if tiktoken is None:
+            return None
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning(f"Could not load tiktoken encoding - estimating token counts: {str(e)}")
+            return None
+    
+    def _count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    
+    def count_message(self, message: dict) -> int:
+        """
+        Count the tokens a chat message occupies in the prompt.
+        
+        Args:
+            message (dict): Message with ``role`` and ``content``
+        
+        Returns:
+            int: Token count including per-message overhead
+        """
+        return MESSAGE_TOKEN_OVERHEAD + self.count(message["content"])
+
+
+class ContextWindow(NamedTuple):
+    """
+    Result of fitting a conversation into the prompt budget.
+    
+    Args:
+        messages (List[dict]): Messages to send upstream
+        prompt_tokens (int): Estimated prompt size in tokens
+        dropped (int): Number of oldest history messages left out
+    """
+    messages: List[dict]
+    prompt_tokens: int
+    dropped: int
+
+
+class ContextWindowBuilder:
+    """
+    Builds prompts that fit a fixed token budget.
+    
+    The system message, an optional summary of earlier turns and the current
+    user message are always kept. Prior turns are added newest first until
+    the budget is exhausted, so the cost of a turn stays flat however long
+    the conversation grows.
+    
+    Args:
+        counter (TokenCounter): Token counter for the target model
+        prompt_budget (int): Maximum prompt size in tokens
+    """
+    
+    def __init__(self, counter: TokenCounter, prompt_budget: int):
+        self.counter = counter
+        self.prompt_budget = prompt_budget
+    
+    def build(
+        self,
+        system_message: dict,
+        history: List[dict],
+        user_message: dict,
+        summary_message: Optional[dict] = None,
+        note_message: Optional[dict] = None
+    ) -> ContextWindow:
+        """
+        Fit the conversation into the prompt budget.
+        
+        Messages are ordered from the most to the least stable, so requests
+        share the longest possible prompt prefix: system prompt, summary,
+        history, note, user message.
+        
+        Args:
+            system_message (dict): The system prompt message
+            history (List[dict]): Prior user/assistant turns, oldest first
+            user_message (dict): The current user message
+            summary_message (dict): Summary of turns before ``history``, always kept
+            note_message (dict): Per-request context such as the mood, always kept
+        
+        Returns:
+            ContextWindow: Messages to send and their estimated size
+        """
+        count_message = self.counter.count_message
+        used = (
+            REPLY_PRIMING_TOKENS
+            + count_message(system_message)
+            + count_message(user_message)
+        )
+        if summary_message is not None:
+            used += count_message(summary_message)
+        if note_message is not None:
+            used += count_message(note_message)
+        remaining = self.prompt_budget - used
+        
+        start = len(history)
+        while start > 0:
+            cost = count_message(history[start - 1])
+            if cost > remaining:
+                break
+            remaining -= cost
+            start -= 1
+        
+        # Never open the window with an assistant reply to a dropped question
+        while 0 < start < len(history) and history[start]["role"] == "assistant":
+            remaining += count_message(history[start])
+            start += 1
+        
+        if start:
+            logger.debug(f"Context window dropped {start} of {len(history)} history messages")
+        
+        messages = [system_message]
+        if summary_message is not None:
+            messages.append(summary_message)
+        messages.extend(history[start:])
+        if note_message is not None:
+            messages.append(note_message)
+        messages.append(user_message)
+        
+        return ContextWindow(
+            messages=messages,
+            prompt_tokens=self.prompt_budget - remaining,
+            dropped=start
+        )
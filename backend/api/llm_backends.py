@@ -0,0 +1,260 @@
+"""
+Pluggable LLM backends for chat completions.
+"""
+
+import asyncio
+import logging
+import math
+import random
+import zlib
+from typing import AsyncIterator, Awaitable, Callable, List, NamedTuple, Optional, Protocol
+from openai import AsyncOpenAI
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class Completion(NamedTuple):
+    """A finished chat completion."""
+    
+    content: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+
+class BackendUnavailableError(Exception):
+    """Raised by a backend for a transient failure, such as an injected error."""
+
+
+def _token_count(value: object) -> Optional[int]:
+    return value if isinstance(value, int) else None
+
+
+class LLMBackend(Protocol):
+    """
+    Interface every chat completion backend implements.
+    
+    Both calls take the model, the prompt messages, the sampling settings
+    and a per-call timeout in seconds; extra keyword options are passed
+    through to backends that understand them.
+    """
+    
+    name: str
+    
+    async def complete(
+        self,
+        *,
+        model: str,
+        messages: List[dict],
+        max_tokens: int,
+        temperature: float,
+        timeout: float,
+        **options
+    ) -> Completion:
+        """Generate a whole reply."""
+        ...
+    
+    async def stream(
+        self,
+        *,
+        model: str,
+        messages: List[dict],
+        max_tokens: int,
+        temperature: float,
+        timeout: float,
+        **options
+    ) -> AsyncIterator[str]:
+        """Start a reply and return an iterator over its content fragments."""
+        ...
+    
+    async def close(self) -> None:
+        """Release resources held by the backend."""
+        ...
+
+
+class OpenAIBackend:
+    """
+    Chat completions from the OpenAI API.
+    
+    The HTTP transport behind the client is owned by the caller.
+    
+    Args:
+        client (AsyncOpenAI): Configured asynchronous OpenAI client
+    """
+    
+    name = "openai"
+    
+    def __init__(self, client: AsyncOpenAI):
+        self.client = client
+    
+    async def complete(self, *, model: str, messages: List[dict], max_tokens: int,
+                       temperature: float, timeout: float, **options) -> Completion:
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout=timeout,
+            **options
+        )
+        usage = getattr(response, "usage", None)
+        return Completion(
+            content=response.choices[0].message.content,
+            prompt_tokens=_token_count(getattr(usage, "prompt_tokens", None)),
+            completion_tokens=_token_count(getattr(usage, "completion_tokens", None))
+        )
+    
+    async def stream(self, *, model: str, messages: List[dict], max_tokens: int,
+                     temperature: float, timeout: float, **options) -> AsyncIterator[str]:
+        chunks = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout=timeout,
+            stream=True,
+            **options
+        )
+        
+        async def deltas() -> AsyncIterator[str]:
+            try:
+                async for chunk in chunks:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+            finally:
+                # Return the pooled connection even if the caller stops early
+                await chunks.response.aclose()
+        
+        return deltas()
+    
+    async def close(self) -> None:
+        pass
+
+
+# Sentences the offline backend assembles replies from
+OFFLINE_SENTENCES = (
+    "Thank you for sharing that with me.",
+    "It sounds like a lot is weighing on you right now.",
+    "What you're feeling makes sense given what you've described.",
+    "Let's slow down for a moment and take one thing at a time.",
+    "What thought goes through your mind when that happens?",
+    "Is there evidence that supports that thought, and any that doesn't?",
+    "Sometimes naming a feeling can make it a little easier to hold.",
+    "What is one small step that might help today?",
+    "You've handled difficult moments before, and that matters.",
+    "How would you respond to a friend who told you the same thing?",
+    "Try taking a slow breath in for four counts and out for six.",
+    "I'm here with you, and we can work through this together."
+)
+
+
+class OfflineBackend:
+    """
+    Deterministic local generator for load tests, integration tests and staging.
+    
+    Replies are assembled from canned sentences chosen by a hash of the
+    model and the last user message, so the same prompt always gets the
+    same reply. Time to first token follows a log-normal distribution
+    with the given median and p99, and tokens then arrive at a fixed
+    rate. Latencies and injected errors are drawn from a seeded random
+    generator, so a run with the same seed and request order is
+    reproducible.
+    
+    Args:
+        latency_median (float): Median seconds to the first token
+        latency_p99 (float): 99th percentile seconds to the first token
+        tokens_per_second (float): Generation rate after the first token; 0 for instant
+        error_rate (float): Share of calls that fail with BackendUnavailableError
+        seed (int): Seed for latency and error sampling
+        sleep (Callable[[float], Awaitable[None]]): Sleep function, replaceable in tests
+    """
+    
+    name = "offline"
+    
+    def __init__(
+        self,
+        latency_median: float = 0.8,
+        latency_p99: float = 3.0,
+        tokens_per_second: float = 50.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+    ):
+        self.latency_median = latency_median
+        self.latency_p99 = max(latency_p99, latency_median)
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self._sleep = sleep
+        self._random = random.Random(seed)
+        # 2.326 is the z-score of the 99th percentile
+        self._sigma = math.log(self.latency_p99 / latency_median) / 2.326 if latency_median > 0 else 0.0
+    
+    def reply(self, model: str, messages: List[dict], max_tokens: int) -> List[str]:
+        """
+        Build the deterministic reply to a prompt.
+        
+        Args:
+            model (str): Requested model
+            messages (List[dict]): Prompt messages
+            max_tokens (int): Maximum reply length in tokens
+        
+        Returns:
+            List[str]: Reply tokens, one word with its trailing space each
+        """
+        last_user = next((msg["content"] for msg in reversed(messages) if msg["role"] == "user"), "")
+        digest = zlib.crc32(f"{model}\n{last_user}".encode())
+        count = 2 + digest % 3
+        sentences = [OFFLINE_SENTENCES[(digest >> (4 * i)) % len(OFFLINE_SENTENCES)] for i in range(count)]
+        words = " ".join(sentences).split(" ")[:max(1, max_tokens)]
+        return [word + " " for word in words[:-1]] + words[-1:]
+    
+    def _first_token_delay(self) -> float:
+        if self.latency_median <= 0:
+            return 0.0
+        return self.latency_median * math.exp(self._sigma * self._random.gauss(0, 1))
+    
+    async def _wait(self, seconds: float, timeout: float) -> None:
+        if seconds > timeout:
+            await self._sleep(timeout)
+            raise asyncio.TimeoutError(f"Offline backend took longer than {timeout:.2f}s")
+        await self._sleep(seconds)
+    
+    async def _start(self, timeout: float) -> None:
+        delay = self._first_token_delay()
+        fail = self._random.random() < self.error_rate
+        await self._wait(delay, timeout)
+        if fail:
+            raise BackendUnavailableError("Injected offline backend error")
+    
+    async def complete(self, *, model: str, messages: List[dict], max_tokens: int,
+                       temperature: float, timeout: float, **options) -> Completion:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await self._start(timeout)
+        tokens = self.reply(model, messages, max_tokens)
+        if self.tokens_per_second > 0:
+            await self._wait(len(tokens) / self.tokens_per_second, timeout - (loop.time() - start))
+        return Completion(
+            content="".join(tokens),
+            prompt_tokens=sum(len(msg["content"]) for msg in messages) // 4,
+            completion_tokens=len(tokens)
+        )
+    
+    async def stream(self, *, model: str, messages: List[dict], max_tokens: int,
+                     temperature: float, timeout: float, **options) -> AsyncIterator[str]:
+        await self._start(timeout)
+        tokens = self.reply(model, messages, max_tokens)
+        
+        async def deltas() -> AsyncIterator[str]:
+            for index, token in enumerate(tokens):
+                if index and self.tokens_per_second > 0:
+                    await self._sleep(1 / self.tokens_per_second)
+                yield token
+        
+        return deltas()
+    
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,152 @@
+"""
+Non-blocking, structured logging for the EverKind API.
+
+Records are handed to a bounded in-memory queue on the calling thread and
+formatted and written by a background listener thread, so log I/O never
+runs on the event loop. Fields passed with ``extra=`` become top-level
+keys of the JSON record. Message content is never logged unless
+``LOG_MESSAGE_CONTENT`` is enabled; use ``content_fields`` to attach it.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from .config import settings
+from .metrics import metrics
+
+dropped_log_records = metrics.counter(
+    "everkind_log_records_dropped_total",
+    "Log records dropped because the log queue was full"
+)
+
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def content_fields(**fields: object) -> Dict[str, object]:
+    """
+    Build log fields holding user-provided content.
+    
+    Args:
+        **fields (object): Content fields, such as a message preview
+    
+    Returns:
+        Dict[str, object]: The fields if LOG_MESSAGE_CONTENT is enabled, otherwise nothing
+    """
+    return fields if settings.LOG_MESSAGE_CONTENT else {}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line.
+    
+    Standard keys are ``ts``, ``level``, ``logger`` and ``message``, plus
+    ``exc_info`` for exceptions; fields passed with ``extra=`` are added
+    as they are.
+    """
+    
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a share of routine records.
+    
+    Records below WARNING are kept with probability ``rate``; warnings and
+    errors are always kept.
+    
+    Args:
+        rate (float): Share of routine records to keep, between 0 and 1
+    """
+    
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that drops records instead of blocking when the queue is full.
+    
+    Only the message is rendered on the calling thread, so later changes
+    to its arguments cannot alter it. Tracebacks and structured fields
+    stay on a copy of the record for the listener's formatter.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped_log_records.inc()
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging() -> logging.handlers.QueueListener:
+    """
+    Route all logging through a background queue listener.
+    
+    Replaces the root handlers with a queue handler that samples routine
+    records at ``LOG_SAMPLE_RATE`` and a listener thread writing them to
+    stderr as JSON (``LOG_FORMAT=json``) or plain text. Calling it again
+    returns the running listener. The listener is flushed and stopped at
+    interpreter exit.
+    
+    Returns:
+        logging.handlers.QueueListener: The running listener
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+    
+    output = logging.StreamHandler(sys.stderr)
+    if settings.LOG_FORMAT.lower() == "json":
+        output.setFormatter(JSONFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATE))
+    
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
+    
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
@@ -0,0 +1,115 @@
+"""
+Event loop lag monitoring and blocking-call detection.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+from .config import settings
+from .metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+loop_lag = metrics.histogram(
+    "everkind_event_loop_lag_seconds",
+    "Delay between when a loop callback was due and when it ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+loop_blocked = metrics.counter(
+    "everkind_event_loop_blocked_total",
+    "Times the event loop was blocked for longer than the threshold"
+)
+
+
+class LoopMonitor:
+    """
+    Samples event loop scheduling delay and reports blocking calls.
+    
+    A task on the loop sleeps for ``interval`` and records how late it
+    woke up as loop lag. A watchdog thread checks the task's heartbeat;
+    when the loop has not run it for more than ``threshold`` seconds,
+    whatever is running on the loop thread is blocking it, so the watchdog
+    logs that thread's current stack while the stall is still in progress.
+    Each stall is reported once.
+    
+    Args:
+        interval (float): Seconds between lag samples
+        threshold (float): Seconds of lag treated as a blocked loop
+        stack_limit (int): Innermost frames included in the logged stack
+    """
+    
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, stack_limit: int = 25):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_limit = stack_limit
+        self._heartbeat = 0.0
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+    
+    @property
+    def running(self) -> bool:
+        """Whether the monitor has been started and not stopped."""
+        return self._task is not None
+    
+    async def start(self) -> None:
+        """Start sampling on the running loop and start the watchdog thread."""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+    
+    async def stop(self) -> None:
+        """Stop sampling and wait for the watchdog thread to exit."""
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._watchdog.join(timeout=self.interval * 2)
+        self._task = None
+        self._watchdog = None
+    
+    async def _sample(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self._heartbeat = now
+            loop_lag.observe(max(now - start - self.interval, 0.0))
+    
+    def _watch(self) -> None:
+        reported = None
+        while not self._stopped.wait(self.interval):
+            heartbeat = self._heartbeat
+            blocked = time.perf_counter() - heartbeat - self.interval
+            if blocked <= self.threshold or heartbeat == reported:
+                continue
+            reported = heartbeat
+            loop_blocked.inc()
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame, limit=self.stack_limit)) if frame is not None else None
+            logger.warning(
+                "event loop blocked",
+                extra={"blocked_ms": round(blocked * 1000, 1), "stack": stack}
+            )
+
+
+# Global loop monitor instance
+loop_monitor = LoopMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL_SECONDS,
+    threshold=settings.LOOP_BLOCK_THRESHOLD_SECONDS
+)
@@ -0,0 +1,261 @@
+"""
+Lightweight in-process metrics for the EverKind API.
+"""
+
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple, Union
+
+LabelValues = Tuple[Tuple[str, str], ...]
+
+# Default latency buckets in seconds, from 5 ms to 60 s
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Content type of the Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in labels]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """
+    Monotonically increasing counter with optional labels.
+    
+    Updates are plain dict increments on the event loop thread, cheap
+    enough to record on every request and needing no lock.
+    
+    Args:
+        name (str): Metric name
+        description (str): Human readable description
+    """
+    
+    type = "counter"
+    
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelValues, float] = {}
+    
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Increment the counter.
+        
+        Args:
+            amount (float): Amount to add
+            **labels (str): Label values identifying the series
+        """
+        key = tuple(sorted(labels.items()))
+        self._values[key] = self._values.get(key, 0) + amount
+    
+    def value(self, **labels: str) -> float:
+        """
+        Get the current value of a series.
+        
+        Args:
+            **labels (str): Label values identifying the series
+        
+        Returns:
+            float: Current value, 0 if never incremented
+        """
+        return self._values.get(tuple(sorted(labels.items())), 0)
+    
+    def snapshot(self) -> Dict[LabelValues, float]:
+        """Get a copy of all series."""
+        return dict(self._values)
+    
+    def render(self) -> List[str]:
+        """Render the series in the Prometheus text format."""
+        return [
+            f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+            for labels, value in list(self._values.items())
+        ]
+
+
+class Gauge(Counter):
+    """
+    Value that can go up and down, such as a queue depth.
+    """
+    
+    type = "gauge"
+    
+    def set(self, value: float, **labels: str) -> None:
+        """
+        Set the gauge.
+        
+        Args:
+            value (float): New value
+            **labels (str): Label values identifying the series
+        """
+        self._values[tuple(sorted(labels.items()))] = value
+    
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        """
+        Decrement the gauge.
+        
+        Args:
+            amount (float): Amount to subtract
+            **labels (str): Label values identifying the series
+        """
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """
+    Distribution of observed values in fixed cumulative buckets.
+    
+    Each series is a flat list of per-bucket counts plus a running sum, so
+    an observation is one binary search and two additions.
+    
+    Args:
+        name (str): Metric name
+        description (str): Human readable description
+        buckets (Sequence[float]): Sorted upper bounds of the buckets
+    """
+    
+    type = "histogram"
+    
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+    
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Record an observation.
+        
+        Args:
+            value (float): Observed value
+            **labels (str): Label values identifying the series
+        """
+        key = tuple(sorted(labels.items()))
+        series = self._values.get(key)
+        if series is None:
+            series = self._values[key] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+    
+    def count(self, **labels: str) -> int:
+        """
+        Get the number of observations in a series.
+        
+        Args:
+            **labels (str): Label values identifying the series
+        
+        Returns:
+            int: Number of observations
+        """
+        series = self._values.get(tuple(sorted(labels.items())))
+        return int(sum(series[:-1])) if series else 0
+    
+    def snapshot(self) -> Dict[LabelValues, List[float]]:
+        """Get a copy of all series."""
+        return {key: list(series) for key, series in self._values.items()}
+    
+    def render(self) -> List[str]:
+        """Render the series in the Prometheus text format, with cumulative buckets."""
+        lines = []
+        for labels, series in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(labels, le)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {_format_value(cumulative)}")
+        return lines
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+class MetricsRegistry:
+    """
+    Registry of named metrics.
+    """
+    
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+    
+    def _get_or_create(self, cls, name: str, description: str, **kwargs) -> Metric:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, description, **kwargs)
+        return metric
+    
+    def counter(self, name: str, description: str) -> Counter:
+        """
+        Get or create a counter.
+        
+        Args:
+            name (str): Metric name
+            description (str): Human readable description
+        
+        Returns:
+            Counter: The registered counter
+        """
+        return self._get_or_create(Counter, name, description)
+    
+    def gauge(self, name: str, description: str) -> Gauge:
+        """
+        Get or create a gauge.
+        
+        Args:
+            name (str): Metric name
+            description (str): Human readable description
+        
+        Returns:
+            Gauge: The registered gauge
+        """
+        return self._get_or_create(Gauge, name, description)
+    
+    def histogram(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """
+        Get or create a histogram.
+        
+        Args:
+            name (str): Metric name
+            description (str): Human readable description
+            buckets (Sequence[float]): Sorted upper bounds of the buckets
+        
+        Returns:
+            Histogram: The registered histogram
+        """
+        return self._get_or_create(Histogram, name, description, buckets=buckets)
+    
+    def snapshot(self) -> Dict[str, Dict[LabelValues, object]]:
+        """Get a copy of every registered metric."""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+    
+    def render(self) -> str:
+        """
+        Render every registered metric in the Prometheus text exposition format.
+        
+        Returns:
+            str: The exposition, served as PROMETHEUS_CONTENT_TYPE
+        """
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.description}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
\ No newline at end of file
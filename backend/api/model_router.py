@@ -0,0 +1,200 @@
+"""
+Per-request model routing across a pool of upstream models.
+"""
+
+import logging
+import re
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Sequence, Tuple
+from .metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Phrases that signal a possible crisis; such messages always get the most capable model
+HIGH_RISK_PATTERN = re.compile(
+    r"\b(suicid\w*|kill(ing)? myself|end(ing)? (it all|my life)|self[- ]?harm\w*|"
+    r"hurt(ing)? myself|cut(ting)? myself|overdos\w*|want to die|"
+    r"no reason to live|better off dead|don'?t want to (live|be here))\b",
+    re.IGNORECASE
+)
+
+# Moods that call for a more careful reply even without crisis language
+ELEVATED_RISK_MOODS = frozenset({"depressed"})
+
+routed_requests = metrics.counter(
+    "everkind_routed_requests_total",
+    "Chat requests by routed model and route"
+)
+model_failovers = metrics.counter(
+    "everkind_model_failovers_total",
+    "Failovers away from a model after it errored"
+)
+model_latency_ewma = metrics.gauge(
+    "everkind_model_latency_ewma_seconds",
+    "Exponentially weighted upstream latency per model"
+)
+
+
+def assess_risk(message: str, history: Sequence[dict], user_mood: Optional[str] = None) -> str:
+    """
+    Classify how sensitive a request is.
+    
+    Args:
+        message (str): The user's message
+        history (Sequence[dict]): Prior user/assistant turns
+        user_mood (str): The user's mood, if any
+    
+    Returns:
+        str: ``high`` for crisis language in the message, ``elevated`` for a
+        low mood or crisis language in recent user turns, otherwise ``low``
+    """
+    if HIGH_RISK_PATTERN.search(message):
+        return "high"
+    if (user_mood or "").lower() in ELEVATED_RISK_MOODS:
+        return "elevated"
+    recent_user_turns = [msg["content"] for msg in history[-6:] if msg["role"] == "user"]
+    if any(HIGH_RISK_PATTERN.search(content) for content in recent_user_turns):
+        return "elevated"
+    return "low"
+
+
+class RouteDecision(NamedTuple):
+    """Model choice for one request."""
+    
+    model: str
+    candidates: Tuple[str, ...]
+    route: str
+    risk: str
+
+
+class _ModelHealth:
+    """Live latency and availability of one model."""
+    
+    __slots__ = ("latency", "unhealthy_until")
+    
+    def __init__(self):
+        self.latency: Optional[float] = None
+        self.unhealthy_until = 0.0
+
+
+class ModelRouter:
+    """
+    Picks a model per request from a pool ordered from fastest to most capable.
+    
+    Short check-ins with little history and no sign of risk are ``light``
+    and prefer the first model in the pool; everything else prefers the
+    last. The remaining models follow in order of distance from the
+    preferred one and serve as failover targets.
+    
+    A model whose latency EWMA exceeds ``latency_slo`` or whose calls
+    fail is moved behind the healthy ones for ``cooldown_seconds``, after
+    which it is measured afresh.
+    
+    Args:
+        models (Sequence[str]): Model pool, fastest and cheapest first
+        light_max_chars (int): Longest message that can be routed light
+        light_max_history (int): Most history messages a light request may have
+        latency_slo (float): EWMA latency above which a model is avoided
+        ewma_alpha (float): Weight of the newest latency sample
+        cooldown_seconds (float): How long a slow or failing model is avoided
+        clock (Callable[[], float]): Monotonic time source
+    """
+    
+    def __init__(
+        self,
+        models: Sequence[str],
+        light_max_chars: int = 200,
+        light_max_history: int = 6,
+        latency_slo: float = 10.0,
+        ewma_alpha: float = 0.3,
+        cooldown_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if not models:
+            raise ValueError("Model pool must not be empty")
+        self.models = tuple(models)
+        self.light_max_chars = light_max_chars
+        self.light_max_history = light_max_history
+        self.latency_slo = latency_slo
+        self.ewma_alpha = ewma_alpha
+        self.cooldown_seconds = cooldown_seconds
+        self._clock = clock
+        self._health: Dict[str, _ModelHealth] = {model: _ModelHealth() for model in self.models}
+    
+    def route(self, message: str, history: Sequence[dict], user_mood: Optional[str] = None) -> RouteDecision:
+        """
+        Choose the model for a request.
+        
+        Args:
+            message (str): The user's message
+            history (Sequence[dict]): Prior user/assistant turns
+            user_mood (str): The user's mood, if any
+        
+        Returns:
+            RouteDecision: Preferred model, failover order, route and risk level
+        """
+        risk = assess_risk(message, history, user_mood)
+        if risk == "high":
+            route = "high_risk"
+        elif risk == "low" and len(message) <= self.light_max_chars and len(history) <= self.light_max_history:
+            route = "light"
+        else:
+            route = "standard"
+        
+        ordered = self.models if route == "light" else self.models[::-1]
+        now = self._clock()
+        healthy = [model for model in ordered if self._health[model].unhealthy_until <= now]
+        candidates = tuple(healthy + [model for model in ordered if model not in healthy])
+        
+        routed_requests.inc(model=candidates[0], route=route)
+        return RouteDecision(model=candidates[0], candidates=candidates, route=route, risk=risk)
+    
+    def record_latency(self, model: str, seconds: float) -> None:
+        """
+        Record the latency of a successful call.
+        
+        Args:
+            model (str): Model that answered
+            seconds (float): Time until the response started
+        """
+        health = self._health.get(model)
+        if health is None:
+            return
+        
+        if health.latency is None:
+            health.latency = seconds
+        else:
+            health.latency += self.ewma_alpha * (seconds - health.latency)
+        model_latency_ewma.set(health.latency, model=model)
+        
+        if health.latency > self.latency_slo:
+            logger.warning(f"Model {model} latency EWMA {health.latency:.2f}s is over the SLO - avoiding it")
+            health.unhealthy_until = self._clock() + self.cooldown_seconds
+            # Measure afresh once the cooldown is over
+            health.latency = None
+    
+    def record_failure(self, model: str) -> None:
+        """
+        Record a failed call and avoid the model for a while.
+        
+        Args:
+            model (str): Model that failed
+        """
+        health = self._health.get(model)
+        if health is None:
+            return
+        health.unhealthy_until = self._clock() + self.cooldown_seconds
+        model_failovers.inc(model=model)
+    
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        """Get the live health of each model."""
+        now = self._clock()
+        return {
+            model: {
+                "latency_ewma": health.latency,
+                "healthy": health.unhealthy_until <= now
+            }
+            for model, health in self._health.items()
+        }
+
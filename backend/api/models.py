@@ -25,14 +25,21 @@ class ChatRequest(BaseModel):
     """
     Request model for chat endpoint.
     
+    Clients either send ``conversation_id`` alone to continue a conversation
+    stored on the server, or the full ``conversation_history`` for stateless use.
+    
     Args:
         message (str): The user's message
+        conversation_id (str): Existing conversation to continue (optional)
         conversation_history (List[ChatMessage]): Previous messages in the conversation
         user_mood (str): Current user mood (optional)
+        use_cache (bool): Allow a cached reply to an identical prompt
     """
     message: str = Field(..., min_length=1, max_length=2000, description="User's message")
+    conversation_id: Optional[str] = Field(None, max_length=64, description="Existing conversation to continue")
     conversation_history: List[ChatMessage] = Field(default_factory=list, description="Previous conversation")
     user_mood: Optional[str] = Field(None, description="User's current mood")
+    use_cache: bool = Field(False, description="Allow a cached reply to an identical prompt")
 
 
 class ChatResponse(BaseModel):
@@ -43,10 +50,76 @@ class ChatResponse(BaseModel):
         response (str): The AI therapist's response
         conversation_id (str): Unique conversation identifier
         timestamp (datetime): Response timestamp
+        source (str): Where the reply came from: upstream, cache, semantic_cache or fallback
+        model (str): Model that generated an upstream reply
+        route (str): Routing decision: light, standard, high_risk or failover
     """
     response: str = Field(..., description="AI therapist response")
     conversation_id: str = Field(..., description="Conversation identifier")
     timestamp: datetime = Field(default_factory=datetime.now, description="Response timestamp")
+    source: str = Field("upstream", description="Where the reply came from: upstream, cache, semantic_cache or fallback")
+    model: Optional[str] = Field(None, description="Model that generated an upstream reply")
+    route: Optional[str] = Field(None, description="Routing decision: light, standard, high_risk or failover")
+
+
+class BatchChatRequest(BaseModel):
+    """
+    Request model for the batch chat endpoint.
+    
+    Args:
+        requests (List[ChatRequest]): Chat requests to run, each as it would be sent to /chat
+    """
+    requests: List[ChatRequest] = Field(..., min_length=1, description="Chat requests to run")
+
+
+class BatchChatResult(BaseModel):
+    """
+    One line of the batch chat response stream.
+    
+    Returns:
+        index (int): Position of the request in the batch
+        status (int): HTTP status the request would have had on /chat
+        response (ChatResponse): The reply, for status 200
+        error (str): Error description otherwise
+        retry_after (int): Seconds to wait before retrying, for status 429
+    """
+    index: int = Field(..., description="Position of the request in the batch")
+    status: int = Field(..., description="HTTP status the request would have had on /chat")
+    response: Optional[ChatResponse] = Field(None, description="The reply, for status 200")
+    error: Optional[str] = Field(None, description="Error description")
+    retry_after: Optional[int] = Field(None, description="Seconds to wait before retrying")
+
+
+class UsageInfo(BaseModel):
+    """
+    Token usage for a completion.
+    
+    Returns:
+        prompt_tokens (int): Tokens sent to the model, if known
+        completion_tokens (int): Tokens generated by the model
+        total_tokens (int): Sum of prompt and completion tokens, if known
+    """
+    prompt_tokens: Optional[int] = Field(None, description="Prompt tokens")
+    completion_tokens: int = Field(0, description="Completion tokens")
+    total_tokens: Optional[int] = Field(None, description="Total tokens")
+
+
+class ChatStreamEnd(BaseModel):
+    """
+    Final event of a streamed chat response.
+    
+    Returns:
+        conversation_id (str): Unique conversation identifier
+        timestamp (datetime): Response timestamp
+        usage (UsageInfo): Token usage for the streamed completion
+        model (str): Model that generated the reply, if it came from upstream
+        route (str): Routing decision: light, standard, high_risk or failover
+    """
+    conversation_id: str = Field(..., description="Conversation identifier")
+    timestamp: datetime = Field(default_factory=datetime.now, description="Response timestamp")
+    usage: UsageInfo = Field(default_factory=UsageInfo, description="Token usage")
+    model: Optional[str] = Field(None, description="Model that generated the reply")
+    route: Optional[str] = Field(None, description="Routing decision")
 
 
 class HealthResponse(BaseModel):
@@ -57,10 +130,12 @@ class HealthResponse(BaseModel):
         status (str): Service status
         timestamp (datetime): Check timestamp
         version (str): API version
+        upstream_circuit (str): Upstream circuit breaker state (closed, half_open or open)
     """
     status: str = Field(..., description="Service status")
     timestamp: datetime = Field(default_factory=datetime.now, description="Check timestamp")
     version: str = Field(..., description="API version")
+    upstream_circuit: Optional[str] = Field(None, description="Upstream circuit breaker state")
 
 
 class ErrorResponse(BaseModel):
@@ -0,0 +1,76 @@
+"""
+Versioned prompt templates for the chat model.
+
+Upstream providers cache prompts by their longest byte-identical prefix,
+so everything that varies per request is kept out of the system prompt.
+The system message is built once and shared by every request; the mood
+goes into a short system note placed just before the user's message, after
+the conversation history.
+"""
+
+import hashlib
+import sys
+from typing import Dict, Iterable, Optional
+from .config import settings
+
+MOOD_NOTE_TEMPLATE = (
+    "Current user mood: {mood}. Please acknowledge their emotional state "
+    "and respond with appropriate therapeutic support."
+)
+
+# Moods offered by the web client; their notes are built at startup
+KNOWN_MOODS = ("stressed", "overwhelmed", "depressed", "anxious")
+
+
+class PromptRegistry:
+    """
+    Precompiled system prompt and mood notes, tagged with a version.
+    
+    The returned message dicts are shared between requests and must not
+    be modified. The version is a hash of the templates, so it changes
+    whenever the prompt does and can be used in cache keys and traces.
+    
+    Args:
+        system_prompt (str): Static system prompt
+        mood_note_template (str): Mood note with a ``{mood}`` placeholder
+        moods (Iterable[str]): Moods to precompile notes for
+    """
+    
+    def __init__(
+        self,
+        system_prompt: str,
+        mood_note_template: str = MOOD_NOTE_TEMPLATE,
+        moods: Iterable[str] = KNOWN_MOODS
+    ):
+        self.mood_note_template = mood_note_template
+        self.version = hashlib.sha256(f"{system_prompt}\0{mood_note_template}".encode()).hexdigest()[:12]
+        self.system_message = {"role": "system", "content": sys.intern(system_prompt)}
+        self._mood_notes: Dict[str, dict] = {
+            mood: {"role": "system", "content": sys.intern(self._format_mood_note(mood))}
+            for mood in moods
+        }
+    
+    def _format_mood_note(self, mood: str) -> str:
+        return self.mood_note_template.format(mood=mood)
+    
+    def mood_note(self, mood: Optional[str]) -> Optional[dict]:
+        """
+        Get the system note describing the user's mood.
+        
+        Args:
+            mood (Optional[str]): The user's mood, if any
+        
+        Returns:
+            Optional[dict]: The note, or None without a mood
+        """
+        if not mood:
+            return None
+        note = self._mood_notes.get(mood)
+        if note is None:
+            # Moods are free text; only the known ones are kept
+            note = {"role": "system", "content": self._format_mood_note(mood)}
+        return note
+
+
+# Global prompt registry instance
+prompts = PromptRegistry(settings.THERAPIST_SYSTEM_PROMPT)
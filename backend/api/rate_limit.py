@@ -0,0 +1,404 @@
+"""
+Per-client rate limiting for the chat endpoints.
+"""
+
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .config import settings
+from .metrics import metrics
+from .serialization import loads
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+rate_limit_rejections = metrics.counter(
+    "everkind_rate_limit_rejections_total",
+    "Requests rejected by the rate limiter by exhausted bucket"
+)
+
+
+class TokenBucketTable:
+    """
+    Token buckets for many keys, refilled lazily on access.
+    
+    Each key costs one small list of ``[level, updated_at]`` in an LRU
+    ordered dict, so a check or update is O(1). A bucket untouched for a
+    full refill period is indistinguishable from a new one, so such idle
+    keys are dropped from the old end of the table as it is used, and the
+    table never holds more than ``max_keys`` entries.
+    
+    Args:
+        per_minute (float): Refill rate per minute, also the burst capacity
+        max_keys (int): Maximum number of tracked keys
+    """
+    
+    def __init__(self, per_minute: float, max_keys: int = 100000):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._buckets)
+    
+    def level(self, key: str, now: float) -> float:
+        """
+        Get the tokens currently available to a key.
+        
+        Args:
+            key (str): Bucket key
+            now (float): Current monotonic time
+        
+        Returns:
+            float: Available tokens
+        """
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return self.capacity
+        return min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+    
+    def wait_time(self, key: str, cost: float, now: float) -> float:
+        """
+        Get how long a key must wait before it can spend ``cost`` tokens.
+        
+        Args:
+            key (str): Bucket key
+            cost (float): Tokens to spend, at most the capacity
+            now (float): Current monotonic time
+        
+        Returns:
+            float: Seconds to wait, 0 if the tokens are available now
+        """
+        missing = cost - self.level(key, now)
+        return missing / self.rate if missing > 0 else 0.0
+    
+    def consume(self, key: str, cost: float, now: float) -> float:
+        """
+        Spend tokens from a key's bucket.
+        
+        Args:
+            key (str): Bucket key
+            cost (float): Tokens to spend
+            now (float): Current monotonic time
+        
+        Returns:
+            float: Tokens left afterwards
+        """
+        remaining = self.level(key, now) - cost
+        self._buckets[key] = [remaining, now]
+        self._buckets.move_to_end(key)
+        self._evict(now)
+        return remaining
+    
+    def reset_after(self, remaining: float) -> int:
+        """Seconds until a bucket with ``remaining`` tokens is full again."""
+        return math.ceil((self.capacity - remaining) / self.rate)
+    
+    def _evict(self, now: float) -> None:
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        
+        idle_seconds = self.capacity / self.rate
+        while self._buckets:
+            oldest = next(iter(self._buckets.values()))
+            if now - oldest[1] < idle_seconds:
+                break
+            self._buckets.popitem(last=False)
+
+
+class RateLimitDecision(NamedTuple):
+    """Outcome of a rate limit check for one request."""
+    
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int
+    retry_after: int = 0
+    bucket: str = ""
+    oversized: bool = False
+    
+    def headers(self) -> Dict[str, str]:
+        """Get the standard rate limit response headers."""
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset)
+        }
+        if not self.allowed and not self.oversized:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class RateLimiter:
+    """
+    Per-IP and per-conversation request and token rate limits.
+    
+    A request is only charged when every applicable bucket can afford
+    it, so a rejection never consumes quota. A limit of 0 disables that
+    bucket.
+    
+    Args:
+        ip_requests_per_minute (int): Requests per client IP
+        ip_tokens_per_minute (int): Estimated tokens per client IP
+        conversation_requests_per_minute (int): Requests per conversation
+        conversation_tokens_per_minute (int): Estimated tokens per conversation
+        max_keys (int): Maximum tracked keys per bucket table
+        clock (Callable[[], float]): Monotonic time source
+    """
+    
+    def __init__(
+        self,
+        ip_requests_per_minute: int = 30,
+        ip_tokens_per_minute: int = 40000,
+        conversation_requests_per_minute: int = 12,
+        conversation_tokens_per_minute: int = 20000,
+        max_keys: int = 100000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self._clock = clock
+        self._tables: Dict[str, TokenBucketTable] = {}
+        for name, per_minute in (
+            ("ip_requests", ip_requests_per_minute),
+            ("ip_tokens", ip_tokens_per_minute),
+            ("conversation_requests", conversation_requests_per_minute),
+            ("conversation_tokens", conversation_tokens_per_minute)
+        ):
+            if per_minute > 0:
+                self._tables[name] = TokenBucketTable(per_minute, max_keys)
+    
+    def check(self, client_ip: str, conversation_id: Optional[str], tokens: int) -> RateLimitDecision:
+        """
+        Check a request against every bucket and charge it if allowed.
+        
+        Args:
+            client_ip (str): Client address
+            conversation_id (str): Conversation being continued, if any
+            tokens (int): Estimated tokens the request will use
+        
+        Returns:
+            RateLimitDecision: Whether the request may proceed, with header values
+        """
+        return self.check_batch(client_ip, [(conversation_id, tokens)])
+    
+    def check_batch(self, client_ip: str, items: List[Tuple[Optional[str], int]]) -> RateLimitDecision:
+        """
+        Check several requests from one client and charge them all if allowed.
+        
+        Each item is charged as if it were sent on its own, against its
+        conversation's buckets too, and the batch is allowed only when
+        every bucket can afford all of its items at once. A single
+        request's token cost is clamped to the bucket capacity, so it is
+        throttled rather than rejected forever; a batch costing more than
+        a bucket can ever hold is rejected as oversized.
+        
+        Args:
+            client_ip (str): Client address
+            items (List[Tuple[Optional[str], int]]): Conversation ID, if any,
+                and estimated tokens of each request
+        
+        Returns:
+            RateLimitDecision: Whether the requests may proceed, with header values
+        """
+        now = self._clock()
+        costs: Dict[Tuple[str, str], float] = {}
+        for conversation_id, tokens in items:
+            for name, table in self._tables.items():
+                if name.startswith("conversation") and not conversation_id:
+                    continue
+                key = client_ip if name.startswith("ip") else conversation_id
+                cost = 1 if name.endswith("requests") else min(tokens, table.capacity)
+                costs[(name, key)] = costs.get((name, key), 0) + cost
+        
+        if not costs:
+            return RateLimitDecision(allowed=True, limit=0, remaining=0, reset=0)
+        
+        charges = [(name, self._tables[name], key, cost) for (name, key), cost in costs.items()]
+        for name, table, key, cost in charges:
+            if cost > table.capacity:
+                return RateLimitDecision(
+                    allowed=False,
+                    limit=int(table.capacity),
+                    remaining=int(table.level(key, now)),
+                    reset=table.reset_after(table.level(key, now)),
+                    bucket=name,
+                    oversized=True
+                )
+        
+        # Reject on the bucket that needs the longest wait
+        waits = [(table.wait_time(key, cost, now), name, table, key) for name, table, key, cost in charges]
+        wait, name, table, key = max(waits, key=lambda item: item[0])
+        if wait > 0:
+            retry_after = math.ceil(wait)
+            return RateLimitDecision(
+                allowed=False,
+                limit=int(table.capacity),
+                remaining=int(table.level(key, now)),
+                reset=retry_after,
+                retry_after=retry_after,
+                bucket=name
+            )
+        
+        remaining = [table.consume(key, cost, now) for name, table, key, cost in charges]
+        
+        # Report the primary request limit on successful responses
+        table = charges[0][1]
+        return RateLimitDecision(
+            allowed=True,
+            limit=int(table.capacity),
+            remaining=int(remaining[0]),
+            reset=table.reset_after(remaining[0])
+        )
+
+
+def estimate_request_tokens(payload: dict) -> int:
+    """
+    Roughly estimate the tokens a chat request will use upstream.
+    
+    Counts about four characters per token for the message and any
+    client-supplied history, plus the maximum completion length. History
+    held server-side is not visible here and is not counted.
+    
+    Args:
+        payload (dict): Parsed request body
+    
+    Returns:
+        int: Estimated prompt plus completion tokens
+    """
+    chars = len(str(payload.get("message") or ""))
+    history = payload.get("conversation_history")
+    if isinstance(history, list):
+        chars += sum(len(str(item.get("content") or "")) for item in history if isinstance(item, dict))
+    return chars // 4 + settings.OPENAI_MAX_TOKENS
+
+
+def request_items(payload: dict, batch: bool = False) -> List[Tuple[Optional[str], int]]:
+    """
+    Get the conversation ID and estimated tokens of each request in a body.
+    
+    A batch body yields one item per request in it; any other body, and a
+    batch body without usable requests, is a single request.
+    
+    Args:
+        payload (dict): Parsed request body
+        batch (bool): Whether the body was sent to the batch endpoint
+    
+    Returns:
+        List[Tuple[Optional[str], int]]: Conversation ID, if any, and token estimate per request
+    """
+    requests = payload.get("requests") if batch else None
+    requests = [item for item in requests if isinstance(item, dict)] if isinstance(requests, list) else []
+    items = []
+    for request in requests or [payload]:
+        conversation_id = request.get("conversation_id")
+        items.append((conversation_id if isinstance(conversation_id, str) else None, estimate_request_tokens(request)))
+    return items
+
+
+def _client_ip(scope: Scope) -> str:
+    if settings.RATE_LIMIT_TRUST_PROXY_HEADERS:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing the rate limiter on chat endpoints.
+    
+    The request body is buffered once to read the conversation IDs and
+    estimate tokens, then replayed to the application unchanged. Each
+    request of a batch is charged as if it were sent on its own.
+    Rejected requests get a 429 with ``Retry-After``, or a 413 for a
+    batch that exceeds a limit outright; allowed ones carry
+    ``RateLimit-*`` headers.
+    
+    Args:
+        app (ASGIApp): The wrapped application
+        limiter (RateLimiter): Limiter to enforce, the global one by default
+        path_prefix (str): Only POST requests under this path are limited
+    """
+    
+    def __init__(self, app: ASGIApp, limiter: Optional[RateLimiter] = None, path_prefix: str = "/api/v1/chat"):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+        self.path_prefix = path_prefix
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (scope["type"] != "http" or scope["method"] != "POST"
+                or not scope["path"].startswith(self.path_prefix)):
+            await self.app(scope, receive, send)
+            return
+        
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                await self.app(scope, receive, send)
+                return
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        
+        try:
+            payload = loads(body) if body else {}
+        except ValueError:
+            payload = {}
+        if not isinstance(payload, dict):
+            payload = {}
+        
+        batch = scope["path"] == f"{self.path_prefix}/batch"
+        decision = self.limiter.check_batch(_client_ip(scope), request_items(payload, batch))
+        
+        if not decision.allowed:
+            rate_limit_rejections.inc(bucket=decision.bucket)
+            logger.warning(f"Rate limited {scope['path']} - bucket: {decision.bucket}")
+            if decision.oversized:
+                response = JSONResponse(
+                    status_code=413,
+                    content={"detail": "This batch is larger than the rate limit allows. Please split it into smaller batches."},
+                    headers=decision.headers()
+                )
+            else:
+                response = JSONResponse(
+                    status_code=429,
+                    content={"detail": "Too many requests. Please slow down and try again shortly."},
+                    headers=decision.headers()
+                )
+            await response(scope, receive, send)
+            return
+        
+        replayed = False
+        
+        async def replay() -> Message:
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+        
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start" and decision.limit:
+                headers = MutableHeaders(scope=message)
+                for name, value in decision.headers().items():
+                    headers[name] = value
+            await send(message)
+        
+        await self.app(scope, replay, send_with_headers)
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter(
+    ip_requests_per_minute=settings.RATE_LIMIT_IP_REQUESTS_PER_MINUTE,
+    ip_tokens_per_minute=settings.RATE_LIMIT_IP_TOKENS_PER_MINUTE,
+    conversation_requests_per_minute=settings.RATE_LIMIT_CONVERSATION_REQUESTS_PER_MINUTE,
+    conversation_tokens_per_minute=settings.RATE_LIMIT_CONVERSATION_TOKENS_PER_MINUTE,
+    max_keys=settings.RATE_LIMIT_MAX_KEYS
+)
@@ -0,0 +1,138 @@
+"""
+Exact-match response cache for repeated prompts.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from .metrics import metrics
+
+cache_requests = metrics.counter(
+    "everkind_response_cache_requests_total",
+    "Response cache lookups by cache and result"
+)
+
+
+def normalize_message(message: str) -> str:
+    """
+    Normalize a message for cache keying.
+    
+    Args:
+        message (str): Raw message text
+    
+    Returns:
+        str: Lowercased text with collapsed whitespace
+    """
+    return " ".join(message.lower().split())
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of upstream replies keyed on the full prompt.
+    
+    Entries expire a fixed time after insertion, so a changed prompt or
+    model never serves stale replies for longer than the TTL.
+    
+    Args:
+        max_entries (int): Maximum number of cached replies
+        ttl_seconds (float): Lifetime of a cached reply
+        clock (Callable[[], float]): Monotonic time source
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 5000,
+        ttl_seconds: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        # key -> (response, expires_at)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(
+        model: str,
+        prompt_version: str,
+        user_mood: Optional[str],
+        history: List[dict],
+        message: str,
+        temperature: float
+    ) -> str:
+        """
+        Build a cache key for a prompt.
+        
+        Args:
+            model (str): Model the reply is generated with
+            prompt_version (str): Version of the system prompt
+            user_mood (str): The user's mood, if any
+            history (List[dict]): Prior user/assistant turns
+            message (str): The user's message
+            temperature (float): Sampling temperature
+        
+        Returns:
+            str: Hex digest identifying the prompt
+        """
+        payload = json.dumps([
+            model,
+            prompt_version,
+            (user_mood or "").lower(),
+            [(msg["role"], normalize_message(msg["content"])) for msg in history],
+            normalize_message(message),
+            temperature
+        ], separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached reply.
+        
+        Args:
+            key (str): Cache key from make_key
+        
+        Returns:
+            Optional[str]: The cached reply or None
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] < self._clock():
+            del self._entries[key]
+            entry = None
+        
+        if entry is None:
+            self.misses += 1
+            cache_requests.inc(cache="exact", result="miss")
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        cache_requests.inc(cache="exact", result="hit")
+        return entry[0]
+    
+    def put(self, key: str, response: str) -> None:
+        """
+        Cache a reply.
+        
+        Args:
+            key (str): Cache key from make_key
+            response (str): The reply to cache
+        """
+        self._entries[key] = (response, self._clock() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
\ No newline at end of file
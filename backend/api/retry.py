@@ -0,0 +1,258 @@
+"""
+Deadline-aware retries and hedged requests for upstream calls.
+"""
+
+import asyncio
+import logging
+import math
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, TypeVar
+from .metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+upstream_retries = metrics.counter(
+    "everkind_upstream_retries_total",
+    "Upstream calls retried after a transient error by error type"
+)
+hedged_requests = metrics.counter(
+    "everkind_upstream_hedged_requests_total",
+    "Hedged upstream requests by outcome (launched, won)"
+)
+deadline_exceeded = metrics.counter(
+    "everkind_upstream_deadline_exceeded_total",
+    "Upstream calls abandoned because the request deadline ran out"
+)
+upstream_latency = metrics.histogram(
+    "everkind_upstream_latency_seconds",
+    "Latency of successful upstream attempts"
+)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's time budget runs out before upstream answers."""
+
+
+class Deadline:
+    """
+    Total time budget for one request.
+    
+    Args:
+        seconds (float): Budget from now
+        clock (Callable[[], float]): Monotonic time source
+    """
+    
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.expires_at = clock() + seconds
+    
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(0.0, self.expires_at - self._clock())
+    
+    @property
+    def expired(self) -> bool:
+        """Whether the budget is used up."""
+        return self.remaining() <= 0
+
+
+class LatencyTracker:
+    """
+    Rolling quantile of recent upstream latencies.
+    
+    Keeps the last ``window`` samples in a ring buffer and recomputes the
+    quantile lazily, at most once every ``refresh_every`` new samples, so
+    reading it on every request stays cheap.
+    
+    Args:
+        window (int): Number of recent samples kept
+        refresh_every (int): New samples between quantile recomputations
+    """
+    
+    def __init__(self, window: int = 256, refresh_every: int = 16):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.refresh_every = refresh_every
+        self._since_refresh = 0
+        self._cache: dict = {}
+    
+    def __len__(self) -> int:
+        return len(self._samples)
+    
+    def observe(self, seconds: float) -> None:
+        """Record a latency sample."""
+        self._samples.append(seconds)
+        self._since_refresh += 1
+        if self._since_refresh >= self.refresh_every:
+            self._since_refresh = 0
+            self._cache.clear()
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Get a latency quantile.
+        
+        Args:
+            q (float): Quantile between 0 and 1
+        
+        Returns:
+            Optional[float]: Latency in seconds, None without samples
+        """
+        if not self._samples:
+            return None
+        value = self._cache.get(q)
+        if value is None:
+            ordered = sorted(self._samples)
+            value = self._cache[q] = ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+        return value
+
+
+class UpstreamCaller:
+    """
+    Runs upstream attempts with bounded retries and optional hedging.
+    
+    Failed attempts are retried up to ``max_attempts`` times when
+    ``is_retryable`` allows it, sleeping a fully jittered exponential
+    backoff between them. A retry is only made if its backoff still fits
+    in the request deadline. With hedging enabled, an attempt that is
+    still running when the recent ``hedge_quantile`` latency has passed
+    gets a twin request, and whichever answers first wins.
+    
+    Attempts receive the deadline so they can bound their own waits and
+    timeouts by the remaining budget.
+    
+    Args:
+        max_attempts (int): Maximum attempts per call, including the first
+        base_delay (float): Backoff before the first retry, before jitter
+        max_delay (float): Upper bound on a single backoff
+        is_retryable (Callable[[Exception], bool]): Whether an error is worth retrying
+        hedge (bool): Whether to hedge slow attempts
+        hedge_quantile (float): Latency quantile after which a hedge is sent
+        hedge_min_samples (int): Samples needed before hedging starts
+        hedge_min_delay (float): Lower bound on the hedge delay
+    """
+    
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.25,
+        max_delay: float = 4.0,
+        is_retryable: Callable[[Exception], bool] = lambda error: True,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 50,
+        hedge_min_delay: float = 0.5
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.is_retryable = is_retryable
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.latency = LatencyTracker()
+    
+    def backoff(self, retry: int) -> float:
+        """
+        Get a jittered backoff delay.
+        
+        Args:
+            retry (int): 1 for the first retry, 2 for the second and so on
+        
+        Returns:
+            float: Seconds to sleep
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+    
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which to hedge an attempt, None if hedging is off."""
+        if not self.hedge or len(self.latency) < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, self.latency.quantile(self.hedge_quantile))
+    
+    async def call(
+        self,
+        attempt: Callable[[Deadline], Awaitable[T]],
+        deadline: Deadline,
+        hedge: bool = True
+    ) -> T:
+        """
+        Run an upstream call within a deadline.
+        
+        Args:
+            attempt (Callable[[Deadline], Awaitable[T]]): Makes one attempt within the deadline
+            deadline (Deadline): Time budget for the whole call
+            hedge (bool): Allow hedging for this call
+        
+        Returns:
+            T: Result of the first successful attempt
+        
+        Raises:
+            DeadlineExceeded: If the budget runs out
+            Exception: The last attempt's error once retries are exhausted
+        """
+        retry = 0
+        while True:
+            if deadline.expired:
+                deadline_exceeded.inc()
+                raise DeadlineExceeded("Request deadline exceeded")
+            
+            try:
+                return await self._attempt(attempt, deadline, hedge)
+            except Exception as e:
+                if deadline.expired:
+                    deadline_exceeded.inc()
+                    raise DeadlineExceeded("Request deadline exceeded") from e
+                
+                retry += 1
+                if retry >= self.max_attempts or not self.is_retryable(e):
+                    raise
+                
+                delay = self.backoff(retry)
+                if delay >= deadline.remaining():
+                    logger.warning(f"Not retrying upstream call, deadline too close: {str(e)}")
+                    raise
+                
+                upstream_retries.inc(error=type(e).__name__)
+                logger.warning(f"Retrying upstream call in {delay:.2f}s after error: {str(e)}")
+                await asyncio.sleep(delay)
+    
+    async def _attempt(self, attempt: Callable[[Deadline], Awaitable[T]], deadline: Deadline, hedge: bool) -> T:
+        hedge_delay = self.hedge_delay() if hedge else None
+        if hedge_delay is None or hedge_delay >= deadline.remaining():
+            return await self._timed(attempt, deadline)
+        
+        primary = asyncio.ensure_future(self._timed(attempt, deadline))
+        pending = {primary}
+        error: Optional[BaseException] = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if not done:
+                hedged_requests.inc(outcome="launched")
+                pending.add(asyncio.ensure_future(self._timed(attempt, deadline)))
+            
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            hedged_requests.inc(outcome="won")
+                        return task.result()
+                    error = error or task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def _timed(self, attempt: Callable[[Deadline], Awaitable[T]], deadline: Deadline) -> T:
+        start = time.perf_counter()
+        result = await attempt(deadline)
+        elapsed = time.perf_counter() - start
+        self.latency.observe(elapsed)
+        upstream_latency.observe(elapsed)
+        return result
@@ -2,27 +2,56 @@
 API routes for the EverKind therapeutic chat application.
 """
 
+import asyncio
+import json
 import logging
-from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import JSONResponse
-from .models import ChatRequest, ChatResponse, HealthResponse, ErrorResponse
-from .chat_service import chat_service
+from typing import AsyncIterator, List, Tuple
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from .models import BatchChatRequest, BatchChatResult, ChatRequest, ChatResponse, HealthResponse, ErrorResponse
+from .admission import AdmissionRejected
+from .chat_service import ConversationNotFoundError, chat_service
 from .config import settings
+from .logging_config import content_fields
+from .serialization import FastJSONResponse, FastRoute, json_body, openapi_body
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Create router
-router = APIRouter()
+# Create router; its routes record parse and serialization time and encode response models directly
+router = APIRouter(route_class=FastRoute)
+
+# Chat bodies are validated straight from the raw request bytes
+chat_request_body = json_body(ChatRequest)
+batch_request_body = json_body(BatchChatRequest)
+
+
+def _too_many_requests(error: AdmissionRejected) -> HTTPException:
+    """
+    Build the 429 response for a request rejected by admission control.
+    
+    Args:
+        error (AdmissionRejected): The rejection
+        
+    Returns:
+        HTTPException: 429 error carrying a Retry-After header
+    """
+    logger.warning(f"Rejecting chat request: {error}")
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="The AI service is busy. Please try again shortly.",
+        headers={"Retry-After": str(error.retry_after)}
+    )
 
 
 @router.post(
     "/chat",
     response_model=ChatResponse,
     summary="Send a message to the AI therapist",
-    description="Send a message and receive a therapeutic response using CBT techniques"
+    description="Send a message and receive a therapeutic response using CBT techniques",
+    openapi_extra=openapi_body(ChatRequest)
 )
-async def chat_endpoint(request: ChatRequest) -> ChatResponse:
+async def chat_endpoint(request: ChatRequest = Depends(chat_request_body)) -> ChatResponse:
     """
     Send a message to the AI therapist and receive a therapeutic response.
     
@@ -36,11 +65,14 @@ async def chat_endpoint(request: ChatRequest) -> ChatResponse:
         HTTPException: If there's an error processing the request
     """
     try:
-        logger.info(f"Received chat request: {request.message[:50]}...")
+        logger.info(
+            "chat request received",
+            extra={"message_chars": len(request.message), **content_fields(message_preview=request.message[:50])}
+        )
         
-        # Validate API key is configured
-        if not settings.OPENAI_API_KEY:
-            logger.error("OpenAI API key not configured")
+        # Validate the LLM backend is configured
+        if not settings.llm_configured:
+            logger.error("LLM backend not configured")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="AI service not configured. Please contact support."
@@ -49,9 +81,19 @@ async def chat_endpoint(request: ChatRequest) -> ChatResponse:
         # Get therapeutic response
         response = await chat_service.get_therapeutic_response(request)
         
-        logger.info(f"Successfully generated response for conversation {response.conversation_id}")
+        logger.info(
+            "chat response sent",
+            extra={"conversation_id": response.conversation_id, "source": response.source}
+        )
         return response
         
+    except ConversationNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation not found"
+        )
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
     except HTTPException:
         raise
     except Exception as e:
@@ -62,6 +104,178 @@ async def chat_endpoint(request: ChatRequest) -> ChatResponse:
         )
 
 
+async def _sse_events(events: AsyncIterator[Tuple[str, str]]) -> AsyncIterator[str]:
+    """
+    Format chat service stream events as Server-Sent Events.
+    
+    Args:
+        events (AsyncIterator[Tuple[str, str]]): Events from the chat service
+        
+    Yields:
+        str: SSE-encoded event frames
+    """
+    async for event, payload in events:
+        if event == "delta":
+            payload = json.dumps({"content": payload})
+        yield f"event: {event}\ndata: {payload}\n\n"
+
+
+@router.post(
+    "/chat/stream",
+    summary="Stream a response from the AI therapist",
+    description="Send a message and receive the therapeutic response token by token as Server-Sent Events",
+    openapi_extra=openapi_body(ChatRequest)
+)
+async def chat_stream_endpoint(request: ChatRequest = Depends(chat_request_body)) -> StreamingResponse:
+    """
+    Stream the AI therapist's response as Server-Sent Events.
+    
+    Emits a ``delta`` event for each content fragment and a final ``done``
+    event carrying the conversation ID, timestamp and token usage.
+    
+    Args:
+        request (ChatRequest): The chat request containing message and context
+        
+    Returns:
+        StreamingResponse: ``text/event-stream`` response
+        
+    Raises:
+        HTTPException: If the AI service is not configured, the conversation is unknown
+            or the upstream pool is saturated
+    """
+    logger.info("streaming chat request received", extra={"message_chars": len(request.message)})
+    
+    if not settings.llm_configured:
+        logger.error("LLM backend not configured")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="AI service not configured. Please contact support."
+        )
+    
+    # The status line is sent before the stream starts, so surface errors up front
+    try:
+        events = await chat_service.open_stream(request)
+    except ConversationNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation not found"
+        )
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
+    
+    return StreamingResponse(
+        _sse_events(events),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering so tokens flush immediately
+        }
+    )
+
+
+async def _run_batch_item(index: int, request: ChatRequest, slots: asyncio.Semaphore) -> BatchChatResult:
+    """
+    Run one batch item through the chat service once a batch slot is free.
+    
+    Args:
+        index (int): Position of the request in the batch
+        request (ChatRequest): The chat request
+        slots (asyncio.Semaphore): Bounds the batch's concurrent items
+        
+    Returns:
+        BatchChatResult: The reply, or the status and error /chat would have returned
+    """
+    async with slots:
+        try:
+            # One-off items are not stored, so a large batch cannot evict live sessions
+            response = await chat_service.get_therapeutic_response(request, persist=bool(request.conversation_id))
+            return BatchChatResult(index=index, status=status.HTTP_200_OK, response=response)
+        except ConversationNotFoundError:
+            return BatchChatResult(index=index, status=status.HTTP_404_NOT_FOUND, error="Conversation not found")
+        except AdmissionRejected as e:
+            return BatchChatResult(
+                index=index,
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                error="The AI service is busy. Please try again shortly.",
+                retry_after=e.retry_after
+            )
+        except Exception as e:
+            logger.error("batch item failed", extra={"index": index, "error": type(e).__name__})
+            return BatchChatResult(
+                index=index,
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                error="An unexpected error occurred. Please try again later."
+            )
+
+
+async def _batch_results(requests: List[ChatRequest]) -> AsyncIterator[bytes]:
+    """
+    Run a batch with bounded concurrency and emit results as they finish.
+    
+    Args:
+        requests (List[ChatRequest]): The batch's chat requests
+        
+    Yields:
+        bytes: One NDJSON line per request, in completion order
+    """
+    slots = asyncio.Semaphore(settings.CHAT_BATCH_CONCURRENCY)
+    tasks = [asyncio.ensure_future(_run_batch_item(index, request, slots)) for index, request in enumerate(requests)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            result = await finished
+            yield result.model_dump_json(exclude_none=True).encode() + b"\n"
+    finally:
+        # Stop the remaining items if the client goes away
+        for task in tasks:
+            task.cancel()
+
+
+@router.post(
+    "/chat/batch",
+    summary="Run many chat requests at once",
+    description="Run a list of chat requests concurrently and stream their results as NDJSON in completion order",
+    openapi_extra=openapi_body(BatchChatRequest),
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "One BatchChatResult per line"}}
+)
+async def chat_batch_endpoint(batch: BatchChatRequest = Depends(batch_request_body)) -> StreamingResponse:
+    """
+    Run a batch of chat requests through the normal chat path.
+    
+    At most ``CHAT_BATCH_CONCURRENCY`` items run at once. Each result is
+    written as a JSON line as soon as it finishes, carrying the item's
+    index and the status it would have had on /chat, so one slow or
+    failing item does not hold up the rest.
+    
+    Args:
+        batch (BatchChatRequest): The chat requests to run
+        
+    Returns:
+        StreamingResponse: ``application/x-ndjson`` stream of BatchChatResult lines
+        
+    Raises:
+        HTTPException: If the batch is too large or the AI service is not configured
+    """
+    if len(batch.requests) > settings.CHAT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"A batch holds at most {settings.CHAT_BATCH_MAX_ITEMS} requests"
+        )
+    
+    if not settings.llm_configured:
+        logger.error("LLM backend not configured")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="AI service not configured. Please contact support."
+        )
+    
+    logger.info("batch chat request received", extra={"batch_size": len(batch.requests)})
+    return StreamingResponse(
+        _batch_results(batch.requests),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
+
+
 @router.get(
     "/health",
     response_model=HealthResponse,
@@ -76,20 +290,29 @@ async def health_check() -> HealthResponse:
         HealthResponse: Current service health status
     """
     try:
-        # Basic health check - verify OpenAI key is configured
-        api_key_configured = bool(settings.OPENAI_API_KEY)
-        
-        if not api_key_configured:
-            logger.warning("Health check failed: OpenAI API key not configured")
+        # Basic health check - verify the LLM backend is configured
+        if not settings.llm_configured:
+            logger.warning("Health check failed: LLM backend not configured")
             return HealthResponse(
                 status="unhealthy",
                 version=settings.API_VERSION
             )
         
+        # Replies are canned fallbacks while the upstream circuit is open
+        upstream_circuit = chat_service.circuit_breaker.state
+        if upstream_circuit == "open":
+            logger.warning("Health check degraded: upstream circuit open")
+            return HealthResponse(
+                status="degraded",
+                version=settings.API_VERSION,
+                upstream_circuit=upstream_circuit
+            )
+        
         logger.info("Health check passed")
         return HealthResponse(
             status="healthy",
-            version=settings.API_VERSION
+            version=settings.API_VERSION,
+            upstream_circuit=upstream_circuit
         )
         
     except Exception as e:
@@ -124,7 +347,7 @@ async def get_conversation(conversation_id: str) -> JSONResponse:
                 detail="Conversation not found"
             )
         
-        return JSONResponse({
+        return FastJSONResponse({
             "conversation_id": conversation_id,
             "messages": history
         })
@@ -0,0 +1,203 @@
+"""
+Local semantic response cache for first-turn messages.
+"""
+
+import re
+import time
+import zlib
+from typing import Callable, Dict, Optional
+import numpy as np
+from .metrics import metrics
+from .response_cache import cache_requests
+
+# Words that carry no meaning for matching openers
+STOP_WORDS = frozenset("""
+a about am an and are as at be been but by can do for from had has have i i'd i'll i'm i've
+im in is it it's just me my myself of on or out really so that the this to too very was
+with feel feeling feels felt right now today lately
+""".split())
+
+# Suffixes stripped so "stressed", "stressing" and "stress" share features
+SUFFIXES = ("ing", "ed", "es", "s")
+
+TOKEN_PATTERN = re.compile(r"[a-z']+")
+
+semantic_cache_evictions = metrics.counter(
+    "everkind_semantic_cache_evictions_total",
+    "Entries evicted from the semantic response cache"
+)
+
+
+def _stem(token: str) -> str:
+    for suffix in SUFFIXES:
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+class HashingVectorizer:
+    """
+    CPU-only text embedding using the hashing trick.
+    
+    Each message is represented by its stemmed content words and their
+    character 4-grams, hashed with a signed CRC32 into a fixed number of
+    dimensions and L2-normalized. No model files or external services are
+    needed, and the same text always maps to the same vector.
+    
+    Args:
+        dim (int): Number of embedding dimensions
+    """
+    
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+    
+    def embed(self, text: str) -> np.ndarray:
+        """
+        Embed a message.
+        
+        Args:
+            text (str): Message text
+        
+        Returns:
+            np.ndarray: Unit-length float32 vector (all zeros if no content words)
+        """
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            if token in STOP_WORDS:
+                continue
+            token = _stem(token)
+            self._add(vector, "w:" + token, 1.0)
+            padded = f"<{token}>"
+            for i in range(len(padded) - 3):
+                self._add(vector, "c:" + padded[i:i + 4], 0.5)
+        
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector
+    
+    def _add(self, vector: np.ndarray, feature: str, weight: float) -> None:
+        digest = zlib.crc32(feature.encode())
+        vector[digest % self.dim] += weight if digest & 0x80000000 else -weight
+
+
+class SemanticCache:
+    """
+    In-memory similarity index of first-turn replies.
+    
+    Vectors live in one preallocated matrix, so a lookup is a single
+    matrix-vector product followed by a masked argmax. Only entries with
+    the same namespace and mood are considered, so replies from another
+    model or prompt version are never reused, and a reply is reused when its cosine
+    similarity reaches the threshold for that mood. When full, expired
+    entries are replaced first, then the least recently used one.
+    
+    Args:
+        vectorizer (HashingVectorizer): Local text embedder
+        capacity (int): Maximum number of cached replies
+        threshold (float): Default minimum cosine similarity for a hit
+        mood_thresholds (Dict[str, float]): Per-mood overrides of the threshold
+        ttl_seconds (float): Lifetime of a cached reply
+        clock (Callable[[], float]): Monotonic time source
+    """
+    
+    def __init__(
+        self,
+        vectorizer: HashingVectorizer,
+        capacity: int = 2048,
+        threshold: float = 0.85,
+        mood_thresholds: Optional[Dict[str, float]] = None,
+        ttl_seconds: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.vectorizer = vectorizer
+        self.capacity = capacity
+        self.threshold = threshold
+        self.mood_thresholds = {mood.lower(): value for mood, value in (mood_thresholds or {}).items()}
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        
+        self._vectors = np.zeros((capacity, vectorizer.dim), dtype=np.float32)
+        self._partitions = np.full(capacity, -1, dtype=np.int64)
+        self._expires_at = np.zeros(capacity, dtype=np.float64)
+        self._last_used = np.zeros(capacity, dtype=np.float64)
+        self._responses = [None] * capacity
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _partition(namespace: str, user_mood: Optional[str]) -> int:
+        return zlib.crc32(f"{namespace}\0{(user_mood or '').lower()}".encode())
+    
+    def lookup(self, message: str, user_mood: Optional[str] = None, namespace: str = "") -> Optional[str]:
+        """
+        Find a cached reply to a similar message with the same namespace and mood.
+        
+        Args:
+            message (str): The user's first message
+            user_mood (str): The user's mood, if any
+            namespace (str): What produced the replies, such as model and prompt version
+        
+        Returns:
+            Optional[str]: The cached reply or None
+        """
+        size = self._size
+        if size:
+            query = self.vectorizer.embed(message)
+            similarities = self._vectors[:size] @ query
+            now = self._clock()
+            valid = (self._partitions[:size] == self._partition(namespace, user_mood)) & (self._expires_at[:size] > now)
+            similarities = np.where(valid, similarities, -1.0)
+            best = int(np.argmax(similarities))
+            
+            threshold = self.mood_thresholds.get((user_mood or "").lower(), self.threshold)
+            if similarities[best] >= threshold:
+                self._last_used[best] = now
+                self.hits += 1
+                cache_requests.inc(cache="semantic", result="hit")
+                return self._responses[best]
+        
+        self.misses += 1
+        cache_requests.inc(cache="semantic", result="miss")
+        return None
+    
+    def store(self, message: str, user_mood: Optional[str], response: str, namespace: str = "") -> None:
+        """
+        Cache the reply to a first-turn message.
+        
+        Args:
+            message (str): The user's first message
+            user_mood (str): The user's mood, if any
+            response (str): The reply to cache
+            namespace (str): What produced the reply, such as model and prompt version
+        """
+        vector = self.vectorizer.embed(message)
+        if not vector.any():
+            return
+        
+        now = self._clock()
+        if self._size < self.capacity:
+            slot = self._size
+            self._size += 1
+        else:
+            expired = np.flatnonzero(self._expires_at <= now)
+            slot = int(expired[0]) if expired.size else int(np.argmin(self._last_used))
+            semantic_cache_evictions.inc()
+        
+        self._vectors[slot] = vector
+        self._partitions[slot] = self._partition(namespace, user_mood)
+        self._expires_at[slot] = now + self.ttl_seconds
+        self._last_used[slot] = now
+        self._responses[slot] = response
+    
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters."""
+        return {
+            "entries": self._size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+    
+    def __len__(self) -> int:
+        return self._size
@@ -0,0 +1,170 @@
+"""
+Fast-path JSON request parsing and response encoding.
+
+FastAPI's default body handling decodes JSON with the standard library
+and, on the way out, dumps the response model to a dict, validates it
+again and encodes it with the standard library. On the hot path request
+bodies are decoded with orjson, when it is installed, and response models
+are encoded straight to JSON bytes by pydantic-core. Validating directly
+from the raw bytes with ``model_validate_json`` was measured slower than
+decoding with orjson and validating the result under the pinned pydantic,
+so the models are still validated from Python objects (see
+``perf/bench_serialization.py``). Set ``FAST_SERIALIZATION_ENABLED=false``
+to fall back to the default path.
+"""
+
+import json
+import logging
+from typing import Any, Callable, Dict, Type, TypeVar
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
+from .config import settings
+from .telemetry import TimedRoute
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def loads(data: bytes) -> Any:
+    """
+    Decode JSON, with orjson when it is installed.
+    
+    Args:
+        data (bytes): JSON document
+    
+    Returns:
+        Any: The decoded value
+    
+    Raises:
+        json.JSONDecodeError: If the document is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode plain JSON-compatible data, with orjson when it is installed.
+    
+    Args:
+        content (Any): Dicts, lists, strings, numbers, booleans or None
+    
+    Returns:
+        bytes: Compact UTF-8 JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response that encodes models with pydantic-core and other data with orjson.
+    
+    Renders the same JSON as ``JSONResponse`` would for the model's
+    ``model_dump(mode="json")``, without the intermediate dicts.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content, by_alias=True)
+        return dumps(content)
+
+
+def json_body(model: Type[ModelT]) -> Callable:
+    """
+    Build a dependency that validates the request body into a model.
+    
+    With fast serialization the body is decoded with ``loads``; otherwise
+    with the standard library, as FastAPI does. Decoding and validation
+    errors become the usual 422 responses. Use it with ``openapi_body`` so
+    the schema still documents the body.
+    
+    Args:
+        model (Type[ModelT]): Model of the request body
+    
+    Returns:
+        Callable: FastAPI dependency returning the validated model
+    """
+    async def parse(request: Request) -> ModelT:
+        body = await request.body()
+        try:
+            return model.model_validate(loads(body) if settings.FAST_SERIALIZATION_ENABLED else json.loads(body))
+        except json.JSONDecodeError as e:
+            raise RequestValidationError(
+                [{"type": "json_invalid", "loc": ("body", e.pos), "msg": "JSON decode error", "input": {}, "ctx": {"error": e.msg}}]
+            )
+        except ValidationError as e:
+            raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors()])
+    
+    return parse
+
+
+def _inline_refs(schema: Any, definitions: Dict[str, Any]) -> Any:
+    if isinstance(schema, dict):
+        if "$ref" in schema:
+            return _inline_refs(definitions[schema["$ref"].rsplit("/", 1)[-1]], definitions)
+        return {key: _inline_refs(value, definitions) for key, value in schema.items() if key != "$defs"}
+    if isinstance(schema, list):
+        return [_inline_refs(item, definitions) for item in schema]
+    return schema
+
+
+def openapi_body(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Describe a ``json_body`` request body for the OpenAPI schema.
+    
+    Nested models are inlined, since routes parsing their own body do not
+    add them to the schema components. The model must not be recursive.
+    
+    Args:
+        model (Type[BaseModel]): Model of the request body
+    
+    Returns:
+        Dict[str, Any]: Value for the route's ``openapi_extra``
+    """
+    schema = model.model_json_schema()
+    return {
+        "requestBody": {
+            "content": {"application/json": {"schema": _inline_refs(schema, schema.get("$defs", {}))}},
+            "required": True
+        }
+    }
+
+
+class FastRoute(TimedRoute):
+    """
+    Timed route that encodes its response model directly to JSON bytes.
+    
+    When the endpoint returns exactly the declared ``response_model`` and
+    the route keeps the default by_alias and sets no include, exclude or
+    exclude_* options, the model is encoded once by pydantic-core instead
+    of being dumped, re-validated and encoded by FastAPI. Anything else
+    takes FastAPI's normal path.
+    """
+    
+    def encode_result(self, result: Any) -> Any:
+        if (
+            settings.FAST_SERIALIZATION_ENABLED
+            and type(result) is self.response_model
+            and self.response_model_by_alias
+            and not (
+                self.response_model_include
+                or self.response_model_exclude
+                or self.response_model_exclude_unset
+                or self.response_model_exclude_defaults
+                or self.response_model_exclude_none
+            )
+        ):
+            return FastJSONResponse(result, status_code=self.status_code or 200)
+        return result
@@ -0,0 +1,462 @@
+"""
+Conversation session storage for the EverKind API.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+from .config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Approximate per-message bookkeeping overhead (dict, keys, role string)
+MESSAGE_OVERHEAD_BYTES = 64
+
+
+def estimate_session_size(session: dict) -> int:
+    """
+    Cheaply estimate the memory footprint of a session record.
+    
+    Args:
+        session (dict): The session record
+    
+    Returns:
+        int: Approximate size in bytes
+    """
+    size = MESSAGE_OVERHEAD_BYTES
+    for message in session.get("messages", ()):
+        size += len(message.get("content") or "") + MESSAGE_OVERHEAD_BYTES
+    size += len(session.get("last_response") or "")
+    return size
+
+
+class SessionStore(ABC):
+    """
+    Abstract storage backend for conversation sessions.
+    
+    A session is a plain dict holding at least ``messages`` (the
+    user/assistant turns) and ``last_response``.
+    """
+    
+    @abstractmethod
+    def get(self, conversation_id: str) -> Optional[dict]:
+        """
+        Look up a session.
+        
+        Args:
+            conversation_id (str): The conversation identifier
+        
+        Returns:
+            Optional[dict]: The session or None if not found
+        """
+    
+    @abstractmethod
+    def put(self, conversation_id: str, session: dict) -> None:
+        """
+        Insert or replace a session.
+        
+        Args:
+            conversation_id (str): The conversation identifier
+            session (dict): The session record
+        """
+    
+    @abstractmethod
+    def delete(self, conversation_id: str) -> bool:
+        """
+        Remove a session.
+        
+        Args:
+            conversation_id (str): The conversation identifier
+        
+        Returns:
+            bool: True if the session existed
+        """
+    
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """
+        Get store counters.
+        
+        Returns:
+            Dict[str, int]: Counters such as hits, misses and evictions
+        """
+    
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of sessions currently held."""
+    
+    def __contains__(self, conversation_id: str) -> bool:
+        return self.get(conversation_id) is not None
+    
+    def close(self) -> None:
+        """Release any resources held by the store."""
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Bounded in-process session store with LRU, idle TTL and byte budget.
+    
+    Entries are kept in access order, so the least recently used entry is
+    always at the front. Because access time is monotonic in that order,
+    expired entries are also at the front and can be purged in O(1)
+    amortized time on each write.
+    
+    Args:
+        max_entries (int): Maximum number of sessions to hold
+        ttl_seconds (float): Idle time after which a session expires
+        max_bytes (int): Approximate total memory budget for all sessions
+        clock (Callable[[], float]): Monotonic time source
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: float = 3600.0,
+        max_bytes: int = 64 * 1024 * 1024,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._clock = clock
+        # conversation_id -> [session, size, last_access]
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, conversation_id: str) -> Optional[dict]:
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        now = self._clock()
+        if now - entry[2] > self.ttl_seconds:
+            self._remove(conversation_id)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        
+        entry[2] = now
+        self._entries.move_to_end(conversation_id)
+        self.hits += 1
+        return entry[0]
+    
+    def put(self, conversation_id: str, session: dict) -> None:
+        size = estimate_session_size(session)
+        if size > self.max_bytes:
+            logger.warning(f"Session {conversation_id} exceeds the session byte budget - not stored")
+            self._remove(conversation_id)
+            self.evictions += 1
+            return
+        
+        self._remove(conversation_id)
+        self._entries[conversation_id] = [session, size, self._clock()]
+        self._bytes += size
+        self._evict()
+    
+    def delete(self, conversation_id: str) -> bool:
+        return self._remove(conversation_id)
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _remove(self, conversation_id: str) -> bool:
+        entry = self._entries.pop(conversation_id, None)
+        if entry is None:
+            return False
+        self._bytes -= entry[1]
+        return True
+    
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones until within bounds."""
+        deadline = self._clock() - self.ttl_seconds
+        while self._entries:
+            conversation_id, entry = next(iter(self._entries.items()))
+            if entry[2] >= deadline:
+                break
+            self._remove(conversation_id)
+            self.expirations += 1
+        
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry[1]
+            self.evictions += 1
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Durable session store backed by SQLite in WAL mode.
+    
+    Reads are served from a hot in-memory cache and only fall through to
+    the database on a miss. Writes update the cache immediately and are
+    persisted by a background thread in batched transactions, so the
+    request path never waits on disk. The cache trusts this process to be
+    the only writer of the sessions it holds: with several uvicorn workers
+    sharing one database file, route each conversation to one worker or
+    keep the cache TTL short, since another worker's write is only seen
+    once the cached copy expires.
+    
+    Args:
+        path (str): Path to the SQLite database file
+        cache (InMemorySessionStore): Hot cache in front of the database
+        flush_interval (float): Maximum seconds a write waits before being persisted
+        batch_size (int): Pending writes that trigger an early flush
+        retention_seconds (float): Age after which stored sessions are purged
+    """
+    
+    # How often the writer purges sessions older than the retention period
+    PURGE_INTERVAL_SECONDS = 60.0
+    
+    # Session IDs per existence check when counting new rows, below SQLite's variable limit
+    COUNT_CHUNK_SIZE = 500
+    
+    def __init__(
+        self,
+        path: str,
+        cache: InMemorySessionStore,
+        flush_interval: float = 0.05,
+        batch_size: int = 200,
+        retention_seconds: float = 3600.0
+    ):
+        self.path = path
+        self._cache = cache
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.retention_seconds = retention_seconds
+        
+        # conversation_id -> session to upsert, or None to delete
+        self._pending: Dict[str, Optional[dict]] = {}
+        # Writes taken by a flush that has not committed yet
+        self._flushing: Dict[str, Optional[dict]] = {}
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._last_purge = time.monotonic()
+        
+        self.db_reads = 0
+        self.db_writes = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        
+        self._write_conn = self._connect()
+        self._write_conn.execute("PRAGMA journal_mode=WAL")
+        self._write_conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "conversation_id TEXT PRIMARY KEY, "
+            "data TEXT NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        self._write_conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions (updated_at)")
+        self._write_conn.commit()
+        self._read_conn = self._connect()
+        self._read_lock = threading.Lock()
+        # Stored sessions, kept up to date by the writer so __len__ never queries
+        self._count = self._count_rows()
+        
+        self._writer = threading.Thread(target=self._run_writer, name="session-writer", daemon=True)
+        self._writer.start()
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+    
+    def get(self, conversation_id: str) -> Optional[dict]:
+        session = self._cache.get(conversation_id)
+        if session is not None:
+            return session
+        
+        # Written but evicted from the cache before the writer persisted it
+        with self._pending_lock:
+            for writes in (self._pending, self._flushing):
+                if conversation_id in writes:
+                    return writes[conversation_id]
+        
+        with self._read_lock:
+            row = self._read_conn.execute(
+                "SELECT data FROM sessions WHERE conversation_id = ?",
+                (conversation_id,)
+            ).fetchone()
+        self.db_reads += 1
+        
+        if row is None:
+            return None
+        
+        session = json.loads(row[0])
+        self._cache.put(conversation_id, session)
+        return session
+    
+    def put(self, conversation_id: str, session: dict) -> None:
+        self._cache.put(conversation_id, session)
+        self._enqueue(conversation_id, session)
+    
+    def delete(self, conversation_id: str) -> bool:
+        existed = self.get(conversation_id) is not None
+        self._cache.delete(conversation_id)
+        self._enqueue(conversation_id, None)
+        return existed
+    
+    def stats(self) -> Dict[str, int]:
+        stats = self._cache.stats()
+        with self._pending_lock:
+            stats["pending_writes"] = len(self._pending)
+        stats.update({
+            "db_reads": self.db_reads,
+            "db_writes": self.db_writes,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors
+        })
+        return stats
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def _count_rows(self) -> int:
+        return self._write_conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+    
+    def flush(self) -> None:
+        """Persist all pending writes in a single transaction."""
+        with self._write_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, {}
+                self._flushing = batch
+            if batch:
+                self._flush_batch(batch)
+            with self._pending_lock:
+                self._flushing = {}
+    
+    def _flush_batch(self, batch: Dict[str, Optional[dict]]) -> None:
+        """Write one batch and record the versions it created."""
+        now = time.time()
+        upserts = [
+            (conversation_id, json.dumps(session, default=str), now)
+            for conversation_id, session in batch.items() if session is not None
+        ]
+        deletes = [(conversation_id,) for conversation_id, session in batch.items() if session is None]
+        
+        try:
+            with self._write_conn:
+                added = 0
+                for start in range(0, len(upserts), self.COUNT_CHUNK_SIZE):
+                    chunk = [upsert[0] for upsert in upserts[start:start + self.COUNT_CHUNK_SIZE]]
+                    existing = self._write_conn.execute(
+                        f"SELECT COUNT(*) FROM sessions WHERE conversation_id IN ({','.join('?' * len(chunk))})",
+                        chunk
+                    ).fetchone()[0]
+                    added += len(chunk) - existing
+                if upserts:
+                    self._write_conn.executemany(
+                        "INSERT INTO sessions (conversation_id, data, updated_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(conversation_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                        upserts
+                    )
+                if deletes:
+                    added -= self._write_conn.executemany("DELETE FROM sessions WHERE conversation_id = ?", deletes).rowcount
+            self._count += added
+            self.db_writes += len(batch)
+            self.flushes += 1
+        except sqlite3.Error as e:
+            logger.error(f"Error flushing {len(batch)} sessions to SQLite: {str(e)}")
+            self.flush_errors += 1
+            # Requeue unless a newer write for the same session arrived meanwhile
+            with self._pending_lock:
+                for conversation_id, session in batch.items():
+                    self._pending.setdefault(conversation_id, session)
+    
+    def close(self) -> None:
+        """Stop the writer, flush outstanding writes and close connections."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._writer.join()
+        self.flush()
+        self._write_conn.close()
+        self._read_conn.close()
+    
+    def _enqueue(self, conversation_id: str, session: Optional[dict]) -> None:
+        with self._pending_lock:
+            self._pending[conversation_id] = session
+            pending = len(self._pending)
+        if pending >= self.batch_size:
+            self._wakeup.set()
+    
+    def _purge_expired(self) -> None:
+        """Delete sessions that have not been updated within the retention period."""
+        cutoff = time.time() - self.retention_seconds
+        try:
+            with self._write_lock, self._write_conn:
+                self._write_conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,))
+                # Also picks up sessions written by other workers
+                self._count = self._count_rows()
+        except sqlite3.Error as e:
+            logger.error(f"Error purging expired sessions: {str(e)}")
+    
+    def _run_writer(self) -> None:
+        """Background loop persisting pending writes off the request path."""
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            
+            if time.monotonic() - self._last_purge >= self.PURGE_INTERVAL_SECONDS:
+                self._last_purge = time.monotonic()
+                self._purge_expired()
+
+
+def create_session_store() -> SessionStore:
+    """
+    Create the session store configured in settings.
+    
+    Returns:
+        SessionStore: The configured session store
+    
+    Raises:
+        ValueError: If SESSION_BACKEND is not a known backend
+    """
+    backend = settings.SESSION_BACKEND.lower()
+    
+    if backend == "memory":
+        return InMemorySessionStore(
+            max_entries=settings.SESSION_MAX_ENTRIES,
+            ttl_seconds=settings.SESSION_TTL_SECONDS,
+            max_bytes=settings.SESSION_MAX_BYTES
+        )
+    
+    if backend == "sqlite":
+        cache = InMemorySessionStore(
+            max_entries=settings.SESSION_MAX_ENTRIES,
+            ttl_seconds=settings.SESSION_CACHE_TTL_SECONDS,
+            max_bytes=settings.SESSION_MAX_BYTES
+        )
+        return SQLiteSessionStore(
+            path=settings.SESSION_DB_PATH,
+            cache=cache,
+            flush_interval=settings.SESSION_FLUSH_INTERVAL_MS / 1000,
+            batch_size=settings.SESSION_FLUSH_BATCH_SIZE,
+            retention_seconds=settings.SESSION_TTL_SECONDS
+        )
+    
+    raise ValueError(f"Unknown SESSION_BACKEND: {settings.SESSION_BACKEND}")
@@ -0,0 +1,77 @@
+"""
+In-flight request coalescing for duplicate submissions.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+from .metrics import metrics
+
+T = TypeVar("T")
+
+coalesced_requests = metrics.counter(
+    "everkind_coalesced_requests_total",
+    "Calls through the in-flight coalescer by role (leader or follower)"
+)
+
+
+class _Call:
+    """An in-flight call shared by every caller with the same key."""
+    
+    __slots__ = ("task", "waiters")
+    
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time.
+    
+    The first caller for a key (the leader) starts the call in its own
+    task; callers arriving while it runs (followers) await the same task
+    and receive the same result or exception. Because the call runs in a
+    separate task, cancelling one caller does not affect the others; the
+    call itself is only cancelled once every caller has gone away.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+    
+    def __len__(self) -> int:
+        return len(self._calls)
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``fn`` unless an identical call is already in flight.
+        
+        Args:
+            key (Hashable): Identifies duplicate calls
+            fn (Callable[[], Awaitable[T]]): Coroutine factory for the call
+        
+        Returns:
+            T: Result of the shared call
+        
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            coalesced_requests.inc(role="leader")
+        else:
+            coalesced_requests.inc(role="follower")
+        
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+    
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
@@ -0,0 +1,160 @@
+"""
+Incremental rolling summarization of long conversations.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from .session_store import SessionStore
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Instructions for folding new turns into the running summary
+SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a supportive CBT conversation, for the therapist's own reference.
+
+Update the existing summary with the new messages. Keep:
+- The user's main concerns, situations and recurring thoughts
+- Emotions and mood changes they described
+- Goals, coping strategies and exercises already discussed
+- Any safety concerns, stated plainly
+
+Write in the third person, in at most {max_words} words. Reply with the updated summary only."""
+
+# Completion callable: (messages, max_tokens) -> summary text
+SummaryCompletion = Callable[[List[dict], int], Awaitable[str]]
+
+
+def summary_for_prompt(session: Optional[dict], history: List[dict]) -> Tuple[Optional[str], int]:
+    """
+    Get the stored summary that applies to a conversation history.
+    
+    Args:
+        session (dict): The stored session, if any
+        history (List[dict]): The conversation's prior turns
+    
+    Returns:
+        Tuple[Optional[str], int]: Summary text and the number of leading
+        history messages it replaces, or ``(None, 0)``
+    """
+    if not session or not session.get("summary"):
+        return None, 0
+    
+    summarized_count = session.get("summarized_count", 0)
+    if summarized_count > len(history):
+        return None, 0
+    
+    return session["summary"], summarized_count
+
+
+class ConversationSummarizer:
+    """
+    Folds the oldest turns of long conversations into a running summary.
+    
+    Sessions keep their full message list; the summary and the number of
+    leading messages it covers (``summarized_count``) are stored alongside
+    it. Each pass only summarizes the messages added since the previous
+    pass, and runs as a background task so it never delays a reply.
+    
+    Args:
+        session_store (SessionStore): Store holding the sessions to compact
+        trigger_messages (int): Unsummarized messages that trigger a pass
+        keep_recent_messages (int): Newest messages always left verbatim
+        max_summary_tokens (int): Token limit for the generated summary
+    """
+    
+    def __init__(
+        self,
+        session_store: SessionStore,
+        trigger_messages: int = 20,
+        keep_recent_messages: int = 10,
+        max_summary_tokens: int = 300
+    ):
+        self.session_store = session_store
+        self.trigger_messages = trigger_messages
+        self.keep_recent_messages = keep_recent_messages
+        self.max_summary_tokens = max_summary_tokens
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.passes = 0
+        self.failures = 0
+    
+    def maybe_schedule(self, conversation_id: str, complete: SummaryCompletion) -> bool:
+        """
+        Start a background summarization pass if the session needs one.
+        
+        Args:
+            conversation_id (str): The conversation identifier
+            complete (SummaryCompletion): Callable producing the summary text
+        
+        Returns:
+            bool: True if a pass was scheduled
+        """
+        if conversation_id in self._tasks:
+            return False
+        
+        session = self.session_store.get(conversation_id)
+        if session is None:
+            return False
+        
+        unsummarized = len(session["messages"]) - session.get("summarized_count", 0)
+        if unsummarized < self.trigger_messages:
+            return False
+        
+        task = asyncio.create_task(self._summarize(conversation_id, complete))
+        self._tasks[conversation_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(conversation_id, None))
+        return True
+    
+    async def close(self) -> None:
+        """Cancel outstanding summarization passes."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def _summarize(self, conversation_id: str, complete: SummaryCompletion) -> None:
+        session = self.session_store.get(conversation_id)
+        if session is None:
+            return
+        
+        messages = session["messages"]
+        start = session.get("summarized_count", 0)
+        end = max(len(messages) - self.keep_recent_messages, 0)
+        
+        # Keep the verbatim window starting on a user turn
+        while end < len(messages) and messages[end]["role"] == "assistant":
+            end += 1
+        if end <= start:
+            return
+        
+        previous_summary = session.get("summary")
+        transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages[start:end])
+        prompt = [
+            {
+                "role": "system",
+                "content": SUMMARY_SYSTEM_PROMPT.format(max_words=self.max_summary_tokens * 3 // 4)
+            },
+            {
+                "role": "user",
+                "content": f"Existing summary:\n{previous_summary or 'None yet.'}\n\nNew messages:\n{transcript}"
+            }
+        ]
+        
+        try:
+            summary = await complete(prompt, self.max_summary_tokens)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Error summarizing conversation {conversation_id}: {str(e)}")
+            return
+        
+        # New turns may have been appended while the summary was generated;
+        # they are untouched because messages are only ever appended
+        latest = self.session_store.get(conversation_id)
+        if latest is None or latest.get("summarized_count", 0) != start:
+            return
+        
+        self.session_store.put(conversation_id, dict(latest, summary=summary.strip(), summarized_count=end))
+        self.passes += 1
+        logger.info(f"Summarized {end - start} messages of conversation {conversation_id}")
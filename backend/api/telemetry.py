@@ -0,0 +1,416 @@
+"""
+Request and per-stage latency telemetry.
+
+``MetricsMiddleware`` starts a ``RequestTimings`` for every
+request and keeps it in a context variable, so code anywhere below it,
+including the chat service, can attribute time to a stage without
+passing anything around. Each stage is also kept as a span of the
+request's trace: stage durations are returned in a ``Server-Timing``
+header and finished traces go to a fixed-size ring buffer. All
+recording is plain arithmetic and list appends on the event loop
+thread; there are no locks on the hot path.
+"""
+
+import logging
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+from fastapi.routing import APIRoute
+from starlette.responses import StreamingResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .config import settings
+from .metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+request_duration = metrics.histogram(
+    "everkind_request_duration_seconds",
+    "Total request latency by method, route and status"
+)
+stage_duration = metrics.histogram(
+    "everkind_request_stage_seconds",
+    "Latency of request stages (parse, prompt_build, upstream, upstream_queue, upstream_call, ttft, serialization)"
+)
+fallback_responses = metrics.counter(
+    "everkind_fallback_responses_total",
+    "Replies served from the canned fallbacks by reason"
+)
+upstream_errors = metrics.counter(
+    "everkind_upstream_errors_total",
+    "Failed upstream attempts by error type"
+)
+prompt_tokens = metrics.counter(
+    "everkind_prompt_tokens_total",
+    "Prompt tokens sent upstream by model"
+)
+completion_tokens = metrics.counter(
+    "everkind_completion_tokens_total",
+    "Completion tokens received from upstream by model"
+)
+active_sessions = metrics.gauge(
+    "everkind_active_sessions",
+    "Conversations held by the session store"
+)
+
+# Stage spans kept per trace; batch requests would otherwise grow without bound
+MAX_TRACE_SPANS = 256
+
+
+class RequestTimings:
+    """
+    Timestamps and trace spans of one request, shared by everything that handles it.
+    
+    Spans are kept as ``[name, parent index, start, end]`` lists in the
+    order they were opened; ``end`` is None while a span is open and the
+    parent index is -1 for top-level spans.
+    """
+    
+    __slots__ = ("trace_id", "start", "endpoint_start", "endpoint_end", "first_token", "spans", "attributes")
+    
+    def __init__(self, start: float):
+        self.trace_id = os.urandom(8).hex()
+        self.start = start
+        self.endpoint_start: Optional[float] = None
+        self.endpoint_end: Optional[float] = None
+        self.first_token = False
+        self.spans: List[list] = []
+        self.attributes: Dict[str, object] = {}
+    
+    def open_span(self, name: str, start: float, parent: int = -1) -> int:
+        """
+        Start a span.
+        
+        Args:
+            name (str): Span name
+            start (float): perf_counter() at the start of the span
+            parent (int): Index of the enclosing span, or -1
+            
+        Returns:
+            int: Index of the new span
+        """
+        self.spans.append([name, parent, start, None])
+        return len(self.spans) - 1
+    
+    def server_timing(self, now: float) -> str:
+        """
+        Render the finished spans as a ``Server-Timing`` header value.
+        
+        Spans with the same name are summed. ``total`` is the time since the
+        request started and ``middleware`` the part of it spent outside the
+        route handler.
+        
+        Args:
+            now (float): perf_counter() when the header is sent
+            
+        Returns:
+            str: Header value, durations in milliseconds
+        """
+        durations: Dict[str, float] = {}
+        for name, _, start, end in self.spans:
+            if end is not None:
+                durations[name] = durations.get(name, 0.0) + end - start
+        total = now - self.start
+        if "route" in durations:
+            durations["middleware"] = max(total - durations.pop("route"), 0.0)
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in durations.items()]
+        entries.append(f"total;dur={total * 1000:.1f}")
+        entries.append(f'trace;desc="{self.trace_id}"')
+        return ", ".join(entries)
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+_current_span: ContextVar[int] = ContextVar("current_span", default=-1)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a block as one stage of request handling.
+    
+    Within a request the stage is also recorded as a span, nested under
+    the stage that encloses it, until the request has ``MAX_TRACE_SPANS``.
+    
+    Args:
+        name (str): Stage label
+    """
+    timings = _current_timings.get()
+    start = time.perf_counter()
+    if timings is None or len(timings.spans) >= MAX_TRACE_SPANS:
+        try:
+            yield
+        finally:
+            stage_duration.observe(time.perf_counter() - start, stage=name)
+        return
+    
+    index = timings.open_span(name, start, _current_span.get())
+    token = _current_span.set(index)
+    try:
+        yield
+    finally:
+        _current_span.reset(token)
+        end = time.perf_counter()
+        timings.spans[index][3] = end
+        stage_duration.observe(end - start, stage=name)
+
+
+def _record_stage(timings: RequestTimings, name: str, start: float, end: float, parent: int) -> None:
+    timings.spans.append([name, parent, start, end])
+    stage_duration.observe(end - start, stage=name)
+
+
+def annotate(**attributes: object) -> None:
+    """
+    Attach attributes, such as the model, to the current request's trace.
+    
+    Never pass message content; traces are readable from /debug/traces.
+    
+    Args:
+        **attributes (object): Attribute values
+    """
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.attributes.update(attributes)
+
+
+def record_first_token() -> None:
+    """Record the time to first token of the current request, once."""
+    timings = _current_timings.get()
+    if timings is None or timings.first_token:
+        return
+    timings.first_token = True
+    ttft = time.perf_counter() - timings.start
+    stage_duration.observe(ttft, stage="ttft")
+    timings.attributes["ttft_ms"] = round(ttft * 1000, 1)
+
+
+def record_tokens(model: str, prompt: Optional[int], completion: Optional[int]) -> None:
+    """
+    Count the tokens of an upstream call.
+    
+    Args:
+        model (str): Model that answered
+        prompt (Optional[int]): Prompt tokens, if known
+        completion (Optional[int]): Completion tokens, if known
+    """
+    if prompt:
+        prompt_tokens.inc(prompt, model=model)
+    if completion:
+        completion_tokens.inc(completion, model=model)
+    annotate(model=model, prompt_tokens=prompt, completion_tokens=completion)
+
+
+def record_fallback(reason: str) -> None:
+    """
+    Count a reply served from the canned fallbacks.
+    
+    Args:
+        reason (str): Why the fallback was used
+    """
+    fallback_responses.inc(reason=reason)
+    annotate(fallback=reason)
+
+
+class TraceBuffer:
+    """
+    Keeps the traces of the most recent requests.
+    
+    Finished requests are appended to a bounded deque, so recording is
+    constant time and memory stays fixed; traces are only turned into
+    dictionaries when read.
+    
+    Args:
+        capacity (int): Number of traces to keep; 0 disables recording
+    """
+    
+    def __init__(self, capacity: int = 200):
+        self.capacity = capacity
+        self._traces: Deque[Tuple[float, str, str, str, float, RequestTimings]] = deque(maxlen=max(capacity, 1))
+    
+    def record(self, timings: RequestTimings, method: str, route: str, status: str, duration: float) -> None:
+        """
+        Keep the trace of a finished request.
+        
+        Args:
+            timings (RequestTimings): The request's timings and spans
+            method (str): HTTP method
+            route (str): Route template
+            status (str): Response status code
+            duration (float): Total latency in seconds
+        """
+        if self.capacity > 0:
+            self._traces.append((time.time(), method, route, status, duration, timings))
+    
+    def snapshot(self, limit: Optional[int] = None, min_duration: float = 0.0) -> List[dict]:
+        """
+        Get recorded traces, newest first.
+        
+        Args:
+            limit (Optional[int]): Maximum number of traces to return
+            min_duration (float): Only return requests at least this slow, in seconds
+            
+        Returns:
+            List[dict]: Traces with their spans, timed in milliseconds from the request start
+        """
+        result = []
+        for finished, method, route, status, duration, timings in reversed(self._traces):
+            if duration < min_duration:
+                continue
+            if limit is not None and len(result) >= limit:
+                break
+            result.append({
+                "trace_id": timings.trace_id,
+                "started_at": datetime.fromtimestamp(finished - duration, timezone.utc).isoformat(timespec="milliseconds"),
+                "method": method,
+                "route": route,
+                "status": int(status),
+                "duration_ms": round(duration * 1000, 2),
+                "attributes": dict(timings.attributes),
+                "spans": [
+                    {
+                        "name": name,
+                        "parent": parent,
+                        "start_ms": round((start - timings.start) * 1000, 2),
+                        "duration_ms": None if end is None else round((end - start) * 1000, 2)
+                    }
+                    for name, parent, start, end in timings.spans
+                ]
+            })
+        return result
+    
+    def clear(self) -> None:
+        """Drop all recorded traces."""
+        self._traces.clear()
+
+
+class MetricsMiddleware:
+    """
+    Records total request latency and starts per-request stage timings.
+    
+    Latency runs until the last body chunk has been sent, so streamed
+    responses are measured in full. Requests are labelled by their route
+    template rather than the raw path to keep the series bounded. Stages
+    finished before the response starts are returned in a
+    ``Server-Timing`` header, and the finished trace is kept in the
+    trace buffer.
+    
+    Args:
+        app (ASGIApp): The wrapped application
+        server_timing (bool): Add the Server-Timing header
+        trace_buffer (Optional[TraceBuffer]): Where to keep finished traces
+    """
+    
+    def __init__(self, app: ASGIApp, server_timing: bool = True, trace_buffer: Optional[TraceBuffer] = None):
+        self.app = app
+        self.server_timing = server_timing
+        self.trace_buffer = trace_buffer if trace_buffer is not None else traces
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        timings = RequestTimings(time.perf_counter())
+        token = _current_timings.set(timings)
+        status = "500"
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                if self.server_timing:
+                    header = timings.server_timing(time.perf_counter()).encode("latin-1")
+                    message["headers"] = [*message.get("headers", ()), (b"server-timing", header)]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_timings.reset(token)
+            duration = time.perf_counter() - timings.start
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_duration.observe(duration, method=scope["method"], route=route, status=status)
+            self.trace_buffer.record(timings, scope["method"], route, status, duration)
+
+
+def _timed_endpoint(endpoint: Callable, encode: Callable) -> Callable:
+    @wraps(endpoint)
+    async def timed(*args, **kwargs):
+        timings = _current_timings.get()
+        if timings is None:
+            return encode(await endpoint(*args, **kwargs))
+        timings.endpoint_start = time.perf_counter()
+        index = timings.open_span("endpoint", timings.endpoint_start, _current_span.get())
+        token = _current_span.set(index)
+        try:
+            result = await endpoint(*args, **kwargs)
+        finally:
+            _current_span.reset(token)
+            timings.endpoint_end = timings.spans[index][3] = time.perf_counter()
+        return encode(result)
+    
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """
+    Route that splits handling into parse, endpoint and serialization time.
+    
+    Time from entering the route until the endpoint runs is body parsing
+    and validation; time from the endpoint returning until the response
+    is built is serialization. The whole handler is recorded as the
+    ``route`` span enclosing them. Endpoints must be coroutines.
+    Subclasses can turn endpoint results into responses themselves by
+    overriding ``encode_result``; that time counts as serialization.
+    """
+    
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint, self.encode_result), **kwargs)
+    
+    def encode_result(self, result: Any) -> Any:
+        """
+        Hook to encode an endpoint's result before FastAPI serializes it.
+        
+        Args:
+            result (Any): What the endpoint returned
+            
+        Returns:
+            Any: A Response to send as is, or the result for FastAPI to serialize
+        """
+        return result
+    
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        
+        async def timed_handler(request):
+            start = time.perf_counter()
+            timings = _current_timings.get()
+            token = None
+            if timings is None:
+                timings = RequestTimings(start)
+                token = _current_timings.set(timings)
+            index = timings.open_span("route", start, _current_span.get())
+            span_token = _current_span.set(index)
+            try:
+                response = await handler(request)
+            finally:
+                _current_span.reset(span_token)
+                if token is not None:
+                    _current_timings.reset(token)
+            if timings.endpoint_start is not None:
+                _record_stage(timings, "parse", start, timings.endpoint_start, index)
+                if timings.endpoint_end is not None and not isinstance(response, StreamingResponse):
+                    _record_stage(timings, "serialization", timings.endpoint_end, time.perf_counter(), index)
+            timings.spans[index][3] = time.perf_counter()
+            return response
+        
+        return timed_handler
+
+
+# Global trace buffer instance
+traces = TraceBuffer(settings.TRACE_BUFFER_SIZE)
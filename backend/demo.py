@@ -20,6 +20,8 @@ async def demo_chat():
     print("🧠 EverKind Therapeutic API Demo")
     print("=" * 40)
     
+    await chat_service.start()
+    
     # Test basic chat without mood
     print("\n1. Testing basic chat without mood:")
     request1 = ChatRequest(
@@ -69,6 +71,8 @@ async def demo_chat():
     if not chat_service.client:
         print("\n⚠️  Note: OpenAI client not configured - using fallback responses")
         print("   Set OPENAI_API_KEY environment variable for full functionality")
+    
+    await chat_service.close()
 
 
 if __name__ == "__main__":
@@ -2,25 +2,30 @@
 Main FastAPI application for EverKind therapeutic chat API.
 """
 
+import hmac
 import logging
 import time
 import uvicorn
-from fastapi import FastAPI, Request
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 
 from api.config import settings
+from api.logging_config import configure_logging
+from api.loop_monitor import loop_monitor
 from api.routes import router
+from api.chat_service import chat_service
 from api.models import ErrorResponse
+from api.rate_limit import RateLimitMiddleware
+from api.metrics import PROMETHEUS_CONTENT_TYPE, metrics
+from api.telemetry import MetricsMiddleware, active_sessions, traces
 
 
 # Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL.upper()),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -40,10 +45,17 @@ async def lifespan(app: FastAPI):
         settings.validate_settings()
         logger.info("✅ Configuration validated successfully")
         
+        # Open the pooled upstream client once per worker
+        await chat_service.start()
+        
+        # Watch for blocking calls on the event loop
+        if settings.LOOP_MONITOR_ENABLED:
+            await loop_monitor.start()
+        
         # Log startup information
         logger.info(f"🚀 API Version: {settings.API_VERSION}")
         logger.info(f"🌍 Environment: {settings.ENVIRONMENT}")
-        logger.info(f"🔧 OpenAI Model: {settings.OPENAI_MODEL}")
+        logger.info(f"🔧 LLM Backend: {settings.LLM_BACKEND} ({settings.OPENAI_MODEL})")
         logger.info(f"📡 CORS Origins: {settings.ALLOWED_ORIGINS}")
         
         yield
@@ -54,6 +66,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down EverKind Therapeutic API...")
+    await loop_monitor.stop()
+    await chat_service.close()
 
 
 # Create FastAPI application
@@ -66,6 +80,14 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Add per-client rate limiting; added before CORS so 429s still carry CORS headers
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
+# Record request latency and per-stage timings
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, server_timing=settings.SERVER_TIMING_ENABLED)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -96,17 +118,22 @@ async def log_requests(request: Request, call_next):
     Returns:
         Response: The response from the next handler
     """
-    start_time = time.time()
-    
-    # Log request
-    logger.info(f"📨 {request.method} {request.url.path} - Client: {request.client.host}")
+    start_time = time.perf_counter()
     
     # Process request
     response = await call_next(request)
     
-    # Log response
-    process_time = time.time() - start_time
-    logger.info(f"📤 {request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.3f}s")
+    # Log one structured record per request; server errors are never sampled out
+    logger.log(
+        logging.WARNING if response.status_code >= 500 else logging.INFO,
+        "request completed",
+        extra={
+            "method": request.method,
+            "path": request.url.path,
+            "status": response.status_code,
+            "duration_ms": round((time.perf_counter() - start_time) * 1000, 1)
+        }
+    )
     
     return response
 
@@ -159,6 +186,48 @@ async def app_root():
     }
 
 
+# Prometheus metrics endpoint at root level
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics_endpoint() -> PlainTextResponse:
+        """Expose metrics in the Prometheus text format."""
+        active_sessions.set(len(chat_service.session_store))
+        return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+# Recent request traces, for operators holding the debug token
+@app.get("/debug/traces", include_in_schema=False)
+async def debug_traces(
+    limit: int = Query(50, ge=1, le=1000),
+    min_duration_ms: float = Query(0, ge=0),
+    x_debug_token: Optional[str] = Header(None)
+):
+    """
+    Browse the traces of the most recent requests, newest first.
+    
+    Args:
+        limit (int): Maximum number of traces to return
+        min_duration_ms (float): Only return requests at least this slow
+        x_debug_token (Optional[str]): Must match DEBUG_TRACES_TOKEN
+        
+    Returns:
+        dict: The matching traces
+        
+    Raises:
+        HTTPException: 404 if no token is configured, 403 if the token is wrong
+    """
+    if not settings.DEBUG_TRACES_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_debug_token is None or not hmac.compare_digest(
+        x_debug_token.encode(), settings.DEBUG_TRACES_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Invalid debug token")
+    return {
+        "capacity": traces.capacity,
+        "traces": traces.snapshot(limit=limit, min_duration=min_duration_ms / 1000)
+    }
+
+
 # Health check endpoint at root level
 @app.get("/health")
 async def root_health_check():
@@ -174,5 +243,8 @@ if __name__ == "__main__":
         port=settings.PORT,
         reload=settings.is_development,
         log_level=settings.LOG_LEVEL.lower(),
-        access_log=True
+        # log_requests already logs each request; uvicorn's own loggers
+        # propagate to the root queue handler instead of writing to stdout
+        access_log=False,
+        log_config=None
     ) 
\ No newline at end of file
@@ -0,0 +1,3 @@
+"""
+Performance testing tools for the EverKind Therapeutic API.
+"""
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Benchmark request parsing and response encoding on the chat hot path.
+
+For each conversation history size, times the default FastAPI path against
+the fast path (``FAST_SERIALIZATION_ENABLED``) in microseconds of CPU per
+call:
+
+- ``parse``: decoding the ``ChatRequest`` body with the standard library
+  against orjson, both followed by model validation
+- ``validate_json``: for reference, validating straight from the request
+  bytes with ``model_validate_json``, which is slower than either under
+  the pinned pydantic
+- ``response``: FastAPI's dump, re-validate and encode of the
+  ``ChatResponse``, against encoding it directly with pydantic-core
+- ``history``: encoding the conversation history as ``GET /conversation``
+  returns it, with the standard library against orjson
+- ``request``: a whole ``POST /api/v1/chat`` through the ASGI app on an
+  instant offline backend, so everything but serialization is the same
+
+The report is JSON, so runs can be diffed between commits::
+
+    python perf/bench_serialization.py --sizes 10 100 500 --iterations 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("LLM_BACKEND", "offline")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import httpx
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from main import app
+from api.chat_service import chat_service
+from api.config import settings
+from api.llm_backends import OfflineBackend
+from api.models import ChatRequest, ChatResponse
+from api.serialization import FastJSONResponse, loads
+
+# Alternating rounds per whole-request measurement
+ROUNDS = 10
+
+
+def make_body(history_items: int) -> bytes:
+    """
+    Build a chat request body with a conversation history.
+    
+    Args:
+        history_items (int): Number of history messages
+    
+    Returns:
+        bytes: JSON request body
+    """
+    history = [
+        {
+            "role": "user" if index % 2 == 0 else "assistant",
+            "content": f"Message {index}: I have been thinking about what we talked about and how it made me feel.",
+            "timestamp": "2024-01-01T12:00:00"
+        }
+        for index in range(history_items)
+    ]
+    return json.dumps({"message": "How can I handle this better?", "conversation_history": history}).encode()
+
+
+def cpu_per_call(function: Callable[[], object], iterations: int) -> float:
+    """
+    Measure the CPU time of a function call.
+    
+    Args:
+        function (Callable[[], object]): Function to time
+        iterations (int): Number of calls
+    
+    Returns:
+        float: Microseconds of CPU per call
+    """
+    function()
+    start = time.process_time()
+    for _ in range(iterations):
+        function()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+async def async_cpu_per_call(function: Callable[[], Awaitable[object]], iterations: int) -> float:
+    """
+    Measure the CPU time of a coroutine function call.
+    
+    Args:
+        function (Callable[[], Awaitable[object]]): Coroutine function to time
+        iterations (int): Number of calls
+    
+    Returns:
+        float: Microseconds of CPU per call
+    """
+    await function()
+    start = time.process_time()
+    for _ in range(iterations):
+        await function()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def compare(default: float, fast: float) -> Dict[str, float]:
+    """Summarize the default and fast timings of one step."""
+    return {
+        "default_us": round(default, 1),
+        "fast_us": round(fast, 1),
+        "saved_us": round(default - fast, 1),
+        "speedup": round(default / fast, 2) if fast else None
+    }
+
+
+async def bench_size(client: httpx.AsyncClient, history_items: int, iterations: int) -> dict:
+    """
+    Benchmark every step for one history size.
+    
+    Args:
+        client (httpx.AsyncClient): In-process client for the app
+        history_items (int): Number of history messages
+        iterations (int): Calls per measurement
+    
+    Returns:
+        dict: Timings of each step
+    """
+    body = make_body(history_items)
+    request = ChatRequest.model_validate_json(body)
+    response = ChatResponse(response="That sounds really hard. " * 8, conversation_id="c" * 36, model="gpt-4o-mini")
+    history = [message.model_dump(include={"role", "content"}) for message in request.conversation_history]
+    chat_route = next(route for route in app.routes if getattr(route, "path", None) == "/api/v1/chat")
+    
+    async def default_response():
+        content = await serialize_response(field=chat_route.response_field, response_content=response)
+        return JSONResponse(content)
+    
+    async def post():
+        reply = await client.post("/api/v1/chat", content=body, headers={"content-type": "application/json"})
+        reply.raise_for_status()
+    
+    # Alternate the modes in rounds so drift, such as the growing session store, hits both
+    requests = {False: 0.0, True: 0.0}
+    for _ in range(ROUNDS):
+        for fast in requests:
+            settings.FAST_SERIALIZATION_ENABLED = fast
+            requests[fast] += await async_cpu_per_call(post, max(iterations // ROUNDS, 1)) / ROUNDS
+    
+    return {
+        "history_items": history_items,
+        "request_bytes": len(body),
+        "parse": compare(
+            cpu_per_call(lambda: ChatRequest.model_validate(json.loads(body)), iterations),
+            cpu_per_call(lambda: ChatRequest.model_validate(loads(body)), iterations)
+        ),
+        "validate_json": compare(
+            cpu_per_call(lambda: ChatRequest.model_validate(json.loads(body)), iterations),
+            cpu_per_call(lambda: ChatRequest.model_validate_json(body), iterations)
+        ),
+        "response": compare(
+            await async_cpu_per_call(default_response, iterations),
+            cpu_per_call(lambda: FastJSONResponse(response), iterations)
+        ),
+        "history": compare(
+            cpu_per_call(lambda: JSONResponse({"conversation_id": "c", "messages": history}), iterations),
+            cpu_per_call(lambda: FastJSONResponse({"conversation_id": "c", "messages": history}), iterations)
+        ),
+        "request": compare(requests[False], requests[True])
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500], help="History sizes to benchmark")
+    parser.add_argument("--iterations", type=int, default=200, help="Calls per measurement")
+    return parser.parse_args(argv)
+
+
+async def main(args: argparse.Namespace) -> dict:
+    """Run the benchmark described by the command line."""
+    enabled = settings.FAST_SERIALIZATION_ENABLED
+    chat_service.backend = OfflineBackend(latency_median=0, tokens_per_second=0)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            results = [await bench_size(client, size, args.iterations) for size in args.sizes]
+    finally:
+        settings.FAST_SERIALIZATION_ENABLED = enabled
+        await chat_service.close()
+    return {"iterations": args.iterations, "results": results}
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(main(parse_args())), indent=2))
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Fake OpenAI-compatible chat completions server for end-to-end performance tests.
+
+Serves ``POST /v1/chat/completions`` in both the plain JSON and the SSE
+streaming form, with configurable time to first token, token rate,
+rate-limit 429s and bursts of 5xx errors. Point the API at it with::
+
+    python perf/fake_openai_server.py --port 8100 --ttft-median 0.4 --tokens-per-second 60
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=fake python start.py
+
+so benchmarks exercise the real HTTP client, connection pool and JSON
+parsing without upstream cost. ``GET /stats`` reports what the server saw.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from api.llm_backends import OfflineBackend
+
+
+class FakeServerConfig:
+    """
+    Behaviour of the fake server.
+    
+    Args:
+        ttft_median (float): Median seconds to the first token
+        ttft_p99 (float): 99th percentile seconds to the first token
+        tokens_per_second (float): Token rate after the first token; 0 for instant
+        rate_limit_rate (float): Share of requests answered with 429
+        rate_limit_retry_after (float): Retry-After sent with 429s, in seconds
+        error_burst_every (float): Seconds between the starts of 5xx bursts; 0 disables bursts
+        error_burst_seconds (float): Length of each burst, during which every request gets a 5xx
+        error_status (int): Status code returned during bursts
+        seed (int): Seed for latency and 429 sampling
+    """
+    
+    def __init__(
+        self,
+        ttft_median: float = 0.5,
+        ttft_p99: float = 2.0,
+        tokens_per_second: float = 50.0,
+        rate_limit_rate: float = 0.0,
+        rate_limit_retry_after: float = 1.0,
+        error_burst_every: float = 0.0,
+        error_burst_seconds: float = 0.0,
+        error_status: int = 503,
+        seed: int = 0
+    ):
+        self.ttft_median = ttft_median
+        self.ttft_p99 = ttft_p99
+        self.tokens_per_second = tokens_per_second
+        self.rate_limit_rate = rate_limit_rate
+        self.rate_limit_retry_after = rate_limit_retry_after
+        self.error_burst_every = error_burst_every
+        self.error_burst_seconds = error_burst_seconds
+        self.error_status = error_status
+        self.seed = seed
+
+
+class FakeServerStats:
+    """Counters reported by ``GET /stats``."""
+    
+    def __init__(self):
+        self.requests = 0
+        self.streams = 0
+        self.completed = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.completion_tokens = 0
+    
+    def as_dict(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+
+def _error(status_code: int, message: str, error_type: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"error": {"message": message, "type": error_type, "param": None, "code": None}},
+        headers=headers
+    )
+
+
+def create_app(config: FakeServerConfig, clock: Callable[[], float] = time.monotonic) -> FastAPI:
+    """
+    Create the fake server application.
+    
+    Args:
+        config (FakeServerConfig): Server behaviour
+        clock (Callable[[], float]): Monotonic time source for error bursts
+    
+    Returns:
+        FastAPI: The application
+    """
+    app = FastAPI(title="Fake OpenAI API", docs_url=None, redoc_url=None)
+    generator = OfflineBackend(
+        latency_median=config.ttft_median,
+        latency_p99=config.ttft_p99,
+        tokens_per_second=config.tokens_per_second,
+        seed=config.seed
+    )
+    sampler = random.Random(config.seed)
+    stats = FakeServerStats()
+    started = clock()
+    app.state.config = config
+    app.state.stats = stats
+    
+    def in_error_burst() -> bool:
+        if config.error_burst_every <= 0:
+            return False
+        return (clock() - started) % config.error_burst_every < config.error_burst_seconds
+    
+    @app.get("/stats")
+    async def get_stats() -> Dict[str, int]:
+        """Report request counters."""
+        return stats.as_dict()
+    
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        """Answer a chat completion request like the OpenAI API."""
+        body = await request.json()
+        stats.requests += 1
+        
+        if in_error_burst():
+            stats.errors += 1
+            return _error(config.error_status, "The server is temporarily unavailable", "server_error")
+        if sampler.random() < config.rate_limit_rate:
+            stats.rate_limited += 1
+            return _error(
+                429,
+                "Rate limit reached for requests",
+                "requests",
+                headers={"Retry-After": f"{config.rate_limit_retry_after:g}"}
+            )
+        
+        model = body.get("model", "gpt-4")
+        params = dict(
+            model=model,
+            messages=body.get("messages", []),
+            max_tokens=body.get("max_tokens") or 500,
+            temperature=body.get("temperature", 1.0),
+            timeout=float("inf")
+        )
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        
+        stats.in_flight += 1
+        stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+        
+        if not body.get("stream"):
+            try:
+                completion = await generator.complete(**params)
+            finally:
+                stats.in_flight -= 1
+            stats.completed += 1
+            stats.completion_tokens += completion.completion_tokens
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": completion.content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {
+                    "prompt_tokens": completion.prompt_tokens,
+                    "completion_tokens": completion.completion_tokens,
+                    "total_tokens": completion.prompt_tokens + completion.completion_tokens
+                }
+            }
+        
+        stats.streams += 1
+        
+        def chunk(delta: dict, finish_reason: Optional[str] = None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+        
+        async def events() -> AsyncIterator[str]:
+            try:
+                yield chunk({"role": "assistant", "content": ""})
+                async for delta in deltas:
+                    stats.completion_tokens += 1
+                    yield chunk({"content": delta})
+                yield chunk({}, "stop")
+                yield "data: [DONE]\n\n"
+                stats.completed += 1
+            finally:
+                stats.in_flight -= 1
+        
+        # Response headers go out once the first token is ready
+        try:
+            deltas = await generator.stream(**params)
+        except BaseException:
+            stats.in_flight -= 1
+            raise
+        return StreamingResponse(events(), media_type="text/event-stream")
+    
+    return app
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--ttft-median", type=float, default=0.5, help="Median seconds to the first token")
+    parser.add_argument("--ttft-p99", type=float, default=2.0, help="p99 seconds to the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Token rate; 0 for instant")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--rate-limit-retry-after", type=float, default=1.0, help="Retry-After of 429s in seconds")
+    parser.add_argument("--error-burst-every", type=float, default=0.0, help="Seconds between 5xx bursts; 0 disables")
+    parser.add_argument("--error-burst-seconds", type=float, default=0.0, help="Length of each 5xx burst")
+    parser.add_argument("--error-status", type=int, default=503, help="Status code returned during bursts")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    config = FakeServerConfig(
+        ttft_median=args.ttft_median,
+        ttft_p99=args.ttft_p99,
+        tokens_per_second=args.tokens_per_second,
+        rate_limit_rate=args.rate_limit_rate,
+        rate_limit_retry_after=args.rate_limit_retry_after,
+        error_burst_every=args.error_burst_every,
+        error_burst_seconds=args.error_burst_seconds,
+        error_status=args.error_status,
+        seed=args.seed
+    )
+    print(f"🧪 Fake OpenAI API on http://{args.host}:{args.port}/v1")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Load generator for the EverKind Therapeutic API.
+
+Simulated users hold conversations with ``POST /api/v1/chat``, continuing
+each one by ``conversation_id`` for a number of turns drawn from a
+conversation-length profile, and mix in health checks and conversation
+history reads. Load is either closed-loop (``--concurrency`` users chatting
+back to back) or open-loop (conversations arriving at ``--rate`` per
+second, at most ``--concurrency`` at a time; arrivals beyond that are
+counted as skipped).
+
+The report is JSON with throughput, latency percentiles per endpoint,
+status codes, error and fallback rates and upstream call counts, so runs
+can be diffed between commits::
+
+    # In-process against the ASGI app, on the offline backend without rate limits
+    python perf/loadtest.py --concurrency 50 --duration 30 --profile mixed > before.json
+    
+    # Over HTTP against a running server, counting calls at the fake upstream
+    python perf/loadtest.py --url http://127.0.0.1:8000 --rate 20 --duration 60 \\
+        --upstream-stats http://127.0.0.1:8100/stats
+
+In-process runs default ``LLM_BACKEND`` to ``offline``, ``RATE_LIMIT_ENABLED``
+to ``false`` and ``LOG_LEVEL`` to ``WARNING``; set them in the environment to
+override.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from contextlib import AsyncExitStack
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+# Turns per conversation, drawn uniformly from the range
+PROFILES = {
+    "short": (1, 2),
+    "mixed": (1, 8),
+    "long": (8, 16)
+}
+
+OPENERS = (
+    "Hi, I've been feeling a bit overwhelmed lately.",
+    "I can't stop worrying about a presentation I have to give next week.",
+    "I had an argument with my partner and I keep replaying it in my head.",
+    "Work has been really stressful and I'm not sleeping well.",
+    "I feel like I'm falling behind everyone else my age."
+)
+
+FOLLOW_UPS = (
+    "That makes sense.",
+    "I think it started when I changed jobs a few months ago.",
+    "Whenever I try to relax my mind just jumps to everything that could go wrong, "
+    "and then I end up feeling guilty for not getting anything done.",
+    "Can you explain that a bit more?",
+    "I tried that yesterday and it helped a little.",
+    "I'm not sure, maybe I'm just not good at handling pressure."
+)
+
+MOODS = (None, "anxious", "stressed", "overwhelmed", "calm")
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    """
+    Get a nearest-rank percentile.
+    
+    Args:
+        samples (List[float]): Sorted samples
+        q (float): Quantile between 0 and 1
+    
+    Returns:
+        Optional[float]: The percentile, None without samples
+    """
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, max(0, int(round(q * len(samples))) - 1))]
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
+
+
+class EndpointResults:
+    """Latencies and status codes recorded for one endpoint."""
+    
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.status: Dict[str, int] = {}
+        self.errors = 0
+    
+    def record(self, status: str, seconds: float) -> None:
+        self.latencies.append(seconds)
+        self.status[status] = self.status.get(status, 0) + 1
+    
+    def summary(self, elapsed: float) -> dict:
+        ordered = sorted(self.latencies)
+        return {
+            "requests": len(ordered),
+            "rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+            "errors": self.errors,
+            "status": dict(sorted(self.status.items())),
+            "latency_seconds": {
+                "mean": round(sum(ordered) / len(ordered), 4) if ordered else None,
+                "p50": _round(percentile(ordered, 0.5)),
+                "p95": _round(percentile(ordered, 0.95)),
+                "p99": _round(percentile(ordered, 0.99)),
+                "max": _round(ordered[-1] if ordered else None)
+            }
+        }
+
+
+class Workload:
+    """
+    Shape of the generated load.
+    
+    Args:
+        concurrency (int): Simulated users, or the cap on open conversations with ``rate``
+        rate (Optional[float]): Conversations started per second; None for closed-loop load
+        duration (float): Seconds to keep starting conversations
+        max_requests (Optional[int]): Stop starting conversations after this many chat requests
+        profile (str): Conversation-length profile, one of PROFILES
+        health_ratio (float): Share of conversations preceded by a health check
+        history_ratio (float): Share of conversations followed by a history read
+        seed (int): Seed for arrivals, profile draws and messages
+    """
+    
+    def __init__(
+        self,
+        concurrency: int = 10,
+        rate: Optional[float] = None,
+        duration: float = 30.0,
+        max_requests: Optional[int] = None,
+        profile: str = "mixed",
+        health_ratio: float = 0.1,
+        history_ratio: float = 0.2,
+        seed: int = 0
+    ):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown profile {profile!r}, expected one of {', '.join(PROFILES)}")
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.max_requests = max_requests
+        self.profile = profile
+        self.health_ratio = health_ratio
+        self.history_ratio = history_ratio
+        self.seed = seed
+    
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class LoadGenerator:
+    """
+    Drives the API with a workload and collects the results.
+    
+    Args:
+        client (httpx.AsyncClient): Client for the API, in-process or over HTTP
+        workload (Workload): Load to generate
+        upstream_stats (Callable[[], Awaitable[Dict[str, int]]]): Reads upstream call counters;
+            the report holds their change over the run
+    """
+    
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        workload: Workload,
+        upstream_stats: Optional[Callable[[], Awaitable[Dict[str, int]]]] = None
+    ):
+        self.client = client
+        self.workload = workload
+        self.upstream_stats = upstream_stats
+        self._random = random.Random(workload.seed)
+        self.endpoints: Dict[str, EndpointResults] = {
+            "chat": EndpointResults(),
+            "health": EndpointResults(),
+            "conversation": EndpointResults()
+        }
+        self.sources: Dict[str, int] = {}
+        self.conversations = 0
+        self.skipped_conversations = 0
+        self._chat_requests = 0
+        self._deadline = 0.0
+    
+    def _more(self) -> bool:
+        if time.monotonic() >= self._deadline:
+            return False
+        return self.workload.max_requests is None or self._chat_requests < self.workload.max_requests
+    
+    async def _request(self, endpoint: str, method: str, url: str, **kwargs) -> Optional[dict]:
+        results = self.endpoints[endpoint]
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            results.errors += 1
+            results.record(type(e).__name__, time.perf_counter() - start)
+            return None
+        results.record(str(response.status_code), time.perf_counter() - start)
+        if response.status_code >= 400:
+            results.errors += 1
+            return None
+        return response.json()
+    
+    async def _conversation(self) -> None:
+        self.conversations += 1
+        min_turns, max_turns = PROFILES[self.workload.profile]
+        turns = self._random.randint(min_turns, max_turns)
+        mood = self._random.choice(MOODS)
+        
+        if self._random.random() < self.workload.health_ratio:
+            await self._request("health", "GET", "/api/v1/health")
+        
+        conversation_id = None
+        for turn in range(turns):
+            if turn and not self._more():
+                break
+            self._chat_requests += 1
+            payload = {"message": self._random.choice(FOLLOW_UPS if turn else OPENERS), "user_mood": mood}
+            if conversation_id is not None:
+                payload["conversation_id"] = conversation_id
+            body = await self._request("chat", "POST", "/api/v1/chat", json=payload)
+            if body is None:
+                break
+            conversation_id = body["conversation_id"]
+            source = body.get("source") or "unknown"
+            self.sources[source] = self.sources.get(source, 0) + 1
+        
+        if conversation_id is not None and self._random.random() < self.workload.history_ratio:
+            await self._request("conversation", "GET", f"/api/v1/conversation/{conversation_id}")
+    
+    async def _closed_loop(self) -> None:
+        async def user() -> None:
+            while self._more():
+                await self._conversation()
+        
+        await asyncio.gather(*(user() for _ in range(self.workload.concurrency)))
+    
+    async def _open_loop(self) -> None:
+        active = set()
+        next_arrival = time.monotonic()
+        while self._more():
+            next_arrival += self._random.expovariate(self.workload.rate)
+            await asyncio.sleep(max(0.0, next_arrival - time.monotonic()))
+            if not self._more():
+                break
+            if len(active) >= self.workload.concurrency:
+                self.skipped_conversations += 1
+                continue
+            task = asyncio.ensure_future(self._conversation())
+            active.add(task)
+            task.add_done_callback(active.discard)
+        if active:
+            await asyncio.gather(*active)
+    
+    async def run(self) -> dict:
+        """
+        Generate the load and build the report.
+        
+        Returns:
+            dict: JSON-serializable report
+        """
+        upstream_before = await self.upstream_stats() if self.upstream_stats else None
+        start = time.monotonic()
+        self._deadline = start + self.workload.duration
+        if self.workload.rate:
+            await self._open_loop()
+        else:
+            await self._closed_loop()
+        elapsed = time.monotonic() - start
+        upstream_after = await self.upstream_stats() if self.upstream_stats else None
+        
+        chat = self.endpoints["chat"]
+        chat_requests = len(chat.latencies)
+        total_requests = sum(len(results.latencies) for results in self.endpoints.values())
+        report = {
+            "workload": self.workload.as_dict(),
+            "elapsed_seconds": round(elapsed, 3),
+            "requests": total_requests,
+            "rps": round(total_requests / elapsed, 2) if elapsed else 0.0,
+            "conversations": self.conversations,
+            "skipped_conversations": self.skipped_conversations,
+            "error_rate": round(sum(r.errors for r in self.endpoints.values()) / total_requests, 4) if total_requests else 0.0,
+            "fallback_rate": round(self.sources.get("fallback", 0) / chat_requests, 4) if chat_requests else 0.0,
+            "sources": dict(sorted(self.sources.items())),
+            "endpoints": {name: results.summary(elapsed) for name, results in self.endpoints.items()},
+            "upstream": None
+        }
+        if upstream_before is not None:
+            report["upstream"] = {
+                key: upstream_after[key] - upstream_before.get(key, 0)
+                for key in sorted(upstream_after)
+                if isinstance(upstream_after[key], (int, float))
+            }
+        return report
+
+
+class CountingBackend:
+    """
+    Wraps an LLM backend and counts the calls made through it.
+    
+    Args:
+        backend: The backend to wrap
+    """
+    
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+        self.counts = {"calls": 0, "streams": 0, "errors": 0}
+    
+    async def _count(self, call, key: str, **params):
+        self.counts[key] += 1
+        try:
+            return await call(**params)
+        except Exception:
+            self.counts["errors"] += 1
+            raise
+    
+    async def complete(self, **params):
+        return await self._count(self.backend.complete, "calls", **params)
+    
+    async def stream(self, **params):
+        return await self._count(self.backend.stream, "streams", **params)
+    
+    async def close(self) -> None:
+        await self.backend.close()
+    
+    async def stats(self) -> Dict[str, int]:
+        return dict(self.counts)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="Base URL of a running API; runs in-process when omitted")
+    parser.add_argument("--concurrency", type=int, default=10, help="Simulated users, or the open conversation cap with --rate")
+    parser.add_argument("--rate", type=float, help="Conversations started per second (open-loop)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to keep starting conversations")
+    parser.add_argument("--max-requests", type=int, help="Stop after this many chat requests")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="mixed", help="Conversation-length profile")
+    parser.add_argument("--health-ratio", type=float, default=0.1, help="Share of conversations preceded by a health check")
+    parser.add_argument("--history-ratio", type=float, default=0.2, help="Share of conversations followed by a history read")
+    parser.add_argument("--upstream-stats", help="URL of the fake upstream's /stats, for over-HTTP runs")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+async def main(args: argparse.Namespace) -> dict:
+    """Run the load test described by the command line."""
+    workload = Workload(
+        concurrency=args.concurrency,
+        rate=args.rate,
+        duration=args.duration,
+        max_requests=args.max_requests,
+        profile=args.profile,
+        health_ratio=args.health_ratio,
+        history_ratio=args.history_ratio,
+        seed=args.seed
+    )
+    limits = httpx.Limits(max_connections=max(args.concurrency, 1) * 2)
+    
+    async with AsyncExitStack() as stack:
+        upstream_stats = None
+        if args.url:
+            client = await stack.enter_async_context(
+                httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits)
+            )
+            target = args.url
+        else:
+            os.environ.setdefault("LLM_BACKEND", "offline")
+            os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+            os.environ.setdefault("LOG_LEVEL", "WARNING")
+            from main import app
+            from api.chat_service import chat_service
+            
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            if chat_service.backend is not None:
+                chat_service.backend = CountingBackend(chat_service.backend)
+                upstream_stats = chat_service.backend.stats
+            client = await stack.enter_async_context(
+                httpx.AsyncClient(
+                    transport=httpx.ASGITransport(app=app),
+                    base_url="http://loadtest",
+                    timeout=args.timeout
+                )
+            )
+            target = "in-process"
+        
+        if args.upstream_stats:
+            upstream_client = await stack.enter_async_context(httpx.AsyncClient(timeout=args.timeout))
+            
+            async def upstream_stats() -> Dict[str, int]:
+                response = await upstream_client.get(args.upstream_stats)
+                response.raise_for_status()
+                return response.json()
+        
+        report = await LoadGenerator(client, workload, upstream_stats).run()
+        return dict(target=target, **report)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = json.dumps(asyncio.run(main(args)), indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+    else:
+        print(report)
@@ -24,5 +24,8 @@ if __name__ == "__main__":
         port=settings.PORT,
         reload=settings.is_development,
         log_level=settings.LOG_LEVEL.lower(),
-        access_log=True
+        # log_requests already logs each request; uvicorn's own loggers
+        # propagate to the root queue handler instead of writing to stdout
+        access_log=False,
+        log_config=None
     ) 
\ No newline at end of file
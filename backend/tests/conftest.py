@@ -0,0 +1,21 @@
+"""
+Shared fixtures for the test suite.
+"""
+
+import pytest
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """Create a controllable clock."""
+    return FakeClock()
@@ -0,0 +1,157 @@
+"""
+Unit tests for upstream admission control.
+"""
+
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, Mock, AsyncMock
+from main import app
+from api.admission import AdmissionController, AdmissionRejected, admission_rejections
+from api.chat_service import ChatService
+from api.models import ChatRequest
+
+
+class TestAdmissionController:
+    """Test cases for AdmissionController."""
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        """Test no more than max_concurrency slots are held at once."""
+        controller = AdmissionController(max_concurrency=2, max_queue=10, max_queue_wait=1)
+        peak = 0
+        
+        async def work():
+            nonlocal peak
+            async with controller.slot():
+                peak = max(peak, controller.active)
+                await asyncio.sleep(0.01)
+        
+        await asyncio.gather(*(work() for _ in range(6)))
+        
+        assert peak == 2
+        assert controller.active == 0
+        assert controller.queued == 0
+    
+    @pytest.mark.asyncio
+    async def test_waiters_are_served_in_order(self):
+        """Test a released slot goes to the oldest waiter."""
+        controller = AdmissionController(max_concurrency=1, max_queue=10, max_queue_wait=1)
+        await controller.acquire()
+        order = []
+        
+        async def work(name):
+            async with controller.slot():
+                order.append(name)
+        
+        tasks = [asyncio.create_task(work(name)) for name in "abc"]
+        await asyncio.sleep(0)
+        assert controller.queued == 3
+        
+        controller.release()
+        await asyncio.gather(*tasks)
+        
+        assert order == ["a", "b", "c"]
+        assert controller.active == 0
+    
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects_immediately(self):
+        """Test callers beyond the queue bound are rejected without waiting."""
+        controller = AdmissionController(max_concurrency=1, max_queue=1, max_queue_wait=10)
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        rejected_before = admission_rejections.value(reason="queue_full")
+        
+        with pytest.raises(AdmissionRejected) as exc_info:
+            await controller.acquire()
+        
+        assert exc_info.value.reason == "queue_full"
+        assert exc_info.value.retry_after == 10
+        assert admission_rejections.value(reason="queue_full") == rejected_before + 1
+        
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert controller.queued == 0
+    
+    @pytest.mark.asyncio
+    async def test_queue_wait_deadline(self):
+        """Test a waiter is rejected once the queue-wait deadline passes."""
+        controller = AdmissionController(max_concurrency=1, max_queue=5, max_queue_wait=0.01)
+        await controller.acquire()
+        
+        with pytest.raises(AdmissionRejected) as exc_info:
+            await controller.acquire()
+        
+        assert exc_info.value.reason == "queue_timeout"
+        assert exc_info.value.retry_after == 1
+        assert controller.queued == 0
+        assert controller.active == 1
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_leak_slot(self):
+        """Test cancelling a queued caller leaves the pool consistent."""
+        controller = AdmissionController(max_concurrency=1, max_queue=5, max_queue_wait=1)
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        controller.release()
+        
+        assert controller.active == 0
+        assert controller.queued == 0
+
+
+class TestChatServiceAdmission:
+    """Test cases for admission control in ChatService."""
+    
+    @pytest.mark.asyncio
+    async def test_rejection_is_not_turned_into_fallback(self):
+        """Test a saturated pool raises instead of returning a canned reply."""
+        chat_service = ChatService()
+        chat_service.admission = AdmissionController(max_concurrency=1, max_queue=0, max_queue_wait=1)
+        chat_service.client = Mock()
+        chat_service.client.chat.completions.create = AsyncMock()
+        await chat_service.admission.acquire()
+        
+        with pytest.raises(AdmissionRejected):
+            await chat_service.get_therapeutic_response(ChatRequest(message="Hello"))
+        
+        chat_service.client.chat.completions.create.assert_not_called()
+
+
+class TestAdmissionRoutes:
+    """Test cases for 429 responses from the chat endpoints."""
+    
+    @pytest.fixture
+    def client(self):
+        """Create a test client for the FastAPI application."""
+        return TestClient(app)
+    
+    @patch('api.routes.settings.OPENAI_API_KEY', 'test-key')
+    @patch('api.routes.chat_service.get_therapeutic_response')
+    def test_chat_endpoint_returns_429(self, mock_chat_service, client):
+        """Test a rejected chat request returns 429 with Retry-After."""
+        mock_chat_service.side_effect = AdmissionRejected("queue_full", 5)
+        
+        response = client.post("/api/v1/chat", json={"message": "Hello"})
+        
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "5"
+    
+    @patch('api.routes.settings.OPENAI_API_KEY', 'test-key')
+    @patch('api.routes.chat_service.stream_therapeutic_response')
+    def test_chat_stream_endpoint_returns_429(self, mock_stream, client):
+        """Test a rejected stream request returns 429 before streaming."""
+        async def rejected(request):
+            raise AdmissionRejected("queue_timeout", 3)
+            yield
+        
+        mock_stream.side_effect = rejected
+        
+        response = client.post("/api/v1/chat/stream", json={"message": "Hello"})
+        
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "3"
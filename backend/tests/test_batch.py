@@ -0,0 +1,118 @@
+"""
+Tests for the batch chat endpoint.
+"""
+
+import asyncio
+import json
+import httpx
+import pytest
+from unittest.mock import patch
+from main import app
+from api.admission import AdmissionRejected
+from api.chat_service import ConversationNotFoundError, chat_service
+from api.models import ChatResponse
+from api.rate_limit import estimate_request_tokens, request_items
+
+
+@pytest.fixture
+def client():
+    """Create an in-process client for the API."""
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://batch")
+
+
+@pytest.fixture(autouse=True)
+def configured():
+    """Treat the AI service as configured."""
+    with patch('api.routes.settings.OPENAI_API_KEY', 'test-key'):
+        yield
+
+
+def read_lines(response: httpx.Response) -> list:
+    """Parse an NDJSON response body."""
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+class TestBatchEndpoint:
+    """Test cases for POST /api/v1/chat/batch."""
+    
+    @pytest.mark.asyncio
+    async def test_streams_results_in_completion_order(self, client):
+        """Test results arrive as items finish, each with its own status."""
+        async def respond(request, persist=True):
+            if request.message == "slow":
+                await asyncio.sleep(0.1)
+            if request.message == "missing":
+                raise ConversationNotFoundError("abc")
+            if request.message == "busy":
+                raise AdmissionRejected("queue_full", retry_after=2)
+            if request.message == "broken":
+                raise RuntimeError("boom")
+            return ChatResponse(response=f"Reply to {request.message}", conversation_id="c1")
+        
+        batch = {"requests": [{"message": text} for text in ("slow", "fast", "missing", "busy", "broken")]}
+        with patch.object(chat_service, "get_therapeutic_response", side_effect=respond):
+            response = await client.post("/api/v1/chat/batch", json=batch)
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        results = read_lines(response)
+        assert results[-1]["index"] == 0
+        by_index = {result["index"]: result for result in results}
+        assert by_index[0]["response"]["response"] == "Reply to slow"
+        assert by_index[1]["status"] == 200
+        assert by_index[2] == {"index": 2, "status": 404, "error": "Conversation not found"}
+        assert by_index[3]["status"] == 429
+        assert by_index[3]["retry_after"] == 2
+        assert by_index[4]["status"] == 500
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self, client):
+        """Test no more than CHAT_BATCH_CONCURRENCY items run at once."""
+        running = peak = 0
+        
+        async def respond(request, persist=True):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return ChatResponse(response="ok", conversation_id="c1")
+        
+        batch = {"requests": [{"message": f"item {index}"} for index in range(6)]}
+        with patch.object(chat_service, "get_therapeutic_response", side_effect=respond), \
+                patch('api.routes.settings.CHAT_BATCH_CONCURRENCY', 2):
+            response = await client.post("/api/v1/chat/batch", json=batch)
+        
+        assert sorted(result["index"] for result in read_lines(response)) == list(range(6))
+        assert peak == 2
+    
+    @pytest.mark.asyncio
+    async def test_rejects_oversized_batch(self, client):
+        """Test batches above CHAT_BATCH_MAX_ITEMS are rejected up front."""
+        batch = {"requests": [{"message": "hi"}] * 3}
+        with patch('api.routes.settings.CHAT_BATCH_MAX_ITEMS', 2):
+            response = await client.post("/api/v1/chat/batch", json=batch)
+        
+        assert response.status_code == 422
+    
+    def test_rate_limit_covers_every_item(self):
+        """Test each request of a batch is charged with its own conversation."""
+        single = {"message": "x" * 400}
+        batch = {"requests": [single, {**single, "conversation_id": "c1"}]}
+        
+        assert request_items(batch, batch=True) == [(None, estimate_request_tokens(single)), ("c1", estimate_request_tokens(single))]
+    
+    @pytest.mark.asyncio
+    async def test_one_off_items_are_not_stored(self, client):
+        """Test items without a conversation_id do not create sessions."""
+        calls = []
+        
+        async def respond(request, persist=True):
+            calls.append(persist)
+            return ChatResponse(response="ok", conversation_id="c1")
+        
+        batch = {"requests": [{"message": "hi"}, {"message": "again", "conversation_id": "c1"}]}
+        with patch.object(chat_service, "get_therapeutic_response", side_effect=respond):
+            await client.post("/api/v1/chat/batch", json=batch)
+        
+        assert sorted(calls) == [False, True]
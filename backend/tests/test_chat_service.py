@@ -2,9 +2,11 @@
 Unit tests for the chat service functionality.
 """
 
+import json
+import httpx
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
-from api.chat_service import ChatService
+from api.chat_service import ChatService, ConversationNotFoundError
 from api.models import ChatRequest, ChatMessage, ChatResponse
 from api.config import settings
 
@@ -29,32 +31,16 @@ class TestChatService:
             user_mood="stressed"
         )
     
-    def test_build_system_message_without_mood(self, chat_service):
-        """Test building system message without mood context."""
-        message = chat_service._build_system_message()
-        
-        assert settings.THERAPIST_SYSTEM_PROMPT in message
-        assert "Current user mood:" not in message
-    
-    def test_build_system_message_with_mood(self, chat_service):
-        """Test building system message with mood context."""
-        mood = "anxious"
-        message = chat_service._build_system_message(mood)
-        
-        assert settings.THERAPIST_SYSTEM_PROMPT in message
-        assert f"Current user mood: {mood}" in message
-        assert "appropriate therapeutic support" in message
-    
     def test_prepare_messages(self, chat_service, sample_chat_request):
         """Test preparing messages for OpenAI API format."""
         messages = chat_service._prepare_messages(sample_chat_request)
         
-        # Should have system message + conversation history + current message
-        assert len(messages) == 4
+        # Should have system message + conversation history + mood note + current message
+        assert len(messages) == 5
         
-        # First message should be system message
+        # First message should be the static system prompt, without the mood
         assert messages[0]["role"] == "system"
-        assert "stressed" in messages[0]["content"]
+        assert messages[0]["content"] == settings.THERAPIST_SYSTEM_PROMPT
         
         # History should be preserved
         assert messages[1]["role"] == "user"
@@ -62,12 +48,40 @@ class TestChatService:
         assert messages[2]["role"] == "assistant"
         assert messages[2]["content"] == "Hi there! How are you feeling today?"
         
+        # The mood note comes right before the current message
+        assert messages[3]["role"] == "system"
+        assert "Current user mood: stressed" in messages[3]["content"]
+        
         # Current message should be last
-        assert messages[3]["role"] == "user"
-        assert messages[3]["content"] == sample_chat_request.message
+        assert messages[4]["role"] == "user"
+        assert messages[4]["content"] == sample_chat_request.message
+    
+    def test_prepare_messages_shares_prefix_across_moods(self, chat_service, sample_chat_request):
+        """Test requests differing only in mood send the same prompt prefix."""
+        stressed = chat_service._prepare_messages(sample_chat_request)
+        calm = chat_service._prepare_messages(sample_chat_request.model_copy(update={"user_mood": None}))
+        
+        assert stressed[:3] == calm[:3]
+        assert len(calm) == 4
+    
+    def test_prepare_messages_respects_token_budget(self, chat_service):
+        """Test long histories are trimmed to the prompt budget."""
+        history = [
+            ChatMessage(role="user" if i % 2 == 0 else "assistant", content="word " * 200)
+            for i in range(200)
+        ]
+        request = ChatRequest(message="Still there?", conversation_history=history)
+        
+        messages = chat_service._prepare_messages(request)
+        
+        assert messages[0]["role"] == "system"
+        assert messages[-1]["content"] == "Still there?"
+        assert len(messages) < len(history) + 2
+        counter = chat_service.context_builder.counter
+        assert sum(counter.count_message(m) for m in messages) <= settings.prompt_token_budget
     
     @pytest.mark.asyncio
-    @patch('api.chat_service.OpenAI')
+    @patch('api.chat_service.AsyncOpenAI')
     async def test_get_therapeutic_response_success(self, mock_openai, chat_service, sample_chat_request):
         """Test successful therapeutic response generation."""
         # Mock OpenAI response
@@ -76,7 +90,7 @@ class TestChatService:
         mock_response.choices[0].message.content = "I understand work stress can be overwhelming. Let's explore what's causing this feeling."
         
         mock_client = Mock()
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
         mock_openai.return_value = mock_client
         
         # Initialize service with mocked client
@@ -90,12 +104,27 @@ class TestChatService:
         assert mock_client.chat.completions.create.called
     
     @pytest.mark.asyncio
-    @patch('api.chat_service.OpenAI')
+    async def test_response_without_persist_is_not_stored(self, chat_service):
+        """Test one-off requests leave the session store untouched."""
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "I'm here with you."
+        mock_client = Mock()
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        chat_service.client = mock_client
+        
+        response = await chat_service.get_therapeutic_response(ChatRequest(message="Hello"), persist=False)
+        
+        assert response.response == "I'm here with you."
+        assert chat_service.session_store.get(response.conversation_id) is None
+    
+    @pytest.mark.asyncio
+    @patch('api.chat_service.AsyncOpenAI')
     async def test_get_therapeutic_response_failure(self, mock_openai, chat_service, sample_chat_request):
         """Test therapeutic response when OpenAI fails."""
         # Mock OpenAI to raise an exception
         mock_client = Mock()
-        mock_client.chat.completions.create.side_effect = Exception("API Error")
+        mock_client.chat.completions.create = AsyncMock(side_effect=Exception("API Error"))
         mock_openai.return_value = mock_client
         
         chat_service.client = mock_client
@@ -108,6 +137,118 @@ class TestChatService:
         assert "stressed" in response.response  # Should include mood-specific response
         assert response.conversation_id is not None
     
+    @pytest.mark.asyncio
+    async def test_stream_therapeutic_response_success(self, chat_service, sample_chat_request):
+        """Test streaming forwards deltas and records the assembled reply."""
+        class FakeStream:
+            """Upstream chunk stream with an HTTP response to close."""
+            
+            response = Mock(aclose=AsyncMock())
+            
+            async def __aiter__(self):
+                for text in ["Work ", "stress ", None, "is hard."]:
+                    chunk = Mock()
+                    chunk.choices = [Mock()]
+                    chunk.choices[0].delta.content = text
+                    yield chunk
+        
+        mock_client = Mock()
+        mock_client.chat.completions.create = AsyncMock(return_value=FakeStream())
+        chat_service.client = mock_client
+        
+        events = [event async for event in chat_service.stream_therapeutic_response(sample_chat_request)]
+        
+        deltas = [payload for event, payload in events if event == "delta"]
+        assert deltas == ["Work ", "stress ", "is hard."]
+        assert events[-1][0] == "done"
+        
+        done = json.loads(events[-1][1])
+        assert done["usage"]["completion_tokens"] == 3
+        assert chat_service.session_store.get(done["conversation_id"])["last_response"] == "Work stress is hard."
+        assert mock_client.chat.completions.create.call_args.kwargs["stream"] is True
+    
+    @pytest.mark.asyncio
+    async def test_stream_therapeutic_response_failure(self, chat_service, sample_chat_request):
+        """Test streaming falls back when OpenAI fails before the first token."""
+        mock_client = Mock()
+        mock_client.chat.completions.create = AsyncMock(side_effect=Exception("API Error"))
+        chat_service.client = mock_client
+        
+        events = [event async for event in chat_service.stream_therapeutic_response(sample_chat_request)]
+        
+        assert len(events) == 2
+        assert events[0][0] == "delta"
+        assert "technical difficulties" in events[0][1]
+        assert events[1][0] == "done"
+    
+    @pytest.mark.asyncio
+    @patch('api.chat_service.settings.OPENAI_API_KEY', 'test-key')
+    async def test_start_and_close_pooled_client(self, chat_service):
+        """Test the async client is created on start and released on close."""
+        await chat_service.start()
+        
+        assert chat_service.client is not None
+        assert isinstance(chat_service.http_client, httpx.AsyncClient)
+        assert chat_service.client._client is chat_service.http_client
+        
+        http_client = chat_service.http_client
+        await chat_service.close()
+        
+        assert http_client.is_closed
+        assert chat_service.client is None
+    
+    @pytest.mark.asyncio
+    @patch('api.chat_service.settings.OPENAI_API_KEY', None)
+    async def test_start_without_api_key(self, chat_service):
+        """Test start is a no-op when no API key is configured."""
+        await chat_service.start()
+        
+        assert chat_service.client is None
+        assert chat_service.http_client is None
+    
+    @pytest.mark.asyncio
+    async def test_continue_conversation_by_id(self, chat_service):
+        """Test a follow-up turn rebuilds history from the session store."""
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "First reply"
+        mock_client = Mock()
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        chat_service.client = mock_client
+        
+        first = await chat_service.get_therapeutic_response(ChatRequest(message="Hello"))
+        
+        mock_response.choices[0].message.content = "Second reply"
+        second = await chat_service.get_therapeutic_response(
+            ChatRequest(message="Tell me more", conversation_id=first.conversation_id)
+        )
+        
+        assert second.conversation_id == first.conversation_id
+        sent = mock_client.chat.completions.create.call_args.kwargs["messages"]
+        assert [(m["role"], m["content"]) for m in sent[1:]] == [
+            ("user", "Hello"),
+            ("assistant", "First reply"),
+            ("user", "Tell me more")
+        ]
+        assert len(chat_service.get_conversation_history(first.conversation_id)) == 4
+    
+    @pytest.mark.asyncio
+    async def test_continue_unknown_conversation(self, chat_service):
+        """Test continuing an unknown conversation raises instead of starting over."""
+        with pytest.raises(ConversationNotFoundError):
+            await chat_service.get_therapeutic_response(
+                ChatRequest(message="Hello again", conversation_id="missing")
+            )
+    
+    def test_resolve_conversation_stateless_keeps_id(self, chat_service, sample_chat_request):
+        """Test full-history requests still work and keep a supplied ID."""
+        sample_chat_request.conversation_id = "client-id"
+        
+        conversation_id, history = chat_service.resolve_conversation(sample_chat_request)
+        
+        assert conversation_id == "client-id"
+        assert [m["content"] for m in history] == ["Hello", "Hi there! How are you feeling today?"]
+    
     def test_get_fallback_response_without_mood(self, chat_service):
         """Test fallback response without mood context."""
         response = chat_service._get_fallback_response()
@@ -138,10 +279,10 @@ class TestChatService:
         conversation_id = "test-id"
         test_messages = [{"role": "user", "content": "test"}]
         
-        chat_service.conversation_sessions[conversation_id] = {
+        chat_service.session_store.put(conversation_id, {
             "messages": test_messages,
             "last_response": "test response"
-        }
+        })
         
         history = chat_service.get_conversation_history(conversation_id)
         assert history == test_messages
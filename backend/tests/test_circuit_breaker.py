@@ -0,0 +1,215 @@
+"""
+Unit tests for the upstream circuit breaker.
+"""
+
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, Mock, AsyncMock
+from main import app
+from api.chat_service import ChatService, chat_service as global_chat_service
+from api.circuit_breaker import CircuitBreaker, CircuitOpenError
+from api.models import ChatRequest
+
+
+@pytest.fixture
+def breaker(clock):
+    """Create a breaker that trips after two failures out of four calls."""
+    return CircuitBreaker(
+        window_seconds=60,
+        min_calls=4,
+        failure_rate=0.5,
+        slow_call_seconds=5,
+        slow_call_rate=0.75,
+        open_seconds=30,
+        half_open_calls=2,
+        clock=clock
+    )
+
+
+async def succeed(breaker, clock=None, duration=0.0):
+    async with breaker.guard():
+        if clock is not None:
+            clock.now += duration
+
+
+async def fail(breaker):
+    with pytest.raises(RuntimeError):
+        async with breaker.guard():
+            raise RuntimeError("upstream down")
+
+
+class TestCircuitBreaker:
+    """Test cases for CircuitBreaker."""
+    
+    @pytest.mark.asyncio
+    async def test_opens_on_failure_rate(self, breaker):
+        """Test the circuit opens once the failure rate reaches the threshold."""
+        await succeed(breaker)
+        await succeed(breaker)
+        await fail(breaker)
+        assert breaker.state == "closed"
+        
+        await fail(breaker)
+        
+        assert breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            breaker.check()
+    
+    @pytest.mark.asyncio
+    async def test_needs_minimum_calls(self, breaker):
+        """Test a few early failures do not trip the breaker."""
+        await fail(breaker)
+        await fail(breaker)
+        await fail(breaker)
+        
+        assert breaker.state == "closed"
+    
+    @pytest.mark.asyncio
+    async def test_opens_on_slow_calls(self, breaker, clock):
+        """Test a mostly slow upstream trips the breaker without errors."""
+        for _ in range(3):
+            await succeed(breaker, clock, duration=6)
+        await succeed(breaker)
+        
+        assert breaker.state == "open"
+    
+    @pytest.mark.asyncio
+    async def test_old_calls_leave_the_window(self, breaker, clock):
+        """Test failures older than the window no longer count."""
+        await fail(breaker)
+        await fail(breaker)
+        clock.now += 61
+        
+        await succeed(breaker)
+        await succeed(breaker)
+        await succeed(breaker)
+        await fail(breaker)
+        
+        assert breaker.state == "closed"
+    
+    @pytest.mark.asyncio
+    async def test_half_open_probe_closes_circuit(self, breaker, clock):
+        """Test successful trial calls close the circuit again."""
+        for _ in range(4):
+            await fail(breaker)
+        clock.now += 30
+        
+        assert breaker.state == "half_open"
+        await succeed(breaker)
+        await succeed(breaker)
+        
+        assert breaker.state == "closed"
+    
+    @pytest.mark.asyncio
+    async def test_half_open_limits_trial_calls(self, breaker, clock):
+        """Test only the configured number of trial calls is let through."""
+        for _ in range(4):
+            await fail(breaker)
+        clock.now += 30
+        
+        async with breaker.guard():
+            async with breaker.guard():
+                with pytest.raises(CircuitOpenError):
+                    async with breaker.guard():
+                        pass
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_trial_frees_its_slot(self, breaker, clock):
+        """Test a cancelled trial call lets another trial through."""
+        for _ in range(4):
+            await fail(breaker)
+        clock.now += 30
+        
+        with pytest.raises(asyncio.CancelledError):
+            async with breaker.guard():
+                raise asyncio.CancelledError()
+        
+        async with breaker.guard():
+            async with breaker.guard():
+                with pytest.raises(CircuitOpenError):
+                    async with breaker.guard():
+                        pass
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_closed_call_does_not_add_trials(self, breaker, clock):
+        """Test cancelling a call admitted while closed leaves half-open trials alone."""
+        call = breaker.guard()
+        await call.__aenter__()
+        for _ in range(4):
+            await fail(breaker)
+        clock.now += 30
+        assert breaker.state == "half_open"
+        
+        # The cancellation propagates: the context manager does not suppress it
+        assert not await call.__aexit__(asyncio.CancelledError, asyncio.CancelledError(), None)
+        
+        async with breaker.guard():
+            async with breaker.guard():
+                with pytest.raises(CircuitOpenError):
+                    async with breaker.guard():
+                        pass
+    
+    @pytest.mark.asyncio
+    async def test_half_open_failure_reopens(self, breaker, clock):
+        """Test a failed trial call opens the circuit for another wait."""
+        for _ in range(4):
+            await fail(breaker)
+        clock.now += 30
+        
+        await fail(breaker)
+        
+        assert breaker.state == "open"
+        clock.now += 29
+        assert breaker.state == "open"
+    
+    @pytest.mark.asyncio
+    async def test_ignored_errors_do_not_count(self, clock):
+        """Test errors rejected by is_failure are recorded as successes."""
+        breaker = CircuitBreaker(min_calls=2, failure_rate=0.5, is_failure=lambda e: False, clock=clock)
+        
+        await fail(breaker)
+        await fail(breaker)
+        
+        assert breaker.state == "closed"
+
+
+class TestChatServiceCircuitBreaker:
+    """Test cases for the circuit breaker in ChatService."""
+    
+    @pytest.mark.asyncio
+    async def test_open_circuit_serves_fallback_without_upstream_call(self):
+        """Test an open circuit returns the mood fallback immediately."""
+        chat_service = ChatService()
+        chat_service.client = Mock()
+        chat_service.client.chat.completions.create = AsyncMock(side_effect=RuntimeError("down"))
+        chat_service.circuit_breaker = CircuitBreaker(min_calls=2, failure_rate=0.5)
+        
+        for _ in range(2):
+            await chat_service.get_therapeutic_response(ChatRequest(message="Hello"))
+        assert chat_service.circuit_breaker.state == "open"
+        
+        response = await chat_service.get_therapeutic_response(
+            ChatRequest(message="I can't cope", user_mood="overwhelmed")
+        )
+        
+        assert response.source == "fallback"
+        assert "smaller, manageable steps" in response.response
+        assert chat_service.client.chat.completions.create.call_count == 2
+
+
+class TestHealthCircuitState:
+    """Test cases for breaker state in the health endpoint."""
+    
+    @patch('api.routes.settings.OPENAI_API_KEY', 'test-key')
+    def test_health_reports_open_circuit(self):
+        """Test health is degraded while the upstream circuit is open."""
+        breaker = CircuitBreaker()
+        breaker._open(breaker._clock())
+        
+        with patch.object(global_chat_service, "circuit_breaker", breaker):
+            response = TestClient(app).get("/api/v1/health")
+        
+        assert response.status_code == 200
+        assert response.json()["status"] == "degraded"
+        assert response.json()["upstream_circuit"] == "open"
@@ -0,0 +1,119 @@
+"""
+Unit tests for the token-budgeted context window builder.
+"""
+
+import pytest
+from api.context_window import (
+    MESSAGE_TOKEN_OVERHEAD,
+    REPLY_PRIMING_TOKENS,
+    ContextWindowBuilder,
+    TokenCounter
+)
+
+
+def make_history(turns: int, content: str = "x" * 40) -> list:
+    """Build alternating user/assistant turns."""
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"{content} {i}"})
+        history.append({"role": "assistant", "content": f"{content} {i}"})
+    return history
+
+
+class TestTokenCounter:
+    """Test cases for TokenCounter."""
+    
+    def test_count_is_cached(self):
+        """Test repeated texts are served from the cache."""
+        counter = TokenCounter("gpt-4")
+        
+        first = counter.count("I feel anxious about tomorrow")
+        second = counter.count("I feel anxious about tomorrow")
+        
+        assert first == second > 0
+        assert counter.count.cache_info().hits == 1
+    
+    def test_count_message_includes_overhead(self):
+        """Test message counts include the chat format overhead."""
+        counter = TokenCounter("gpt-4")
+        message = {"role": "user", "content": "hello"}
+        
+        assert counter.count_message(message) == counter.count("hello") + MESSAGE_TOKEN_OVERHEAD
+
+
+class TestContextWindowBuilder:
+    """Test cases for ContextWindowBuilder."""
+    
+    @pytest.fixture
+    def counter(self):
+        """Create a token counter."""
+        return TokenCounter("gpt-4")
+    
+    @pytest.fixture
+    def system_message(self):
+        """Create a system message."""
+        return {"role": "system", "content": "You are EverKind."}
+    
+    @pytest.fixture
+    def user_message(self):
+        """Create the current user message."""
+        return {"role": "user", "content": "What should I do?"}
+    
+    def test_keeps_everything_within_budget(self, counter, system_message, user_message):
+        """Test short conversations are passed through unchanged."""
+        history = make_history(2)
+        builder = ContextWindowBuilder(counter, prompt_budget=10000)
+        
+        window = builder.build(system_message, history, user_message)
+        
+        assert window.messages == [system_message, *history, user_message]
+        assert window.dropped == 0
+        expected = REPLY_PRIMING_TOKENS + sum(
+            counter.count_message(m) for m in window.messages
+        )
+        assert window.prompt_tokens == expected
+    
+    def test_drops_oldest_turns_over_budget(self, counter, system_message, user_message):
+        """Test the oldest turns are dropped and the newest kept."""
+        history = make_history(50)
+        builder = ContextWindowBuilder(counter, prompt_budget=200)
+        
+        window = builder.build(system_message, history, user_message)
+        
+        assert window.messages[0] is system_message
+        assert window.messages[-1] is user_message
+        assert window.messages[-2] is history[-1]
+        assert window.dropped > 0
+        assert window.prompt_tokens <= 200
+        assert window.messages[1:-1] == history[window.dropped:]
+    
+    def test_note_kept_before_user_message(self, counter, system_message, user_message):
+        """Test the note is always kept, after the history and before the user message."""
+        history = make_history(50)
+        note = {"role": "system", "content": "Current user mood: anxious."}
+        builder = ContextWindowBuilder(counter, prompt_budget=200)
+        
+        window = builder.build(system_message, history, user_message, note_message=note)
+        
+        assert window.messages[-2:] == [note, user_message]
+        assert window.messages[-3] is history[-1]
+        assert window.prompt_tokens <= 200
+    
+    def test_window_does_not_start_with_assistant(self, counter, system_message, user_message):
+        """Test an assistant reply is not kept without its question."""
+        history = make_history(20)
+        builder = ContextWindowBuilder(counter, prompt_budget=150)
+        
+        window = builder.build(system_message, history, user_message)
+        
+        assert window.dropped > 0
+        assert window.messages[1]["role"] == "user"
+    
+    def test_system_and_user_always_kept(self, counter, system_message, user_message):
+        """Test the system prompt and current message survive a tiny budget."""
+        builder = ContextWindowBuilder(counter, prompt_budget=1)
+        
+        window = builder.build(system_message, make_history(3), user_message)
+        
+        assert window.messages == [system_message, user_message]
+        assert window.dropped == 6
@@ -0,0 +1,119 @@
+"""
+Tests for the fake OpenAI-compatible server used in performance tests.
+"""
+
+import httpx
+import pytest
+from openai import AsyncOpenAI, APIStatusError, RateLimitError
+from api.chat_service import ChatService
+from api.models import ChatRequest
+from perf.fake_openai_server import FakeServerConfig, create_app
+
+MESSAGES = [{"role": "user", "content": "I feel anxious about work"}]
+
+
+def openai_client(app) -> AsyncOpenAI:
+    """Create an OpenAI SDK client talking to the fake server in-process."""
+    return AsyncOpenAI(
+        api_key="fake",
+        base_url="http://fake-openai/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    )
+
+
+async def fetch_stats(app) -> dict:
+    """Read /stats from the fake server in-process."""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://fake-openai") as client:
+        response = await client.get("/stats")
+    return response.json()
+
+
+def instant(**overrides) -> FakeServerConfig:
+    """Create a config without artificial latency."""
+    return FakeServerConfig(**dict(dict(ttft_median=0, ttft_p99=0, tokens_per_second=0), **overrides))
+
+
+class TestFakeOpenAIServer:
+    """Test cases for the fake OpenAI server."""
+    
+    @pytest.mark.asyncio
+    async def test_chat_completion(self):
+        """Test the SDK parses a non-streaming completion and its usage."""
+        app = create_app(instant())
+        client = openai_client(app)
+        
+        response = await client.chat.completions.create(model="gpt-4", messages=MESSAGES, max_tokens=50)
+        
+        assert response.choices[0].message.content
+        assert response.choices[0].finish_reason == "stop"
+        assert response.usage.completion_tokens > 0
+        assert app.state.stats.completed == 1
+    
+    @pytest.mark.asyncio
+    async def test_streaming_completion(self):
+        """Test the SDK parses the SSE stream into the same reply."""
+        app = create_app(instant())
+        client = openai_client(app)
+        
+        expected = await client.chat.completions.create(model="gpt-4", messages=MESSAGES)
+        stream = await client.chat.completions.create(model="gpt-4", messages=MESSAGES, stream=True)
+        content = "".join([chunk.choices[0].delta.content or "" async for chunk in stream])
+        
+        assert content == expected.choices[0].message.content
+        assert app.state.stats.streams == 1
+        assert app.state.stats.in_flight == 0
+    
+    @pytest.mark.asyncio
+    async def test_rate_limit(self):
+        """Test 429s carry an OpenAI error body and Retry-After."""
+        app = create_app(instant(rate_limit_rate=1.0, rate_limit_retry_after=2))
+        client = openai_client(app)
+        
+        with pytest.raises(RateLimitError) as exc_info:
+            await client.chat.completions.create(model="gpt-4", messages=MESSAGES)
+        
+        assert exc_info.value.response.headers["Retry-After"] == "2"
+        assert app.state.stats.rate_limited == 1
+    
+    @pytest.mark.asyncio
+    async def test_error_bursts(self, clock):
+        """Test requests fail with 5xx during a burst and succeed between bursts."""
+        app = create_app(instant(error_burst_every=10, error_burst_seconds=2), clock=clock)
+        client = openai_client(app)
+        
+        with pytest.raises(APIStatusError) as exc_info:
+            await client.chat.completions.create(model="gpt-4", messages=MESSAGES)
+        assert exc_info.value.status_code == 503
+        
+        clock.now += 5
+        await client.chat.completions.create(model="gpt-4", messages=MESSAGES)
+        
+        assert app.state.stats.errors == 1
+        assert app.state.stats.completed == 1
+    
+    @pytest.mark.asyncio
+    async def test_chat_service_end_to_end(self):
+        """Test ChatService serves replies and streams over HTTP from the fake server."""
+        app = create_app(instant())
+        chat_service = ChatService()
+        chat_service.client = openai_client(app)
+        
+        response = await chat_service.get_therapeutic_response(ChatRequest(message="Hello"))
+        events = [event async for event in chat_service.stream_therapeutic_response(ChatRequest(message="Hi"))]
+        
+        assert response.source == "upstream"
+        assert response.response
+        assert events[-1][0] == "done"
+        assert len(events) > 2
+        assert app.state.stats.completed == 2
+    
+    @pytest.mark.asyncio
+    async def test_stats_endpoint(self):
+        """Test /stats reports the counters."""
+        app = create_app(instant())
+        
+        stats = await fetch_stats(app)
+        
+        assert stats["requests"] == 0
+        assert stats["max_in_flight"] == 0
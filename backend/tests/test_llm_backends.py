@@ -0,0 +1,197 @@
+"""
+Unit tests for the pluggable LLM backends.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import patch, Mock, AsyncMock
+from api.chat_service import ChatService, is_retryable
+from api.llm_backends import BackendUnavailableError, OfflineBackend, OpenAIBackend
+from api.models import ChatRequest
+
+MESSAGES = [
+    {"role": "system", "content": "You are a CBT therapist."},
+    {"role": "user", "content": "I feel anxious about work"}
+]
+
+
+class FakeSleep:
+    """Records requested sleeps instead of waiting."""
+    
+    def __init__(self):
+        self.calls = []
+    
+    async def __call__(self, seconds: float) -> None:
+        self.calls.append(seconds)
+
+
+@pytest.fixture
+def sleep():
+    """Create a sleep function that returns immediately."""
+    return FakeSleep()
+
+
+async def complete(backend, messages=MESSAGES, timeout=30.0, **params):
+    return await backend.complete(
+        model=params.pop("model", "gpt-4"),
+        messages=messages,
+        max_tokens=params.pop("max_tokens", 500),
+        temperature=0.7,
+        timeout=timeout,
+        **params
+    )
+
+
+class TestOfflineBackend:
+    """Test cases for OfflineBackend."""
+    
+    @pytest.mark.asyncio
+    async def test_replies_are_deterministic(self, sleep):
+        """Test the same prompt always gets the same reply, independent of the seed."""
+        first = await complete(OfflineBackend(seed=1, sleep=sleep))
+        second = await complete(OfflineBackend(seed=2, sleep=sleep))
+        other = await complete(OfflineBackend(sleep=sleep), messages=[{"role": "user", "content": "Hi"}])
+        
+        assert first.content
+        assert first.content == second.content
+        assert first.content != other.content
+    
+    @pytest.mark.asyncio
+    async def test_reply_respects_max_tokens(self, sleep):
+        """Test replies are cut at max_tokens."""
+        completion = await complete(OfflineBackend(sleep=sleep), max_tokens=3)
+        
+        assert completion.completion_tokens == 3
+        assert len(completion.content.split()) == 3
+    
+    @pytest.mark.asyncio
+    async def test_latency_distribution(self, sleep):
+        """Test first-token latency has roughly the configured median and p99."""
+        backend = OfflineBackend(latency_median=1.0, latency_p99=4.0, tokens_per_second=0, sleep=sleep)
+        for _ in range(2000):
+            await complete(backend)
+        
+        delays = sorted(sleep.calls)
+        assert delays[1000] == pytest.approx(1.0, rel=0.1)
+        assert delays[1980] == pytest.approx(4.0, rel=0.25)
+    
+    @pytest.mark.asyncio
+    async def test_slow_reply_times_out(self, sleep):
+        """Test a reply that would outlast the timeout raises asyncio.TimeoutError."""
+        backend = OfflineBackend(latency_median=5.0, latency_p99=5.0, sleep=sleep)
+        
+        with pytest.raises(asyncio.TimeoutError):
+            await complete(backend, timeout=1.0)
+        assert sleep.calls == [1.0]
+    
+    @pytest.mark.asyncio
+    async def test_error_injection(self, sleep):
+        """Test the error rate injects retryable errors reproducibly per seed."""
+        async def outcomes(seed):
+            backend = OfflineBackend(error_rate=0.3, seed=seed, sleep=sleep)
+            results = []
+            for _ in range(200):
+                try:
+                    await complete(backend)
+                    results.append(True)
+                except BackendUnavailableError as e:
+                    assert is_retryable(e)
+                    results.append(False)
+            return results
+        
+        first = await outcomes(7)
+        
+        assert first == await outcomes(7)
+        assert 30 < first.count(False) < 90
+    
+    @pytest.mark.asyncio
+    async def test_stream_yields_reply_tokens(self, sleep):
+        """Test streaming yields the same reply token by token at the token rate."""
+        backend = OfflineBackend(latency_median=0.5, latency_p99=0.5, tokens_per_second=20, sleep=sleep)
+        expected = await complete(backend)
+        sleep.calls.clear()
+        
+        stream = await backend.stream(model="gpt-4", messages=MESSAGES, max_tokens=500, temperature=0.7, timeout=30)
+        deltas = [delta async for delta in stream]
+        
+        assert "".join(deltas) == expected.content
+        assert sleep.calls == [pytest.approx(0.5)] + [0.05] * (len(deltas) - 1)
+
+
+class TestOpenAIBackend:
+    """Test cases for OpenAIBackend."""
+    
+    @pytest.mark.asyncio
+    async def test_complete_passes_options_through(self):
+        """Test the call maps onto chat.completions.create and its result."""
+        client = Mock()
+        response = Mock()
+        response.choices = [Mock()]
+        response.choices[0].message.content = "I hear you."
+        response.usage.prompt_tokens = 12
+        response.usage.completion_tokens = 3
+        client.chat.completions.create = AsyncMock(return_value=response)
+        
+        completion = await complete(OpenAIBackend(client), presence_penalty=0.1)
+        
+        assert completion == ("I hear you.", 12, 3)
+        kwargs = client.chat.completions.create.call_args.kwargs
+        assert kwargs["presence_penalty"] == 0.1
+        assert kwargs["timeout"] == 30.0
+    
+    @pytest.mark.asyncio
+    async def test_stream_closed_early_releases_response(self):
+        """Test closing a stream before the end closes the upstream response."""
+        class FakeStream:
+            """Upstream chunk stream with an HTTP response to close."""
+            
+            response = Mock(aclose=AsyncMock())
+            
+            async def __aiter__(self):
+                for text in ("I ", "hear ", "you."):
+                    chunk = Mock()
+                    chunk.choices = [Mock()]
+                    chunk.choices[0].delta.content = text
+                    yield chunk
+        
+        upstream = FakeStream()
+        client = Mock()
+        client.chat.completions.create = AsyncMock(return_value=upstream)
+        
+        stream = await OpenAIBackend(client).stream(
+            model="gpt-4", messages=MESSAGES, max_tokens=500, temperature=0.7, timeout=30
+        )
+        assert await stream.__anext__() == "I "
+        await stream.aclose()
+        
+        upstream.response.aclose.assert_awaited_once()
+
+
+class TestChatServiceOfflineBackend:
+    """Test cases for ChatService on the offline backend."""
+    
+    @pytest.mark.asyncio
+    async def test_offline_backend_serves_chat(self):
+        """Test LLM_BACKEND=offline serves replies without an API key."""
+        chat_service = ChatService()
+        with patch('api.chat_service.settings.LLM_BACKEND', 'offline'), \
+                patch('api.chat_service.settings.OPENAI_API_KEY', None), \
+                patch('api.chat_service.settings.OFFLINE_LATENCY_MEDIAN_SECONDS', 0), \
+                patch('api.chat_service.settings.OFFLINE_TOKENS_PER_SECOND', 0):
+            await chat_service.start()
+        
+        try:
+            assert isinstance(chat_service.backend, OfflineBackend)
+            assert chat_service.client is None
+            
+            request = ChatRequest(message="I feel anxious about work")
+            response = await chat_service.get_therapeutic_response(request)
+            events = [event async for event in chat_service.stream_therapeutic_response(request)]
+            
+            assert response.source == "upstream"
+            assert response.response
+            assert "".join(data for event, data in events if event == "delta") == response.response
+        finally:
+            await chat_service.close()
+        
+        assert chat_service.backend is None
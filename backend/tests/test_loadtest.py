@@ -0,0 +1,78 @@
+"""
+Tests for the load-testing harness.
+"""
+
+import httpx
+import pytest
+from unittest.mock import patch
+from main import app
+from api.chat_service import chat_service
+from api.llm_backends import OfflineBackend
+from perf.loadtest import CountingBackend, LoadGenerator, Workload, percentile
+
+
+@pytest.fixture
+def client():
+    """Create an in-process client for the API."""
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest")
+
+
+@pytest.fixture
+def backend():
+    """Serve replies from an instant, counted offline backend."""
+    counting = CountingBackend(OfflineBackend(latency_median=0, tokens_per_second=0))
+    with patch.object(chat_service, "backend", counting), \
+            patch('api.routes.settings.OPENAI_API_KEY', 'test-key'):
+        yield counting
+
+
+class TestLoadGenerator:
+    """Test cases for LoadGenerator."""
+    
+    @pytest.mark.asyncio
+    async def test_closed_loop_report(self, client, backend):
+        """Test a closed-loop run reports every endpoint and the upstream calls."""
+        workload = Workload(
+            concurrency=2,
+            duration=30,
+            max_requests=6,
+            profile="short",
+            health_ratio=1.0,
+            history_ratio=1.0
+        )
+        
+        report = await LoadGenerator(client, workload, backend.stats).run()
+        
+        chat = report["endpoints"]["chat"]
+        assert 6 <= chat["requests"] <= 7
+        assert chat["status"] == {"200": chat["requests"]}
+        assert chat["latency_seconds"]["p50"] <= chat["latency_seconds"]["p99"]
+        assert report["endpoints"]["health"]["requests"] == report["conversations"]
+        assert report["endpoints"]["conversation"]["requests"] == report["conversations"]
+        assert report["error_rate"] == 0.0
+        assert report["fallback_rate"] == 0.0
+        assert report["sources"] == {"upstream": chat["requests"]}
+        assert report["upstream"] == {"calls": chat["requests"], "errors": 0, "streams": 0}
+    
+    @pytest.mark.asyncio
+    async def test_open_loop_stops_at_request_budget(self, client, backend):
+        """Test an open-loop run stops starting conversations at max_requests."""
+        workload = Workload(concurrency=4, rate=200, duration=30, max_requests=3, profile="short", health_ratio=0)
+        
+        report = await LoadGenerator(client, workload).run()
+        
+        assert 3 <= report["endpoints"]["chat"]["requests"] <= 4
+        assert report["upstream"] is None
+        assert report["workload"]["rate"] == 200
+
+
+class TestPercentile:
+    """Test cases for percentile."""
+    
+    def test_nearest_rank(self):
+        """Test nearest-rank percentiles of sorted samples."""
+        samples = [i / 100 for i in range(1, 101)]
+        
+        assert percentile(samples, 0.5) == 0.5
+        assert percentile(samples, 0.99) == 0.99
+        assert percentile([], 0.5) is None
@@ -0,0 +1,117 @@
+"""
+Unit tests for queue-backed structured logging.
+"""
+
+import json
+import logging
+import queue
+import sys
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from main import app
+from api.logging_config import (
+    JSONFormatter,
+    NonBlockingQueueHandler,
+    SamplingFilter,
+    content_fields,
+    dropped_log_records
+)
+
+
+def make_record(level: int = logging.INFO, msg: str = "request completed", **extra) -> logging.LogRecord:
+    """Create a log record carrying extra fields."""
+    record = logging.LogRecord("api.test", level, __file__, 1, msg, None, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+class TestJSONFormatter:
+    """Test cases for JSONFormatter."""
+    
+    def test_extra_fields_become_keys(self):
+        """Test a record renders as one JSON object with its extra fields."""
+        line = JSONFormatter().format(make_record(status=200, duration_ms=1.5))
+        
+        payload = json.loads(line)
+        assert payload["level"] == "INFO"
+        assert payload["logger"] == "api.test"
+        assert payload["message"] == "request completed"
+        assert payload["status"] == 200
+        assert payload["duration_ms"] == 1.5
+        assert "args" not in payload
+
+
+class TestSamplingFilter:
+    """Test cases for SamplingFilter."""
+    
+    def test_samples_routine_records_only(self):
+        """Test routine records are sampled while warnings are always kept."""
+        sampler = SamplingFilter(rate=0.0)
+        
+        assert not sampler.filter(make_record(logging.INFO))
+        assert sampler.filter(make_record(logging.WARNING))
+        assert SamplingFilter(rate=1.0).filter(make_record(logging.INFO))
+
+
+class TestNonBlockingQueueHandler:
+    """Test cases for NonBlockingQueueHandler."""
+    
+    def test_drops_records_when_full(self):
+        """Test a full queue drops records instead of blocking the caller."""
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+        before = dropped_log_records.value()
+        
+        handler.handle(make_record())
+        handler.handle(make_record())
+        
+        assert handler.queue.qsize() == 1
+        assert dropped_log_records.value() == before + 1
+    
+    def test_keeps_structured_fields(self):
+        """Test queued records keep their extra fields for the listener."""
+        handler = NonBlockingQueueHandler(queue.Queue())
+        
+        handler.handle(make_record(conversation_id="abc"))
+        
+        assert handler.queue.get_nowait().conversation_id == "abc"
+    
+    def test_exceptions_reach_the_formatter(self):
+        """Test tracebacks are formatted by the listener under exc_info."""
+        handler = NonBlockingQueueHandler(queue.Queue())
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = make_record(logging.ERROR, "request %s failed", exc_info=sys.exc_info())
+        record.args = ("abc",)
+        
+        handler.handle(record)
+        payload = json.loads(JSONFormatter().format(handler.queue.get_nowait()))
+        
+        assert payload["message"] == "request abc failed"
+        assert "ValueError: boom" in payload["exc_info"]
+        assert record.exc_info is not None
+
+
+class TestMessageContent:
+    """Test cases for keeping message content out of logs."""
+    
+    def test_content_fields_off_by_default(self):
+        """Test content fields are only attached when enabled."""
+        assert content_fields(message_preview="I feel low") == {}
+        with patch('api.logging_config.settings.LOG_MESSAGE_CONTENT', True):
+            assert content_fields(message_preview="I feel low") == {"message_preview": "I feel low"}
+    
+    @patch('api.routes.settings.OPENAI_API_KEY', 'test-key')
+    def test_chat_logs_exclude_message(self, caplog):
+        """Test a chat request logs no part of the user's message."""
+        secret = "my private therapy disclosure"
+        
+        with caplog.at_level(logging.DEBUG):
+            response = TestClient(app).post("/api/v1/chat", json={"message": secret})
+        
+        assert response.status_code == 200
+        assert caplog.records
+        for record in caplog.records:
+            assert "private therapy" not in record.getMessage()
+            assert not any("private therapy" in str(value) for value in vars(record).values())
@@ -0,0 +1,50 @@
+"""
+Unit tests for the event loop lag monitor.
+"""
+
+import asyncio
+import logging
+import time
+import pytest
+from api.loop_monitor import LoopMonitor, loop_blocked, loop_lag
+
+
+def block_the_loop(seconds: float) -> None:
+    """Block the calling thread the way a synchronous client call would."""
+    time.sleep(seconds)
+
+
+class TestLoopMonitor:
+    """Test cases for LoopMonitor."""
+    
+    @pytest.mark.asyncio
+    async def test_samples_lag(self):
+        """Test an idle loop records lag samples."""
+        monitor = LoopMonitor(interval=0.01, threshold=1.0)
+        before = loop_lag.count()
+        
+        await monitor.start()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        
+        assert loop_lag.count() > before
+        assert not monitor.running
+    
+    @pytest.mark.asyncio
+    async def test_reports_blocking_call_with_stack(self, caplog):
+        """Test a blocking call is reported once, with the stack that blocked the loop."""
+        monitor = LoopMonitor(interval=0.01, threshold=0.05)
+        before = loop_blocked.value()
+        
+        await monitor.start()
+        with caplog.at_level(logging.WARNING, logger="api.loop_monitor"):
+            await asyncio.sleep(0.02)
+            block_the_loop(0.3)
+            await asyncio.sleep(0.02)
+        await monitor.stop()
+        
+        records = [record for record in caplog.records if record.getMessage() == "event loop blocked"]
+        assert loop_blocked.value() == before + 1
+        assert len(records) == 1
+        assert records[0].blocked_ms > 50
+        assert "block_the_loop" in records[0].stack
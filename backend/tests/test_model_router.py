@@ -0,0 +1,155 @@
+"""
+Unit tests for per-request model routing.
+"""
+
+import httpx
+import pytest
+from unittest.mock import Mock, AsyncMock
+from openai import APIConnectionError
+from api.chat_service import ChatService
+from api.model_router import ModelRouter, assess_risk
+from api.models import ChatRequest
+
+
+@pytest.fixture
+def router(clock):
+    """Create a router over a fast and a capable model."""
+    return ModelRouter(
+        ["fast-model", "capable-model"],
+        light_max_chars=100,
+        light_max_history=4,
+        latency_slo=5,
+        ewma_alpha=0.5,
+        cooldown_seconds=30,
+        clock=clock
+    )
+
+
+class TestAssessRisk:
+    """Test cases for assess_risk."""
+    
+    def test_crisis_language_is_high_risk(self):
+        """Test crisis phrases in the message are high risk."""
+        assert assess_risk("Sometimes I think about killing myself", []) == "high"
+        assert assess_risk("I just want to die", []) == "high"
+    
+    def test_low_mood_is_elevated(self):
+        """Test a depressed mood or earlier crisis language is elevated."""
+        history = [{"role": "user", "content": "I have thought about self-harm"}]
+        
+        assert assess_risk("Hi", [], "depressed") == "elevated"
+        assert assess_risk("Thanks", history) == "elevated"
+    
+    def test_everyday_message_is_low_risk(self):
+        """Test ordinary check-ins are low risk."""
+        assert assess_risk("Work was busy today but I'm okay", [], "stressed") == "low"
+
+
+class TestModelRouter:
+    """Test cases for ModelRouter."""
+    
+    def test_short_check_in_routes_light(self, router):
+        """Test short low-risk messages prefer the fast model."""
+        decision = router.route("Feeling okay today", [])
+        
+        assert decision.route == "light"
+        assert decision.candidates == ("fast-model", "capable-model")
+    
+    def test_long_message_routes_standard(self, router):
+        """Test long messages or histories prefer the capable model."""
+        history = [{"role": "user", "content": "Hi"}] * 5
+        
+        assert router.route("x" * 101, []).model == "capable-model"
+        assert router.route("Hi", history).route == "standard"
+    
+    def test_high_risk_routes_to_capable_model(self, router):
+        """Test crisis messages go to the capable model even when short."""
+        decision = router.route("I want to die", [])
+        
+        assert decision.route == "high_risk"
+        assert decision.model == "capable-model"
+    
+    def test_slow_model_is_avoided(self, router, clock):
+        """Test a model over the latency SLO is demoted until the cooldown ends."""
+        router.record_latency("fast-model", 4)
+        router.record_latency("fast-model", 8)
+        
+        assert router.route("Hi", []).model == "capable-model"
+        
+        clock.now += 30
+        assert router.route("Hi", []).model == "fast-model"
+    
+    def test_failed_model_is_avoided(self, router, clock):
+        """Test a failing model is demoted but kept as a last resort."""
+        router.record_failure("capable-model")
+        
+        decision = router.route("x" * 200, [])
+        
+        assert decision.candidates == ("fast-model", "capable-model")
+
+
+class TestChatServiceRouting:
+    """Test cases for model routing in ChatService."""
+    
+    @pytest.fixture
+    def chat_service(self):
+        """Create a chat service routing over two models."""
+        chat_service = ChatService()
+        chat_service.router = ModelRouter(["fast-model", "capable-model"])
+        chat_service.upstream.max_attempts = 1
+        chat_service.client = Mock()
+        return chat_service
+    
+    @staticmethod
+    def completion(content: str) -> Mock:
+        response = Mock()
+        response.choices = [Mock()]
+        response.choices[0].message.content = content
+        return response
+    
+    @pytest.mark.asyncio
+    async def test_routing_is_recorded_on_response(self, chat_service):
+        """Test the response reports the model and route used."""
+        chat_service.client.chat.completions.create = AsyncMock(return_value=self.completion("Glad to hear it."))
+        
+        response = await chat_service.get_therapeutic_response(ChatRequest(message="Doing fine"))
+        
+        assert response.model == "fast-model"
+        assert response.route == "light"
+        assert chat_service.client.chat.completions.create.call_args.kwargs["model"] == "fast-model"
+    
+    @pytest.mark.asyncio
+    async def test_fails_over_to_next_model(self, chat_service):
+        """Test an erroring model fails over to the next candidate."""
+        error = APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+        chat_service.client.chat.completions.create = AsyncMock(side_effect=[error, self.completion("I'm here.")])
+        
+        response = await chat_service.get_therapeutic_response(ChatRequest(message="Doing fine"))
+        
+        assert response.source == "upstream"
+        assert response.model == "capable-model"
+        assert response.route == "failover"
+    
+    @pytest.mark.asyncio
+    async def test_failover_reply_cached_under_answering_model(self, chat_service):
+        """Test a failover reply is cached for the model that wrote it, not the routed one."""
+        error = APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+        chat_service.client.chat.completions.create = AsyncMock(side_effect=[error, self.completion("I'm here.")])
+        request = ChatRequest(message="Doing fine", use_cache=True)
+        
+        await chat_service.get_therapeutic_response(request)
+        
+        assert chat_service.response_cache.get(chat_service._response_cache_key("fast-model", request, [])) is None
+        assert chat_service.response_cache.get(chat_service._response_cache_key("capable-model", request, [])) == "I'm here."
+    
+    @pytest.mark.asyncio
+    async def test_high_risk_skips_cache(self, chat_service):
+        """Test crisis messages are never served from the response cache."""
+        chat_service.client.chat.completions.create = AsyncMock(return_value=self.completion("Please reach out."))
+        request = ChatRequest(message="I want to die", use_cache=True)
+        
+        await chat_service.get_therapeutic_response(request)
+        response = await chat_service.get_therapeutic_response(request)
+        
+        assert response.source == "upstream"
+        assert chat_service.client.chat.completions.create.call_count == 2
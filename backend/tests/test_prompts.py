@@ -0,0 +1,35 @@
+"""
+Unit tests for the prompt template registry.
+"""
+
+from api.config import settings
+from api.prompts import PromptRegistry, prompts
+
+
+class TestPromptRegistry:
+    """Test cases for PromptRegistry."""
+    
+    def test_system_message_is_static(self):
+        """Test the system message is the prompt alone and shared between calls."""
+        assert prompts.system_message == {"role": "system", "content": settings.THERAPIST_SYSTEM_PROMPT}
+        assert "Current user mood:" not in prompts.system_message["content"]
+    
+    def test_known_moods_are_precompiled(self):
+        """Test known moods reuse one note while others are built on demand."""
+        note = prompts.mood_note("anxious")
+        
+        assert note is prompts.mood_note("anxious")
+        assert note["role"] == "system"
+        assert "Current user mood: anxious" in note["content"]
+        assert "appropriate therapeutic support" in note["content"]
+        assert "Current user mood: hopeful" in prompts.mood_note("hopeful")["content"]
+        assert prompts.mood_note("hopeful") is not prompts.mood_note("hopeful")
+        assert prompts.mood_note(None) is None
+    
+    def test_version_tracks_templates(self):
+        """Test the version changes with the prompt or the mood note."""
+        base = PromptRegistry("Be kind.")
+        
+        assert base.version == PromptRegistry("Be kind.").version
+        assert base.version != PromptRegistry("Be kinder.").version
+        assert base.version != PromptRegistry("Be kind.", mood_note_template="Mood: {mood}").version
@@ -0,0 +1,201 @@
+"""
+Unit tests for per-client rate limiting.
+"""
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from api.rate_limit import RateLimiter, RateLimitMiddleware, TokenBucketTable, estimate_request_tokens
+from api.serialization import loads
+
+
+class TestTokenBucketTable:
+    """Test cases for TokenBucketTable."""
+    
+    def test_bucket_refills_over_time(self):
+        """Test spent tokens come back at the configured rate."""
+        table = TokenBucketTable(60)
+        
+        assert table.consume("a", 60, 0.0) == 0
+        assert table.wait_time("a", 1, 0.0) == pytest.approx(1.0)
+        assert table.level("a", 30.0) == pytest.approx(30)
+        assert table.level("a", 120.0) == 60
+    
+    def test_table_is_bounded(self):
+        """Test the least recently used keys are evicted beyond max_keys."""
+        table = TokenBucketTable(60, max_keys=2)
+        
+        for key in ("a", "b", "c"):
+            table.consume(key, 1, 0.0)
+        
+        assert len(table) == 2
+        assert table.level("a", 0.0) == 60
+    
+    def test_idle_keys_are_evicted(self):
+        """Test keys idle for a full refill period are dropped."""
+        table = TokenBucketTable(60)
+        table.consume("idle", 1, 0.0)
+        
+        table.consume("active", 1, 61.0)
+        
+        assert len(table) == 1
+
+
+class TestRateLimiter:
+    """Test cases for RateLimiter."""
+    
+    def test_ip_request_limit(self, clock):
+        """Test requests beyond the per-IP limit are rejected with a retry hint."""
+        limiter = RateLimiter(ip_requests_per_minute=2, ip_tokens_per_minute=0, clock=clock)
+        
+        assert limiter.check("1.2.3.4", None, 10).allowed
+        assert limiter.check("1.2.3.4", None, 10).allowed
+        decision = limiter.check("1.2.3.4", None, 10)
+        
+        assert not decision.allowed
+        assert decision.bucket == "ip_requests"
+        assert decision.retry_after == 30
+        assert limiter.check("5.6.7.8", None, 10).allowed
+        
+        clock.now += 30
+        assert limiter.check("1.2.3.4", None, 10).allowed
+    
+    def test_conversation_token_limit(self, clock):
+        """Test a conversation is limited on estimated tokens across IPs."""
+        limiter = RateLimiter(
+            ip_requests_per_minute=0,
+            ip_tokens_per_minute=0,
+            conversation_requests_per_minute=0,
+            conversation_tokens_per_minute=1000,
+            clock=clock
+        )
+        
+        assert limiter.check("1.1.1.1", "conv", 600).allowed
+        decision = limiter.check("2.2.2.2", "conv", 600)
+        
+        assert not decision.allowed
+        assert decision.bucket == "conversation_tokens"
+    
+    def test_rejection_does_not_consume_quota(self, clock):
+        """Test a request rejected by one bucket is not charged to the others."""
+        limiter = RateLimiter(
+            ip_requests_per_minute=10,
+            ip_tokens_per_minute=0,
+            conversation_requests_per_minute=1,
+            conversation_tokens_per_minute=0,
+            clock=clock
+        )
+        
+        limiter.check("1.1.1.1", "conv", 1)
+        for _ in range(5):
+            assert not limiter.check("1.1.1.1", "conv", 1).allowed
+        
+        assert limiter.check("1.1.1.1", None, 1).remaining == 8
+    
+    def test_batch_items_are_charged_separately(self, clock):
+        """Test every batch item counts as a request, including against its conversation."""
+        limiter = RateLimiter(
+            ip_requests_per_minute=10,
+            ip_tokens_per_minute=0,
+            conversation_requests_per_minute=2,
+            conversation_tokens_per_minute=0,
+            clock=clock
+        )
+        
+        decision = limiter.check_batch("1.1.1.1", [("conv", 1), ("conv", 1), (None, 1)])
+        
+        assert decision.allowed
+        assert decision.remaining == 7
+        assert limiter.check("1.1.1.1", "conv", 1).bucket == "conversation_requests"
+    
+    def test_batch_above_capacity_is_oversized(self, clock):
+        """Test a batch no bucket could ever afford is rejected without a retry hint."""
+        limiter = RateLimiter(ip_requests_per_minute=0, ip_tokens_per_minute=1000, clock=clock)
+        
+        decision = limiter.check_batch("1.1.1.1", [(None, 600), (None, 600)])
+        
+        assert not decision.allowed
+        assert decision.oversized
+        assert "Retry-After" not in decision.headers()
+        # A single request above capacity is only throttled
+        assert limiter.check("1.1.1.1", None, 5000).allowed
+    
+    def test_estimate_request_tokens(self):
+        """Test the estimate counts message and history characters."""
+        payload = {
+            "message": "x" * 400,
+            "conversation_history": [{"role": "user", "content": "y" * 400}]
+        }
+        
+        assert estimate_request_tokens(payload) - estimate_request_tokens({}) == 200
+
+
+class TestRateLimitMiddleware:
+    """Test cases for RateLimitMiddleware."""
+    
+    @pytest.fixture
+    def client(self, clock):
+        """Create a test app limited to two chat requests per minute."""
+        app = FastAPI()
+        limiter = RateLimiter(ip_requests_per_minute=2, ip_tokens_per_minute=0, clock=clock)
+        app.add_middleware(RateLimitMiddleware, limiter=limiter)
+        
+        @app.post("/api/v1/chat")
+        async def chat(request: Request):
+            return await request.json()
+        
+        @app.get("/api/v1/health")
+        async def health():
+            return {"status": "healthy"}
+        
+        return TestClient(app)
+    
+    def test_body_is_passed_through(self, client):
+        """Test the buffered body still reaches the endpoint, with limit headers."""
+        response = client.post("/api/v1/chat", json={"message": "Hello"})
+        
+        assert response.status_code == 200
+        assert response.json() == {"message": "Hello"}
+        assert response.headers["RateLimit-Limit"] == "2"
+        assert response.headers["RateLimit-Remaining"] == "1"
+    
+    def test_rejection_returns_429(self, client):
+        """Test exceeding the limit returns 429 with standard headers."""
+        for _ in range(2):
+            client.post("/api/v1/chat", json={"message": "Hello"})
+        
+        response = client.post("/api/v1/chat", json={"message": "Hello"})
+        
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "30"
+        assert response.headers["RateLimit-Remaining"] == "0"
+    
+    def test_oversized_batch_returns_413(self, client):
+        """Test a batch with more items than the request limit is rejected outright."""
+        response = client.post("/api/v1/chat/batch", json={"requests": [{"message": "Hello"}] * 3})
+        
+        assert response.status_code == 413
+        assert "Retry-After" not in response.headers
+    
+    def test_requests_field_ignored_outside_batch(self, client):
+        """Test a chat body with an empty requests list is still charged as one request."""
+        for _ in range(2):
+            assert client.post("/api/v1/chat", json={"message": "hi", "requests": []}).status_code == 200
+        
+        response = client.post("/api/v1/chat", json={"message": "hi", "requests": []})
+        
+        assert response.status_code == 429
+    
+    def test_other_routes_are_not_limited(self, client):
+        """Test only chat requests are counted."""
+        for _ in range(5):
+            assert client.get("/api/v1/health").status_code == 200
+    
+    def test_body_decoded_with_fast_decoder(self, client):
+        """Test the limiter decodes bodies with the shared fast decoder."""
+        with patch('api.rate_limit.loads', wraps=loads) as decode:
+            response = client.post("/api/v1/chat", json={"message": "Hello"})
+        
+        assert response.status_code == 200
+        decode.assert_called_once()
@@ -0,0 +1,129 @@
+"""
+Unit tests for the exact-match response cache.
+"""
+
+import pytest
+from unittest.mock import Mock, AsyncMock
+from api.chat_service import ChatService
+from api.metrics import metrics
+from api.models import ChatRequest
+from api.response_cache import ResponseCache
+
+
+def make_key(message: str = "I feel anxious", **overrides) -> str:
+    """Build a cache key with default prompt parameters."""
+    params = {
+        "model": "gpt-4",
+        "prompt_version": "v1",
+        "user_mood": "anxious",
+        "history": [],
+        "message": message,
+        "temperature": 0.7
+    }
+    params.update(overrides)
+    return ResponseCache.make_key(**params)
+
+
+class TestResponseCache:
+    """Test cases for ResponseCache."""
+    
+    def test_key_normalizes_message(self):
+        """Test case and whitespace differences map to the same key."""
+        assert make_key("I feel   anxious ") == make_key("i feel anxious")
+    
+    def test_key_depends_on_prompt_parameters(self):
+        """Test every prompt parameter is part of the key."""
+        base = make_key()
+        
+        assert make_key(model="gpt-3.5-turbo") != base
+        assert make_key(prompt_version="v2") != base
+        assert make_key(user_mood="stressed") != base
+        assert make_key(history=[{"role": "user", "content": "hi"}]) != base
+        assert make_key(temperature=0.2) != base
+    
+    def test_get_and_put(self):
+        """Test cached replies are returned and counted."""
+        cache = ResponseCache()
+        key = make_key()
+        hits_before = metrics.counter("everkind_response_cache_requests_total", "").value(cache="exact", result="hit")
+        
+        assert cache.get(key) is None
+        cache.put(key, "reply")
+        
+        assert cache.get(key) == "reply"
+        assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+        hits_after = metrics.counter("everkind_response_cache_requests_total", "").value(cache="exact", result="hit")
+        assert hits_after == hits_before + 1
+    
+    def test_ttl_expiry(self, clock):
+        """Test replies expire after the TTL."""
+        cache = ResponseCache(ttl_seconds=10, clock=clock)
+        cache.put("k", "reply")
+        
+        clock.now += 11
+        
+        assert cache.get("k") is None
+        assert len(cache) == 0
+    
+    def test_lru_bound(self):
+        """Test the least recently used reply is evicted at capacity."""
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+
+
+class TestChatServiceResponseCache:
+    """Test cases for response cache use in ChatService."""
+    
+    @pytest.fixture
+    def chat_service(self):
+        """Create a ChatService with a mocked OpenAI client."""
+        service = ChatService()
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "Let's take a breath together."
+        service.client = Mock()
+        service.client.chat.completions.create = AsyncMock(return_value=mock_response)
+        return service
+    
+    @pytest.mark.asyncio
+    async def test_opt_in_request_served_from_cache(self, chat_service):
+        """Test an identical opted-in prompt skips the upstream call."""
+        request = ChatRequest(message="I feel anxious", user_mood="anxious", use_cache=True)
+        
+        first = await chat_service.get_therapeutic_response(request)
+        second = await chat_service.get_therapeutic_response(request)
+        
+        assert first.source == "upstream"
+        assert second.source == "cache"
+        assert second.response == first.response
+        assert second.conversation_id != first.conversation_id
+        assert chat_service.client.chat.completions.create.call_count == 1
+        assert chat_service.get_conversation_history(second.conversation_id)[-1]["content"] == first.response
+    
+    @pytest.mark.asyncio
+    async def test_cache_is_opt_in(self, chat_service):
+        """Test requests without use_cache always go upstream."""
+        request = ChatRequest(message="I feel anxious", user_mood="anxious")
+        
+        await chat_service.get_therapeutic_response(request)
+        response = await chat_service.get_therapeutic_response(request)
+        
+        assert response.source == "upstream"
+        assert chat_service.client.chat.completions.create.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_fallbacks_are_not_cached(self, chat_service):
+        """Test fallback replies never enter the cache."""
+        chat_service.client.chat.completions.create.side_effect = Exception("API Error")
+        request = ChatRequest(message="I feel anxious", use_cache=True)
+        
+        response = await chat_service.get_therapeutic_response(request)
+        
+        assert response.source == "fallback"
+        assert len(chat_service.response_cache) == 0
@@ -0,0 +1,145 @@
+"""
+Unit tests for deadline-aware retries and hedged upstream requests.
+"""
+
+import asyncio
+import httpx
+import pytest
+from unittest.mock import Mock, AsyncMock
+from openai import APIConnectionError
+from api.chat_service import ChatService, is_retryable
+from api.models import ChatRequest
+from api.retry import Deadline, DeadlineExceeded, LatencyTracker, UpstreamCaller, hedged_requests
+
+
+def connection_error() -> APIConnectionError:
+    return APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+
+
+class TestUpstreamCaller:
+    """Test cases for UpstreamCaller."""
+    
+    @pytest.mark.asyncio
+    async def test_retries_transient_errors(self):
+        """Test a transient error is retried and the later result returned."""
+        caller = UpstreamCaller(max_attempts=3, base_delay=0.001)
+        attempt = AsyncMock(side_effect=[RuntimeError("blip"), "ok"])
+        
+        assert await caller.call(attempt, Deadline(5)) == "ok"
+        assert attempt.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_attempts(self):
+        """Test the last error is raised once attempts are exhausted."""
+        caller = UpstreamCaller(max_attempts=2, base_delay=0.001)
+        attempt = AsyncMock(side_effect=RuntimeError("down"))
+        
+        with pytest.raises(RuntimeError):
+            await caller.call(attempt, Deadline(5))
+        assert attempt.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_non_retryable_errors_are_raised(self):
+        """Test errors rejected by is_retryable are not retried."""
+        caller = UpstreamCaller(max_attempts=3, is_retryable=lambda e: False)
+        attempt = AsyncMock(side_effect=ValueError("bad request"))
+        
+        with pytest.raises(ValueError):
+            await caller.call(attempt, Deadline(5))
+        assert attempt.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_backoff_respects_deadline(self):
+        """Test no retry is attempted when its backoff would outlast the deadline."""
+        caller = UpstreamCaller(max_attempts=5, base_delay=10, max_delay=10)
+        caller.backoff = lambda retry: 10
+        attempt = AsyncMock(side_effect=RuntimeError("down"))
+        
+        with pytest.raises(RuntimeError):
+            await caller.call(attempt, Deadline(1))
+        assert attempt.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_expired_deadline(self):
+        """Test an attempt failing after the deadline raises DeadlineExceeded."""
+        caller = UpstreamCaller(max_attempts=3)
+        
+        async def slow(deadline):
+            await asyncio.sleep(deadline.remaining())
+            raise RuntimeError("timed out")
+        
+        with pytest.raises(DeadlineExceeded):
+            await caller.call(slow, Deadline(0.01))
+    
+    @pytest.mark.asyncio
+    async def test_hedge_wins_over_slow_attempt(self):
+        """Test a hedged request answers when the first attempt stalls."""
+        caller = UpstreamCaller(hedge=True, hedge_min_samples=1, hedge_min_delay=0.01)
+        caller.latency.observe(0.01)
+        calls = 0
+        cancelled = asyncio.Event()
+        
+        async def attempt(deadline):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.set()
+                    raise
+            return f"attempt {calls}"
+        
+        won_before = hedged_requests.value(outcome="won")
+        
+        assert await caller.call(attempt, Deadline(5)) == "attempt 2"
+        await asyncio.sleep(0)
+        assert cancelled.is_set()
+        assert hedged_requests.value(outcome="won") == won_before + 1
+    
+    @pytest.mark.asyncio
+    async def test_no_hedge_without_samples(self):
+        """Test hedging waits for enough latency samples."""
+        caller = UpstreamCaller(hedge=True, hedge_min_samples=10)
+        
+        assert caller.hedge_delay() is None
+
+
+class TestLatencyTracker:
+    """Test cases for LatencyTracker."""
+    
+    def test_quantile(self):
+        """Test the quantile reflects recent samples."""
+        tracker = LatencyTracker(window=100, refresh_every=1)
+        for i in range(1, 101):
+            tracker.observe(i / 100)
+        
+        assert tracker.quantile(0.95) == pytest.approx(0.95)
+        assert tracker.quantile(0.5) == pytest.approx(0.5)
+
+
+class TestChatServiceRetries:
+    """Test cases for upstream retries in ChatService."""
+    
+    def test_is_retryable(self):
+        """Test only transient upstream errors are retried."""
+        assert is_retryable(connection_error())
+        assert not is_retryable(ValueError("bug"))
+    
+    @pytest.mark.asyncio
+    async def test_connection_error_is_retried(self):
+        """Test a dropped connection is retried instead of falling back."""
+        chat_service = ChatService()
+        chat_service.upstream.base_delay = 0.001
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "I'm here with you."
+        chat_service.client = Mock()
+        chat_service.client.chat.completions.create = AsyncMock(side_effect=[connection_error(), mock_response])
+        
+        response = await chat_service.get_therapeutic_response(ChatRequest(message="Hello"))
+        
+        assert response.source == "upstream"
+        assert response.response == "I'm here with you."
+        assert chat_service.client.chat.completions.create.call_count == 2
+        assert chat_service.client.chat.completions.create.call_args.kwargs["timeout"] > 0
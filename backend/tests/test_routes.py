@@ -95,6 +95,17 @@ class TestChatEndpoint:
         data = response.json()
         assert "AI service not configured" in data["detail"]
     
+    @patch('api.routes.settings.OPENAI_API_KEY', 'test-key')
+    def test_chat_endpoint_unknown_conversation(self, client):
+        """Test continuing an unknown conversation returns 404."""
+        response = client.post("/api/v1/chat", json={
+            "message": "Hello again",
+            "conversation_id": "does-not-exist"
+        })
+        
+        assert response.status_code == 404
+        assert "Conversation not found" in response.json()["detail"]
+    
     @patch('api.routes.settings.OPENAI_API_KEY', 'test-key')
     @patch('api.routes.chat_service.get_therapeutic_response')
     def test_chat_endpoint_service_error(self, mock_chat_service, client, sample_chat_data):
@@ -108,6 +119,49 @@ class TestChatEndpoint:
         assert "unexpected error occurred" in data["detail"]
 
 
+class TestChatStreamEndpoint:
+    """Test cases for the streaming chat endpoint."""
+    
+    @patch('api.routes.settings.OPENAI_API_KEY', 'test-key')
+    @patch('api.routes.chat_service.stream_therapeutic_response')
+    def test_chat_stream_endpoint_success(self, mock_stream, client, sample_chat_data):
+        """Test the stream endpoint emits SSE delta and done events."""
+        async def fake_events(request):
+            yield "delta", "Hello"
+            yield "delta", " there"
+            yield "done", '{"conversation_id": "test-uuid-123"}'
+        
+        mock_stream.side_effect = fake_events
+        
+        response = client.post("/api/v1/chat/stream", json=sample_chat_data)
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text == (
+            'event: delta\ndata: {"content": "Hello"}\n\n'
+            'event: delta\ndata: {"content": " there"}\n\n'
+            'event: done\ndata: {"conversation_id": "test-uuid-123"}\n\n'
+        )
+    
+    @patch('api.routes.settings.OPENAI_API_KEY', 'test-key')
+    def test_chat_stream_endpoint_unknown_conversation(self, client):
+        """Test streaming an unknown conversation returns 404 before streaming."""
+        response = client.post("/api/v1/chat/stream", json={
+            "message": "Hello again",
+            "conversation_id": "does-not-exist"
+        })
+        
+        assert response.status_code == 404
+    
+    @patch('api.routes.settings.OPENAI_API_KEY', None)
+    def test_chat_stream_endpoint_no_api_key(self, client, sample_chat_data):
+        """Test stream endpoint when OpenAI API key is not configured."""
+        response = client.post("/api/v1/chat/stream", json=sample_chat_data)
+        
+        assert response.status_code == 500
+        assert "AI service not configured" in response.json()["detail"]
+
+
 class TestHealthEndpoint:
     """Test cases for the health endpoint."""
     
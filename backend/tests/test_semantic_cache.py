@@ -0,0 +1,168 @@
+"""
+Unit tests for the local semantic response cache.
+"""
+
+import numpy as np
+import pytest
+from unittest.mock import Mock, AsyncMock, patch
+from api.chat_service import ChatService
+from api.models import ChatRequest, ChatMessage
+from api.semantic_cache import HashingVectorizer, SemanticCache
+
+
+class TestHashingVectorizer:
+    """Test cases for HashingVectorizer."""
+    
+    @pytest.fixture
+    def vectorizer(self):
+        """Create a vectorizer."""
+        return HashingVectorizer()
+    
+    def test_embedding_is_unit_length_and_deterministic(self, vectorizer):
+        """Test embeddings are normalized and stable."""
+        first = vectorizer.embed("I am so stressed about work")
+        second = vectorizer.embed("I am so stressed about work")
+        
+        assert np.isclose(np.linalg.norm(first), 1.0)
+        assert np.array_equal(first, second)
+    
+    def test_paraphrases_are_closer_than_unrelated(self, vectorizer):
+        """Test paraphrased openers score higher than unrelated messages."""
+        base = vectorizer.embed("I'm so stressed about work")
+        paraphrase = vectorizer.embed("work is stressing me out")
+        unrelated = vectorizer.embed("I can't sleep at night")
+        
+        assert float(base @ paraphrase) > float(base @ unrelated)
+    
+    def test_stop_words_only(self, vectorizer):
+        """Test messages without content words embed to zeros."""
+        assert not vectorizer.embed("I am so").any()
+
+
+class TestSemanticCache:
+    """Test cases for SemanticCache."""
+    
+    @pytest.fixture
+    def cache(self, clock):
+        """Create a small semantic cache."""
+        return SemanticCache(HashingVectorizer(), capacity=4, threshold=0.8, clock=clock)
+    
+    def test_similar_message_hits(self, cache):
+        """Test a near-identical opener reuses the cached reply."""
+        cache.store("I feel anxious", "anxious", "Let's ground ourselves.")
+        
+        assert cache.lookup("I'm feeling really anxious", "anxious") == "Let's ground ourselves."
+        assert cache.stats()["hits"] == 1
+    
+    def test_different_message_misses(self, cache):
+        """Test unrelated messages do not reuse replies."""
+        cache.store("I feel anxious", "anxious", "Let's ground ourselves.")
+        
+        assert cache.lookup("My partner left me", "anxious") is None
+    
+    def test_mood_must_match(self, cache):
+        """Test replies are only reused for the same mood."""
+        cache.store("I feel anxious", "anxious", "Let's ground ourselves.")
+        
+        assert cache.lookup("I feel anxious", "stressed") is None
+        assert cache.lookup("I feel anxious", None) is None
+    
+    def test_namespace_must_match(self, cache):
+        """Test replies are only reused within their namespace."""
+        cache.store("I feel anxious", "anxious", "Let's ground ourselves.", "gpt-4o-mini:v1")
+        
+        assert cache.lookup("I feel anxious", "anxious", "gpt-4o:v1") is None
+        assert cache.lookup("I feel anxious", "anxious", "gpt-4o-mini:v2") is None
+        assert cache.lookup("I feel anxious", "anxious", "gpt-4o-mini:v1") == "Let's ground ourselves."
+    
+    def test_per_mood_threshold(self, clock):
+        """Test a stricter mood threshold rejects looser matches."""
+        cache = SemanticCache(
+            HashingVectorizer(),
+            threshold=0.5,
+            mood_thresholds={"Depressed": 0.99},
+            clock=clock
+        )
+        cache.store("stressed about work and money", "depressed", "reply")
+        cache.store("stressed about work and money", "stressed", "reply")
+        
+        assert cache.lookup("work is stressing me out", "stressed") == "reply"
+        assert cache.lookup("work is stressing me out", "depressed") is None
+    
+    def test_ttl_expiry(self, cache, clock):
+        """Test expired replies are not reused."""
+        cache.store("I feel anxious", "anxious", "reply")
+        
+        clock.now += cache.ttl_seconds + 1
+        
+        assert cache.lookup("I feel anxious", "anxious") is None
+    
+    def test_evicts_least_recently_used(self, cache, clock):
+        """Test the least recently used entry is replaced when full."""
+        messages = ["anxious about exams", "stressed about money", "lonely at home", "angry at my boss"]
+        for message in messages:
+            clock.now += 1
+            cache.store(message, None, message)
+        
+        clock.now += 10
+        cache.lookup("anxious about exams", None)
+        cache.store("tired all the time", None, "tired")
+        
+        assert len(cache) == 4
+        assert cache.lookup("stressed about money", None) is None
+        assert cache.lookup("anxious about exams", None) == "anxious about exams"
+        assert cache.lookup("tired all the time", None) == "tired"
+
+
+class TestChatServiceSemanticCache:
+    """Test cases for semantic cache use in ChatService."""
+    
+    @pytest.fixture
+    def chat_service(self):
+        """Create a ChatService with the semantic cache and a mocked client."""
+        with patch('api.chat_service.settings.SEMANTIC_CACHE_ENABLED', True):
+            service = ChatService()
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "Let's ground ourselves."
+        service.client = Mock()
+        service.client.chat.completions.create = AsyncMock(return_value=mock_response)
+        return service
+    
+    @pytest.mark.asyncio
+    async def test_paraphrased_opener_served_from_cache(self, chat_service):
+        """Test a paraphrased first message skips the upstream call."""
+        await chat_service.get_therapeutic_response(
+            ChatRequest(message="I feel anxious", user_mood="anxious")
+        )
+        response = await chat_service.get_therapeutic_response(
+            ChatRequest(message="I'm feeling really anxious!", user_mood="anxious")
+        )
+        
+        assert response.source == "semantic_cache"
+        assert chat_service.client.chat.completions.create.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_prompt_change_bypasses_old_replies(self, chat_service):
+        """Test replies cached under another prompt version are not reused."""
+        await chat_service.get_therapeutic_response(ChatRequest(message="I feel anxious", user_mood="anxious"))
+        
+        with patch('api.chat_service.prompts.version', 'next'):
+            response = await chat_service.get_therapeutic_response(
+                ChatRequest(message="I'm feeling really anxious!", user_mood="anxious")
+            )
+        
+        assert response.source == "upstream"
+        assert chat_service.client.chat.completions.create.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_follow_up_turns_bypass_semantic_cache(self, chat_service):
+        """Test only first-turn messages use the semantic cache."""
+        history = [ChatMessage(role="user", content="hi"), ChatMessage(role="assistant", content="hello")]
+        for message in ["I feel anxious", "I'm feeling really anxious!"]:
+            response = await chat_service.get_therapeutic_response(
+                ChatRequest(message=message, conversation_history=history)
+            )
+        
+        assert response.source == "upstream"
+        assert len(chat_service.semantic_cache) == 0
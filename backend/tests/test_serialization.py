@@ -0,0 +1,72 @@
+"""
+Unit tests for fast-path request parsing and response encoding.
+"""
+
+import json
+import pytest
+from fastapi.testclient import TestClient
+from fastapi.exceptions import RequestValidationError
+from unittest.mock import AsyncMock, Mock, patch
+from main import app
+from api.models import ChatRequest, ChatResponse
+from api.serialization import FastJSONResponse, dumps, json_body, loads, openapi_body
+
+
+class TestEncoding:
+    """Test cases for JSON encoding."""
+    
+    def test_model_matches_default_encoding(self):
+        """Test models encode to the same JSON as FastAPI's default path."""
+        response = ChatResponse(response="Let's take it step by step ✨", conversation_id="abc", model="gpt-4o-mini")
+        
+        encoded = FastJSONResponse(response).body
+        
+        assert json.loads(encoded) == response.model_dump(mode="json")
+    
+    def test_plain_data_roundtrip(self):
+        """Test plain data survives dumps and loads."""
+        payload = {"conversation_id": "abc", "messages": [{"role": "user", "content": "Ça va?"}]}
+        
+        assert loads(dumps(payload)) == payload
+    
+    def test_health_response_unchanged(self):
+        """Test the fast route renders the same body as the default path."""
+        client = TestClient(app)
+        
+        fast = client.get("/api/v1/health").json()
+        with patch('api.serialization.settings.FAST_SERIALIZATION_ENABLED', False):
+            default = client.get("/api/v1/health").json()
+        
+        assert fast.keys() == default.keys()
+        assert fast["version"] == default["version"]
+
+
+class TestJsonBody:
+    """Test cases for the json_body dependency."""
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("fast", [True, False])
+    async def test_rejects_invalid_json(self, fast):
+        """Test malformed bodies raise a validation error on both paths."""
+        request = Mock(body=AsyncMock(return_value=b'{"message": '))
+        
+        with patch('api.serialization.settings.FAST_SERIALIZATION_ENABLED', fast):
+            with pytest.raises(RequestValidationError) as raised:
+                await json_body(ChatRequest)(request)
+        
+        assert raised.value.errors()[0]["type"] == "json_invalid"
+        assert raised.value.errors()[0]["loc"][0] == "body"
+    
+    def test_validation_errors_are_422(self):
+        """Test invalid chat bodies still get FastAPI's 422 error format."""
+        response = TestClient(app).post("/api/v1/chat", content=b'{"message": ""}')
+        
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "message"]
+    
+    def test_schema_documents_body(self):
+        """Test the OpenAPI schema inlines nested models of the body."""
+        schema = openapi_body(ChatRequest)["requestBody"]["content"]["application/json"]["schema"]
+        
+        assert "$defs" not in json.dumps(schema)
+        assert "role" in schema["properties"]["conversation_history"]["items"]["properties"]
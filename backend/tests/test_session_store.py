@@ -0,0 +1,243 @@
+"""
+Unit tests for the conversation session store.
+"""
+
+import sqlite3
+import time
+import pytest
+from api.session_store import InMemorySessionStore, SQLiteSessionStore, estimate_session_size
+
+
+def make_session(content: str = "hello") -> dict:
+    """Build a minimal session record."""
+    return {
+        "messages": [{"role": "user", "content": content}],
+        "last_response": "reply"
+    }
+
+
+class TestInMemorySessionStore:
+    """Test cases for InMemorySessionStore."""
+    
+    def test_put_and_get(self, clock):
+        """Test storing and retrieving a session."""
+        store = InMemorySessionStore(clock=clock)
+        session = make_session()
+        
+        store.put("a", session)
+        
+        assert store.get("a") is session
+        assert "a" in store
+        assert len(store) == 1
+        assert store.stats()["hits"] == 2
+    
+    def test_get_missing(self, clock):
+        """Test a miss is counted for unknown sessions."""
+        store = InMemorySessionStore(clock=clock)
+        
+        assert store.get("missing") is None
+        assert store.stats()["misses"] == 1
+    
+    def test_lru_eviction_by_entries(self, clock):
+        """Test the least recently used session is evicted first."""
+        store = InMemorySessionStore(max_entries=2, clock=clock)
+        store.put("a", make_session())
+        store.put("b", make_session())
+        
+        store.get("a")  # "b" is now least recently used
+        store.put("c", make_session())
+        
+        assert store.get("b") is None
+        assert store.get("a") is not None
+        assert store.get("c") is not None
+        assert store.stats()["evictions"] == 1
+    
+    def test_ttl_expiry(self, clock):
+        """Test idle sessions expire after the TTL."""
+        store = InMemorySessionStore(ttl_seconds=10, clock=clock)
+        store.put("a", make_session())
+        
+        clock.now += 11
+        
+        assert store.get("a") is None
+        assert len(store) == 0
+        assert store.stats()["expirations"] == 1
+    
+    def test_expired_entries_purged_on_put(self, clock):
+        """Test writes purge expired entries from the front."""
+        store = InMemorySessionStore(ttl_seconds=10, clock=clock)
+        store.put("a", make_session())
+        store.put("b", make_session())
+        
+        clock.now += 20
+        store.put("c", make_session())
+        
+        assert len(store) == 1
+        assert store.stats()["expirations"] == 2
+    
+    def test_byte_budget(self, clock):
+        """Test the byte budget evicts old sessions."""
+        size = estimate_session_size(make_session("x" * 100))
+        store = InMemorySessionStore(max_bytes=size * 2, clock=clock)
+        
+        for key in ["a", "b", "c"]:
+            store.put(key, make_session("x" * 100))
+        
+        assert len(store) == 2
+        assert store.get("a") is None
+        assert store.stats()["bytes"] <= size * 2
+    
+    def test_oversized_session_not_stored(self, clock):
+        """Test a session larger than the whole budget is rejected."""
+        store = InMemorySessionStore(max_bytes=100, clock=clock)
+        store.put("a", make_session("x" * 1000))
+        
+        assert store.get("a") is None
+        assert store.stats()["bytes"] == 0
+    
+    def test_replace_updates_bytes(self, clock):
+        """Test replacing a session does not double count its size."""
+        store = InMemorySessionStore(clock=clock)
+        store.put("a", make_session())
+        store.put("a", make_session())
+        
+        assert len(store) == 1
+        assert store.stats()["bytes"] == estimate_session_size(make_session())
+    
+    def test_delete(self, clock):
+        """Test deleting a session."""
+        store = InMemorySessionStore(clock=clock)
+        store.put("a", make_session())
+        
+        assert store.delete("a") is True
+        assert store.delete("a") is False
+        assert store.stats()["bytes"] == 0
+
+
+class TestSQLiteSessionStore:
+    """Test cases for SQLiteSessionStore."""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        """Path to a temporary database file."""
+        return str(tmp_path / "sessions.db")
+    
+    def make_store(self, db_path: str, **kwargs) -> SQLiteSessionStore:
+        """Create a store with a slow writer so flushes are explicit."""
+        kwargs.setdefault("flush_interval", 60)
+        return SQLiteSessionStore(db_path, InMemorySessionStore(), **kwargs)
+    
+    def test_wal_mode_enabled(self, db_path):
+        """Test the database runs in WAL journal mode."""
+        store = self.make_store(db_path)
+        try:
+            mode = sqlite3.connect(db_path).execute("PRAGMA journal_mode").fetchone()[0]
+            assert mode == "wal"
+        finally:
+            store.close()
+    
+    def test_writes_are_deferred_and_batched(self, db_path):
+        """Test puts are served from cache and persisted in one flush."""
+        store = self.make_store(db_path)
+        try:
+            store.put("a", make_session("one"))
+            store.put("b", make_session("two"))
+            
+            assert store.stats()["pending_writes"] == 2
+            assert store.stats()["db_writes"] == 0
+            assert store.get("a")["messages"][0]["content"] == "one"
+            
+            store.flush()
+            
+            stats = store.stats()
+            assert stats["pending_writes"] == 0
+            assert stats["db_writes"] == 2
+            assert stats["flushes"] == 1
+        finally:
+            store.close()
+    
+    def test_sessions_survive_restart(self, db_path):
+        """Test sessions written by one store are readable by another."""
+        first = self.make_store(db_path)
+        first.put("a", make_session("persisted"))
+        first.close()
+        
+        second = self.make_store(db_path)
+        try:
+            session = second.get("a")
+            assert session["messages"][0]["content"] == "persisted"
+            assert second.stats()["db_reads"] == 1
+            
+            # Second read is served from the hot cache
+            second.get("a")
+            assert second.stats()["db_reads"] == 1
+        finally:
+            second.close()
+    
+    def test_delete(self, db_path):
+        """Test deletes are persisted."""
+        store = self.make_store(db_path)
+        store.put("a", make_session())
+        store.flush()
+        
+        assert store.delete("a") is True
+        store.close()
+        
+        reopened = self.make_store(db_path)
+        try:
+            assert reopened.get("a") is None
+        finally:
+            reopened.close()
+    
+    def test_batch_size_triggers_flush(self, db_path):
+        """Test reaching the batch size wakes the writer early."""
+        store = self.make_store(db_path, batch_size=2)
+        try:
+            store.put("a", make_session())
+            store.put("b", make_session())
+            
+            deadline = time.monotonic() + 5
+            while store.stats()["db_writes"] < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            
+            assert store.stats()["db_writes"] == 2
+        finally:
+            store.close()
+    
+    def test_other_workers_writes_seen_after_cache_ttl(self, db_path, clock):
+        """Test cached sessions are served without querying until they expire."""
+        first = self.make_store(db_path)
+        second = SQLiteSessionStore(db_path, InMemorySessionStore(ttl_seconds=30, clock=clock), flush_interval=60)
+        try:
+            first.put("a", make_session("one"))
+            first.flush()
+            assert len(second.get("a")["messages"]) == 1
+            
+            session = make_session("one")
+            session["messages"] += [{"role": "assistant", "content": "two"}, {"role": "user", "content": "three"}]
+            first.put("a", session)
+            first.flush()
+            
+            assert len(second.get("a")["messages"]) == 1
+            assert second.stats()["db_reads"] == 1
+            
+            clock.now += 31
+            assert len(second.get("a")["messages"]) == 3
+        finally:
+            first.close()
+            second.close()
+    
+    def test_len_tracks_writes_without_querying(self, db_path):
+        """Test the session count follows inserts, updates and deletes."""
+        store = self.make_store(db_path)
+        try:
+            store.put("a", make_session())
+            store.put("b", make_session())
+            store.flush()
+            store.put("a", make_session("again"))
+            store.delete("b")
+            store.flush()
+            
+            assert len(store) == 1
+        finally:
+            store.close()
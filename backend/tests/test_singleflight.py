@@ -0,0 +1,174 @@
+"""
+Unit tests for in-flight request coalescing.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import Mock, AsyncMock
+from api.chat_service import ChatService
+from api.models import ChatRequest
+from api.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test cases for SingleFlight."""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_result(self):
+        """Test followers receive the leader's result without a second call."""
+        flight = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+        
+        async def work():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "result"
+        
+        tasks = [asyncio.create_task(flight.do("key", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        
+        assert await asyncio.gather(*tasks) == ["result"] * 5
+        assert calls == 1
+        assert len(flight) == 0
+    
+    @pytest.mark.asyncio
+    async def test_different_keys_run_separately(self):
+        """Test calls with different keys are not coalesced."""
+        flight = SingleFlight()
+        work = AsyncMock(side_effect=["a", "b"])
+        
+        results = await asyncio.gather(flight.do("a", work), flight.do("b", work))
+        
+        assert results == ["a", "b"]
+        assert work.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_all_callers(self):
+        """Test every caller receives the shared exception."""
+        flight = SingleFlight()
+        
+        async def failing():
+            await asyncio.sleep(0)
+            raise RuntimeError("upstream down")
+        
+        results = await asyncio.gather(
+            flight.do("key", failing),
+            flight.do("key", failing),
+            return_exceptions=True
+        )
+        
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert len(flight) == 0
+    
+    @pytest.mark.asyncio
+    async def test_leader_cancellation_does_not_affect_followers(self):
+        """Test a cancelled leader leaves the call running for followers."""
+        flight = SingleFlight()
+        release = asyncio.Event()
+        
+        async def work():
+            await release.wait()
+            return "result"
+        
+        leader = asyncio.create_task(flight.do("key", work))
+        follower = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        
+        assert await follower == "result"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+    
+    @pytest.mark.asyncio
+    async def test_call_cancelled_when_all_callers_leave(self):
+        """Test the shared call is cancelled once nobody waits for it."""
+        flight = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+        
+        async def work():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        
+        callers = [asyncio.create_task(flight.do("key", work)) for _ in range(2)]
+        await started.wait()
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        
+        assert cancelled.is_set()
+        assert len(flight) == 0
+
+
+class TestChatServiceCoalescing:
+    """Test cases for duplicate request coalescing in ChatService."""
+    
+    @pytest.mark.asyncio
+    async def test_duplicate_submissions_share_upstream_call(self):
+        """Test a double submission triggers a single OpenAI call."""
+        chat_service = ChatService()
+        release = asyncio.Event()
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "I'm here with you."
+        
+        async def create(**kwargs):
+            await release.wait()
+            return mock_response
+        
+        chat_service.client = Mock()
+        chat_service.client.chat.completions.create = AsyncMock(side_effect=create)
+        
+        chat_service._store_session("conversation-1", [], "Hello", "Hi, I'm here.")
+        first = asyncio.create_task(chat_service.get_therapeutic_response(
+            ChatRequest(message="I can't sleep", conversation_id="conversation-1")
+        ))
+        second = asyncio.create_task(chat_service.get_therapeutic_response(
+            ChatRequest(message="I can't sleep", conversation_id="conversation-1")
+        ))
+        await asyncio.sleep(0)
+        release.set()
+        
+        first_response, second_response = await asyncio.gather(first, second)
+        
+        assert first_response is second_response
+        assert chat_service.client.chat.completions.create.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_new_conversations_are_not_merged(self):
+        """Test identical openers from different users get separate sessions."""
+        chat_service = ChatService()
+        release = asyncio.Event()
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "I'm here with you."
+        
+        async def create(**kwargs):
+            await release.wait()
+            return mock_response
+        
+        chat_service.client = Mock()
+        chat_service.client.chat.completions.create = AsyncMock(side_effect=create)
+        
+        callers = [
+            asyncio.create_task(chat_service.get_therapeutic_response(ChatRequest(message="I'm feeling anxious")))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        
+        first_response, second_response = await asyncio.gather(*callers)
+        
+        assert first_response.conversation_id != second_response.conversation_id
+        assert chat_service.client.chat.completions.create.call_count == 2
@@ -0,0 +1,133 @@
+"""
+Unit tests for rolling conversation summarization.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import patch
+from api.chat_service import ChatService
+from api.models import ChatRequest
+from api.session_store import InMemorySessionStore
+from api.summarizer import ConversationSummarizer, summary_for_prompt
+
+
+def make_messages(count: int) -> list:
+    """Build alternating user/assistant messages."""
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"}
+        for i in range(count)
+    ]
+
+
+class FakeCompletion:
+    """Records summarization prompts and returns numbered summaries."""
+    
+    def __init__(self):
+        self.prompts = []
+    
+    async def __call__(self, messages, max_tokens):
+        self.prompts.append(messages)
+        return f"summary {len(self.prompts)}"
+
+
+class TestConversationSummarizer:
+    """Test cases for ConversationSummarizer."""
+    
+    @pytest.fixture
+    def store(self):
+        """Create an in-memory session store."""
+        return InMemorySessionStore()
+    
+    @pytest.fixture
+    def summarizer(self, store):
+        """Create a summarizer with small thresholds."""
+        return ConversationSummarizer(store, trigger_messages=6, keep_recent_messages=2)
+    
+    @pytest.mark.asyncio
+    async def test_below_threshold_not_scheduled(self, store, summarizer):
+        """Test short conversations are left alone."""
+        store.put("c", {"messages": make_messages(4), "last_response": ""})
+        
+        assert summarizer.maybe_schedule("c", FakeCompletion()) is False
+    
+    @pytest.mark.asyncio
+    async def test_summarizes_oldest_messages(self, store, summarizer):
+        """Test a pass folds all but the newest messages into the summary."""
+        store.put("c", {"messages": make_messages(8), "last_response": ""})
+        complete = FakeCompletion()
+        
+        assert summarizer.maybe_schedule("c", complete) is True
+        await asyncio.gather(*summarizer._tasks.values())
+        
+        session = store.get("c")
+        assert session["summary"] == "summary 1"
+        assert session["summarized_count"] == 6
+        assert len(session["messages"]) == 8
+        assert "message 5" in complete.prompts[0][1]["content"]
+        assert "message 6" not in complete.prompts[0][1]["content"]
+    
+    @pytest.mark.asyncio
+    async def test_incremental_pass_only_sends_new_messages(self, store, summarizer):
+        """Test later passes extend the previous summary instead of starting over."""
+        store.put("c", {
+            "messages": make_messages(14),
+            "last_response": "",
+            "summary": "earlier summary",
+            "summarized_count": 6
+        })
+        complete = FakeCompletion()
+        
+        summarizer.maybe_schedule("c", complete)
+        await asyncio.gather(*summarizer._tasks.values())
+        
+        prompt = complete.prompts[0][1]["content"]
+        assert "earlier summary" in prompt
+        assert "message 5" not in prompt
+        assert "message 6" in prompt
+        assert store.get("c")["summarized_count"] == 12
+    
+    @pytest.mark.asyncio
+    async def test_failure_keeps_session(self, store, summarizer):
+        """Test a failed summarization leaves the session untouched."""
+        store.put("c", {"messages": make_messages(8), "last_response": ""})
+        
+        async def failing(messages, max_tokens):
+            raise RuntimeError("upstream down")
+        
+        summarizer.maybe_schedule("c", failing)
+        await asyncio.gather(*summarizer._tasks.values())
+        
+        assert "summary" not in store.get("c")
+        assert summarizer.failures == 1
+    
+    def test_summary_for_prompt(self):
+        """Test the stored summary only applies to histories it covers."""
+        session = {"summary": "s", "summarized_count": 4}
+        
+        assert summary_for_prompt(session, make_messages(6)) == ("s", 4)
+        assert summary_for_prompt(session, make_messages(2)) == (None, 0)
+        assert summary_for_prompt(None, make_messages(6)) == (None, 0)
+
+
+class TestChatServiceSummaries:
+    """Test cases for summary use in ChatService prompts."""
+    
+    @patch('api.chat_service.settings.SUMMARY_ENABLED', True)
+    def test_prompt_replaces_summarized_turns(self):
+        """Test summarized turns are replaced by the summary in the prompt."""
+        chat_service = ChatService()
+        history = make_messages(8)
+        chat_service.session_store.put("c", {
+            "messages": history,
+            "last_response": "",
+            "summary": "User is anxious about exams.",
+            "summarized_count": 6
+        })
+        
+        messages = chat_service._prepare_messages(
+            ChatRequest(message="Any tips?", conversation_id="c"), history, "c"
+        )
+        
+        assert [m["role"] for m in messages] == ["system", "system", "user", "assistant", "user"]
+        assert "anxious about exams" in messages[1]["content"]
+        assert messages[2]["content"] == "message 6"
@@ -0,0 +1,195 @@
+"""
+Unit tests for Prometheus metrics and per-stage request telemetry.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from main import app
+from api.chat_service import ChatService, chat_service as global_chat_service
+from api.llm_backends import OfflineBackend
+from api.metrics import MetricsRegistry
+from api.models import ChatRequest
+from api.telemetry import (
+    RequestTimings,
+    TraceBuffer,
+    _current_timings,
+    completion_tokens,
+    fallback_responses,
+    request_duration,
+    stage,
+    stage_duration
+)
+
+
+def instant_backend() -> OfflineBackend:
+    """Create an offline backend that answers immediately."""
+    return OfflineBackend(latency_median=0, tokens_per_second=0)
+
+
+class TestPrometheusRendering:
+    """Test cases for the Prometheus text format."""
+    
+    def test_render(self):
+        """Test counters, gauges and histograms render with HELP, TYPE and labels."""
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests").inc(3, route="/chat")
+        registry.gauge("queue_depth", "Queue depth").set(2.5)
+        histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+        
+        lines = registry.render().splitlines()
+        
+        assert "# HELP requests_total Requests" in lines
+        assert "# TYPE requests_total counter" in lines
+        assert 'requests_total{route="/chat"} 3' in lines
+        assert "# TYPE queue_depth gauge" in lines
+        assert "queue_depth 2.5" in lines
+        assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{le="1"} 2' in lines
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+        assert "latency_seconds_sum 5.55" in lines
+        assert "latency_seconds_count 3" in lines
+    
+    def test_label_values_are_escaped(self):
+        """Test quotes, backslashes and newlines in label values are escaped."""
+        registry = MetricsRegistry()
+        registry.counter("errors_total", "Errors").inc(error='bad "quote"\\\n')
+        
+        assert 'errors_total{error="bad \\"quote\\"\\\\\\n"} 1' in registry.render()
+
+
+class TestMetricsEndpoint:
+    """Test cases for the /metrics endpoint."""
+    
+    def test_exposes_request_latency(self):
+        """Test request latency is labelled by route template and status."""
+        client = TestClient(app)
+        before = request_duration.count(method="GET", route="/api/v1/conversation/{conversation_id}", status="404")
+        
+        client.get("/api/v1/conversation/unknown-id")
+        response = client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE everkind_request_duration_seconds histogram" in response.text
+        assert "everkind_active_sessions " in response.text
+        assert request_duration.count(
+            method="GET", route="/api/v1/conversation/{conversation_id}", status="404"
+        ) == before + 1
+    
+    @patch('api.routes.settings.OPENAI_API_KEY', 'test-key')
+    def test_chat_records_stages_and_tokens(self):
+        """Test a chat request records every non-streaming stage and its tokens."""
+        stages = ("parse", "prompt_build", "upstream", "serialization")
+        before = {name: stage_duration.count(stage=name) for name in stages}
+        tokens_before = sum(completion_tokens.snapshot().values())
+        
+        with patch.object(global_chat_service, "backend", instant_backend()):
+            response = TestClient(app).post("/api/v1/chat", json={"message": "Hello there"})
+        
+        assert response.status_code == 200
+        for name in stages:
+            assert stage_duration.count(stage=name) == before[name] + 1
+        assert completion_tokens.value(model=response.json()["model"]) > 0
+        assert sum(completion_tokens.snapshot().values()) > tokens_before
+
+
+class TestChatServiceTelemetry:
+    """Test cases for telemetry recorded by ChatService."""
+    
+    @pytest.mark.asyncio
+    async def test_stream_records_time_to_first_token(self):
+        """Test the first streamed token of a request is timed once."""
+        chat_service = ChatService()
+        chat_service.backend = instant_backend()
+        before = stage_duration.count(stage="ttft")
+        
+        token = _current_timings.set(RequestTimings(0.0))
+        try:
+            events = [event async for event in chat_service.stream_therapeutic_response(ChatRequest(message="Hi"))]
+        finally:
+            _current_timings.reset(token)
+        
+        assert len(events) > 2
+        assert stage_duration.count(stage="ttft") == before + 1
+    
+    @pytest.mark.asyncio
+    async def test_fallback_is_counted(self):
+        """Test fallback replies are counted by reason."""
+        chat_service = ChatService()
+        before = fallback_responses.value(reason="not_configured")
+        
+        response = await chat_service.get_therapeutic_response(ChatRequest(message="Hello"))
+        
+        assert response.source == "fallback"
+        assert fallback_responses.value(reason="not_configured") == before + 1
+
+
+class TestTracing:
+    """Test cases for Server-Timing headers and the trace buffer."""
+    
+    def test_server_timing_header(self):
+        """Test responses carry their stage, middleware and total times and trace id."""
+        response = TestClient(app).get("/api/v1/health")
+        
+        header = response.headers["server-timing"]
+        assert "route;" not in header
+        assert "endpoint;dur=" in header
+        assert "middleware;dur=" in header
+        assert "total;dur=" in header
+        assert 'trace;desc="' in header
+    
+    def test_stages_nest_as_spans(self):
+        """Test stages opened inside a stage become its child spans."""
+        timings = RequestTimings(0.0)
+        token = _current_timings.set(timings)
+        try:
+            with stage("upstream"):
+                with stage("upstream_call"):
+                    pass
+        finally:
+            _current_timings.reset(token)
+        
+        assert [(name, parent) for name, parent, _, _ in timings.spans] == [("upstream", -1), ("upstream_call", 0)]
+        assert all(end is not None for _, _, _, end in timings.spans)
+    
+    def test_buffer_keeps_newest(self):
+        """Test the buffer is bounded and filters by duration."""
+        buffer = TraceBuffer(capacity=2)
+        for index in range(3):
+            buffer.record(RequestTimings(0.0), "GET", "/health", "200", index / 10)
+        
+        snapshot = buffer.snapshot()
+        assert [trace["duration_ms"] for trace in snapshot] == [200.0, 100.0]
+        assert len(buffer.snapshot(min_duration=0.15)) == 1
+        assert len(buffer.snapshot(limit=1)) == 1
+    
+    @patch('main.settings.DEBUG_TRACES_TOKEN', 'secret')
+    @patch('api.routes.settings.OPENAI_API_KEY', 'test-key')
+    def test_chat_trace(self):
+        """Test a chat trace holds its stages, model and tokens but no message content."""
+        client = TestClient(app)
+        with patch.object(global_chat_service, "backend", instant_backend()):
+            response = client.post("/api/v1/chat", json={"message": "my private disclosure"})
+        
+        assert "upstream_call;dur=" in response.headers["server-timing"]
+        found = client.get("/debug/traces", params={"limit": 5}, headers={"X-Debug-Token": "secret"})
+        assert found.status_code == 200
+        trace = next(item for item in found.json()["traces"] if item["route"] == "/api/v1/chat")
+        names = {span["name"] for span in trace["spans"]}
+        assert {"route", "parse", "endpoint", "prompt_build", "upstream", "upstream_queue", "upstream_call"} <= names
+        assert trace["attributes"]["model"] == response.json()["model"]
+        assert trace["attributes"]["completion_tokens"] > 0
+        assert "private" not in found.text
+    
+    def test_debug_traces_protected(self):
+        """Test /debug/traces is hidden without a token and rejects a wrong one."""
+        client = TestClient(app)
+        
+        assert client.get("/debug/traces").status_code == 404
+        with patch('main.settings.DEBUG_TRACES_TOKEN', 'secret'):
+            assert client.get("/debug/traces").status_code == 403
+            assert client.get("/debug/traces", headers={"X-Debug-Token": "wrong"}).status_code == 403
@@ -67,7 +67,8 @@ export default function ChatPage() {
     const mood = moodOptions.find(m => m.id === moodId)
     if (mood) {
       const moodMessage = `I'm feeling ${mood.label.toLowerCase()} - ${mood.description}`
-      await sendMessage(moodMessage, moodId)
+      // Mood openers are identical for every user, so a cached reply is fine
+      await sendMessage(moodMessage, moodId, { useCache: true })
     }
   }
 
@@ -12,20 +12,39 @@ export interface ChatMessage {
 
 export interface ChatRequest {
   message: string;
-  conversation_history: ChatMessage[];
+  // Continue a conversation stored on the server...
+  conversation_id?: string;
+  // ...or send the full history for stateless requests
+  conversation_history?: ChatMessage[];
   user_mood?: string;
+  // Allow a cached reply to an identical prompt
+  use_cache?: boolean;
 }
 
 export interface ChatResponse {
   response: string;
   conversation_id: string;
   timestamp: string;
+  source?: 'upstream' | 'cache' | 'semantic_cache' | 'fallback';
+  model?: string | null;
+  route?: 'light' | 'standard' | 'high_risk' | 'failover' | null;
 }
 
 export interface HealthResponse {
   status: string;
   timestamp: string;
   version: string;
+  upstream_circuit?: 'closed' | 'half_open' | 'open';
+}
+
+export class ApiError extends Error {
+  status: number;
+
+  constructor(message: string, status: number) {
+    super(message);
+    this.name = 'ApiError';
+    this.status = status;
+  }
 }
 
 class ApiClient {
@@ -50,8 +69,9 @@ class ApiClient {
 
       if (!response.ok) {
         const errorData = await response.json().catch(() => null);
-        throw new Error(
-          errorData?.detail || `HTTP error! status: ${response.status}`
+        throw new ApiError(
+          errorData?.detail || `HTTP error! status: ${response.status}`,
+          response.status
         );
       }
 
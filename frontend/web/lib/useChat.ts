@@ -1,5 +1,5 @@
 import { useState, useCallback, useEffect } from 'react';
-import { apiClient, convertToApiFormat, type ChatResponse } from './api';
+import { apiClient, convertToApiFormat, ApiError, type ChatResponse } from './api';
 
 export interface Message {
   id: string;
@@ -13,12 +13,17 @@ export interface UseChatOptions {
   onError?: (error: Error) => void;
 }
 
+export interface SendMessageOptions {
+  // Allow a cached reply, e.g. for canned mood-button openers
+  useCache?: boolean;
+}
+
 export interface UseChatReturn {
   messages: Message[];
   isLoading: boolean;
   error: string | null;
   conversationId: string | null;
-  sendMessage: (content: string, mood?: string) => Promise<void>;
+  sendMessage: (content: string, mood?: string, options?: SendMessageOptions) => Promise<void>;
   clearMessages: () => void;
   isApiHealthy: boolean;
 }
@@ -47,7 +52,7 @@ export function useChat(options: UseChatOptions = {}): UseChatReturn {
     checkHealth();
   }, []);
 
-  const sendMessage = useCallback(async (content: string, mood?: string) => {
+  const sendMessage = useCallback(async (content: string, mood?: string, options: SendMessageOptions = {}) => {
     if (!content.trim()) return;
 
     setIsLoading(true);
@@ -64,15 +69,32 @@ export function useChat(options: UseChatOptions = {}): UseChatReturn {
     setMessages(prev => [...prev, userMessage]);
 
     try {
-      // Prepare conversation history (exclude the current message)
-      const conversationHistory = convertToApiFormat(messages);
-
-      // Send to API
-      const response: ChatResponse = await apiClient.sendChatMessage({
-        message: content.trim(),
-        conversation_history: conversationHistory,
-        user_mood: mood,
-      });
+      // Send only the new message once the server holds the conversation;
+      // fall back to the full history if it no longer knows about it
+      const sendWithHistory = () =>
+        apiClient.sendChatMessage({
+          message: content.trim(),
+          conversation_history: convertToApiFormat(messages),
+          user_mood: mood,
+          use_cache: options.useCache,
+        });
+
+      let response: ChatResponse;
+      if (conversationId) {
+        try {
+          response = await apiClient.sendChatMessage({
+            message: content.trim(),
+            conversation_id: conversationId,
+            user_mood: mood,
+            use_cache: options.useCache,
+          });
+        } catch (err) {
+          if (!(err instanceof ApiError && err.status === 404)) throw err;
+          response = await sendWithHistory();
+        }
+      } else {
+        response = await sendWithHistory();
+      }
 
       // Add AI response
       const aiMessage: Message = {
@@ -108,7 +130,7 @@ export function useChat(options: UseChatOptions = {}): UseChatReturn {
     } finally {
       setIsLoading(false);
     }
-  }, [messages, onError]);
+  }, [messages, conversationId, onError]);
 
   const clearMessages = useCallback(() => {
     setMessages([]);